@@ -1,7 +1,7 @@
 
 import json
 from textwrap import dedent
-from typing import Annotated, Callable, Optional, Union, cast
+from typing import Annotated, Callable, MutableMapping, Optional, Union, cast
 from web3 import Web3
 from autotx.AutoTx import AutoTx
 from gnosis.eth import EthereumNetworkNotSupported as ChainIdNotSupported
@@ -86,7 +86,7 @@ def filter_token_list_by_network(tokens: list[dict[str, str]], network_name: str
 
 def add_tokens_address_if_not_in_registry(
     tokens_in_category: list[dict[str, Union[str, dict[str, str]]]],
-    tokens: dict[str, str],
+    tokens: MutableMapping[str, str],
     current_network: str,
 ) -> None:
     for token_with_address in tokens_in_category:
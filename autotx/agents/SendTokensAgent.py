@@ -8,11 +8,9 @@ from autotx.intents import SendIntent
 from autotx.token import Token
 from autotx.utils.ethereum import (
     build_transfer_erc20,
-    get_erc20_balance,
 )
-from autotx.utils.ethereum.constants import NATIVE_TOKEN_ADDRESS
 from autotx.eth_address import ETHAddress
-from autotx.utils.ethereum.get_native_balance import get_native_balance
+from autotx.utils.ethereum.get_token_balances import get_token_balances
 from web3.types import TxParams
 
 name = "send-tokens"
@@ -118,12 +116,8 @@ class GetTokenBalanceTool(AutoTxTool):
             owner_addr = ETHAddress(owner)
             token_address = ETHAddress(autotx.network.tokens[token.lower()])
             
-            balance: float = 0
-
-            if token_address.hex == NATIVE_TOKEN_ADDRESS:
-                balance = get_native_balance(web3, owner_addr)
-            else:
-                balance = get_erc20_balance(web3, token_address, owner_addr)
+            [token_balance] = get_token_balances(web3, [(token_address, owner_addr)], autotx.network.chain_id)
+            balance: float = token_balance.amount
 
             autotx.notify_user(f"Fetching {token} balance for {str(owner_addr)}: {balance} {token}")
             
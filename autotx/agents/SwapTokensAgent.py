@@ -1,3 +1,4 @@
+import asyncio
 from decimal import Decimal
 from textwrap import dedent
 from typing import Annotated, Any, Callable, Coroutine
@@ -13,6 +14,9 @@ from gnosis.eth import EthereumNetworkNotSupported as ChainIdNotSupported
 
 name = "swap-tokens"
 
+# Independent swap lines are quoted concurrently, bounded to avoid hammering the LiFi API
+MAX_CONCURRENT_SWAPS = 4
+
 system_message = lambda autotx: dedent(f"""
     You are an expert at buying and selling tokens. Assist the user in their task of swapping tokens.
     ONLY focus on the buy and sell (swap) aspect of the user's goal and let other agents handle other tasks.
@@ -81,7 +85,10 @@ def get_tokens_address(token_in: str, token_out: str, network_info: NetworkInfo)
 class InvalidInput(Exception):
     pass
 
-async def swap(autotx: AutoTx, token_to_sell: str, token_to_buy: str) -> Intent:
+def get_token_symbol(token_with_amount: str) -> str:
+    return token_with_amount.split(" ")[-1].lower()
+
+async def build_swap_intent(autotx: AutoTx, token_to_sell: str, token_to_buy: str) -> Intent:
     sell_parts = token_to_sell.split(" ")
     buy_parts = token_to_buy.split(" ")
 
@@ -139,8 +146,6 @@ async def swap(autotx: AutoTx, token_to_sell: str, token_to_buy: str) -> Intent:
             amount=float(exact_amount),
         )
 
-    autotx.add_intents([swap_intent])
-
     return swap_intent
 
 class BulkSwapTool(AutoTxTool):
@@ -164,20 +169,45 @@ class BulkSwapTool(AutoTxTool):
                 """
             ],
         ) -> str:
-            swaps = tokens.split("\n")
-            all_intents = []
+            swaps: list[tuple[str, str]] = []
+            for swap_str in tokens.split("\n"):
+                (token_to_sell, token_to_buy) = swap_str.strip().split(" to ")
+                swaps.append((token_to_sell, token_to_buy))
+
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_SWAPS)
+
+            async def prepare_swap(token_to_sell: str, token_to_buy: str, dependencies: list[asyncio.Task[Intent]]) -> Intent:
+                await asyncio.gather(*dependencies, return_exceptions=True)
+                async with semaphore:
+                    return await build_swap_intent(autotx, token_to_sell, token_to_buy)
+
+            tasks: list[asyncio.Task[Intent]] = []
+            for (token_to_sell, token_to_buy) in swaps:
+                # A line that sells the output token of an earlier line waits for that line to be prepared
+                dependencies = [
+                    task
+                    for (task, (_, earlier_token_to_buy)) in zip(tasks, swaps)
+                    if get_token_symbol(earlier_token_to_buy) == get_token_symbol(token_to_sell)
+                ]
+                tasks.append(asyncio.create_task(prepare_swap(token_to_sell, token_to_buy, dependencies)))
+
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            all_intents: list[Intent] = []
             all_errors: list[Exception] = []
 
-            for swap_str in swaps:
-                (token_to_sell, token_to_buy) = swap_str.strip().split(" to ")
-                try:
-                    intent = await swap(autotx, token_to_sell, token_to_buy)
-                    all_intents.append(intent)
-                except InvalidInput as e:
-                    all_errors.append(e)
-                except Exception as e:
-                    all_errors.append(Exception(f"Error: {e} for swap \"{token_to_sell} to {token_to_buy}\""))
+            for ((token_to_sell, token_to_buy), result) in zip(swaps, results):
+                if isinstance(result, InvalidInput):
+                    all_errors.append(result)
+                elif isinstance(result, Exception):
+                    all_errors.append(Exception(f"Error: {result} for swap \"{token_to_sell} to {token_to_buy}\""))
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    all_intents.append(result)
 
+            # Intents are added in the original line order, regardless of which quote finished first
+            autotx.add_intents(all_intents)
 
             summary = "".join(
                 f"Prepared transaction: {intent.summary}\n"
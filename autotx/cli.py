@@ -125,6 +125,17 @@ def new_app(name: str) -> None:
 
     print(f"Application '{name}' created with API key: {app.api_key}")
 
+@main.command()
+@click.option("-i", "--id", "app_id", type=str, help="ID of the application to revoke")
+def revoke_app(app_id: str) -> None:
+    from autotx import db
+
+    if not db.revoke_app(app_id):
+        print(f"Application '{app_id}' not found")
+        return
+
+    print(f"Application '{app_id}' revoked, running servers stop accepting its API key within {db.AUTH_CACHE_TTL_SEC} seconds")
+
 @main.group()
 def agent() -> None:
     pass
@@ -1,17 +1,25 @@
-from datetime import datetime
-import json
+import asyncio
+from datetime import datetime, timedelta
 import os
-from typing import Any, cast
+from threading import Lock
+from typing import Any, Callable, cast
 import uuid
+from postgrest._sync.request_builder import SyncSelectRequestBuilder
+from postgrest.types import CountMethod
 from pydantic import BaseModel
-from supabase import create_client
-from supabase.client import Client
+from supabase import acreate_client, create_client
+from supabase.client import AsyncClient, Client
 from supabase.lib.client_options import ClientOptions
 
 from autotx import models
-from autotx.intents import load_intent
+from autotx.eth_address import ETHAddress
+from autotx.intents import Intent, load_intent
+from autotx.task_queue import TaskQueue
 from autotx.transactions import Transaction, TransactionBase
 from autotx.utils.dump_pydantic_list import dump_pydantic_list
+from autotx.utils.task_cursor import decode_task_cursor, encode_task_cursor
+from autotx.utils.ethereum.safe_nonces import SafeNonceStore
+from autotx.utils.ttl_cache import TTLCache
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -22,6 +30,10 @@ if not SUPABASE_URL:
 if not SUPABASE_KEY:
     raise Exception("No supabase service role key provided")
 
+# Clients are created once per schema and reused, their HTTP connections are kept alive between queries
+db_clients: dict[str, Client] = {}
+db_clients_lock = Lock()
+
 def get_db_client(schema: str) -> Client:
     if not SUPABASE_URL:
         raise Exception("No supabase url provided")
@@ -29,8 +41,69 @@ def get_db_client(schema: str) -> Client:
     if not SUPABASE_KEY:
         raise Exception("No supabase service role key provided")
 
-    options = ClientOptions(schema=schema)
-    return create_client(SUPABASE_URL, SUPABASE_KEY, options)
+    with db_clients_lock:
+        if schema not in db_clients:
+            options = ClientOptions(schema=schema)
+            db_clients[schema] = create_client(SUPABASE_URL, SUPABASE_KEY, options)
+
+        return db_clients[schema]
+
+# Async handlers use an async client so database reads don't block the event loop.
+# A client is bound to the event loop it was created on, it is replaced when the loop changes
+async_db_clients: dict[str, tuple[asyncio.AbstractEventLoop, AsyncClient]] = {}
+
+async def a_get_db_client(schema: str) -> AsyncClient:
+    if not SUPABASE_URL:
+        raise Exception("No supabase url provided")
+
+    if not SUPABASE_KEY:
+        raise Exception("No supabase service role key provided")
+
+    loop = asyncio.get_running_loop()
+    entry = async_db_clients.get(schema)
+    if entry is None or entry[0] is not loop:
+        options = ClientOptions(schema=schema)
+        entry = (loop, await acreate_client(SUPABASE_URL, SUPABASE_KEY, options))
+        async_db_clients[schema] = entry
+
+    return entry[1]
+
+async def a_close_db_clients() -> None:
+    loop = asyncio.get_running_loop()
+    for schema, (client_loop, client) in list(async_db_clients.items()):
+        if client_loop is loop:
+            await client.postgrest.aclose()
+        del async_db_clients[schema]
+
+# PostgREST returns at most max_rows (supabase/config.toml) rows per request and silently drops the rest,
+# longer reads are split into pages of this size. It must not be larger than max_rows
+DB_PAGE_SIZE = 1000
+
+# Reads the rows of the query from offset, a page at a time until a page comes back short.
+# build_query must return a new query on each call, the query builders are mutated by range()
+def select_all(build_query: Callable[[], SyncSelectRequestBuilder[Any]], offset: int = 0, limit: int | None = None) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+
+    while limit is None or len(rows) < limit:
+        page_size = DB_PAGE_SIZE if limit is None else min(DB_PAGE_SIZE, limit - len(rows))
+        start = offset + len(rows)
+        page = build_query().range(start, start + page_size - 1).execute().data
+        rows.extend(page)
+
+        if len(page) < page_size:
+            break
+
+    return rows
+
+# Columns of the tasks table, messages and logs are stored in their own tables
+TASK_COLUMNS = ["id", "prompt", "address", "chain_id", "created_at", "updated_at", "running", "status", "error", "intents", "previous_task_id", "feedback"]
+TASK_FIELDS = TASK_COLUMNS + ["messages", "logs"]
+
+# Apps and users are read on every request, apps revoked directly in the database stop being authorized once the entry expires
+AUTH_CACHE_TTL_SEC = 60
+AUTH_CACHE_MISS_TTL_SEC = 5
+app_cache: TTLCache[str, models.App | None] = TTLCache(1024, AUTH_CACHE_TTL_SEC)
+app_user_cache: TTLCache[tuple[str, str], models.AppUser | None] = TTLCache(8192, AUTH_CACHE_TTL_SEC)
 
 class TasksRepository:
     def __init__(self, app_id: str):
@@ -38,12 +111,10 @@ class TasksRepository:
         self.app_id = app_id
 
     def start(self, prompt: str, address: str, chain_id: int, app_user_id: str, previous_task_id: str | None = None) -> models.Task:
-        client = get_db_client("public")
-
         created_at = datetime.utcnow()
         updated_at = datetime.utcnow()
 
-        result = client.table("tasks").insert(
+        result = self.client.table("tasks").insert(
             {
                 "app_id": self.app_id,
                 "app_user_id": app_user_id,
@@ -51,12 +122,11 @@ class TasksRepository:
                 "address": address,
                 "chain_id": chain_id,
                 "running": True,
+                "status": models.TaskStatus.QUEUED.value,
                 "error": None,
                 "created_at": str(created_at),
                 "updated_at": str(updated_at),
-                "messages": json.dumps([]),
-                "logs": json.dumps([]),
-                "intents": json.dumps([]),
+                "intents": [],
                 "previous_task_id": previous_task_id,
                 "feedback": None
             }
@@ -70,6 +140,7 @@ class TasksRepository:
             created_at=created_at,
             updated_at=updated_at,
             running=True,
+            status=models.TaskStatus.QUEUED,
             error=None,
             messages=[],
             logs=[],
@@ -78,45 +149,135 @@ class TasksRepository:
             feedback=None
         )
 
-    def stop(self, task_id: str) -> None:
-        client = get_db_client("public")
+    def set_running(self, task_id: str) -> None:
+        self.client.table("tasks").update(
+            {
+                "status": models.TaskStatus.RUNNING.value,
+                "updated_at": str(datetime.utcnow())
+            }
+        ).eq("id", task_id).eq("app_id", self.app_id).execute()
 
-        client.table("tasks").update(
+    def stop(self, task_id: str) -> None:
+        self.client.table("tasks").update(
             {
                 "running": False,
+                "status": models.TaskStatus.COMPLETED.value,
                 "updated_at": str(datetime.utcnow())
             }
         ).eq("id", task_id).eq("app_id", self.app_id).execute()
 
     def update(self, task: models.Task) -> None:
-        client = get_db_client("public")
-
-        client.table("tasks").update(
+        self.client.table("tasks").update(
             {
                 "prompt": task.prompt,
                 "running": task.running,
+                "status": task.status.value,
                 "updated_at": str(datetime.utcnow()),
-                "messages": json.dumps(task.messages),
                 "error": task.error,
-                "logs": dump_pydantic_list(task.logs if task.logs else []),
                 "intents": dump_pydantic_list(task.intents),
                 "previous_task_id": task.previous_task_id
             }
         ).eq("id", task.id).eq("app_id", self.app_id).execute()
     
-    def update_feedback(self, task_id: str, feedback: str) -> None:
-        client = get_db_client("public")
+    def add_intents(self, task_id: str, intents: list[Intent]) -> None:
+        result = self.client.table("tasks") \
+            .select("intents") \
+            .eq("id", task_id) \
+            .eq("app_id", self.app_id) \
+            .execute()
+
+        if len(result.data) == 0:
+            raise Exception("Task not found: " + task_id)
+
+        saved_intents = [load_intent(intent) for intent in result.data[0]["intents"]]
+
+        self.client.table("tasks").update(
+            {
+                "intents": dump_pydantic_list(saved_intents + intents),
+                "updated_at": str(datetime.utcnow())
+            }
+        ).eq("id", task_id).eq("app_id", self.app_id).execute()
+
+    def stop_for_error(self, task_id: str, error: str) -> None:
+        self.client.table("tasks").update(
+            {
+                "running": False,
+                "status": models.TaskStatus.FAILED.value,
+                "error": error,
+                "updated_at": str(datetime.utcnow())
+            }
+        ).eq("id", task_id).eq("app_id", self.app_id).execute()
+
+    # Messages and logs are append-only rows, ordered by (created_at, id) within a task
+    def append_messages(self, task_id: str, messages: list[str]) -> None:
+        if len(messages) == 0:
+            return
+
+        created_at = str(datetime.utcnow())
+        self.client.table("task_messages").insert(
+            [
+                {
+                    "task_id": task_id,
+                    "created_at": created_at,
+                    "message": message
+                }
+                for message in messages
+            ]
+        ).execute()
+
+    def append_logs(self, task_id: str, logs: list[models.TaskLog]) -> None:
+        if len(logs) == 0:
+            return
+
+        self.client.table("task_logs").insert(
+            [
+                {
+                    "task_id": task_id,
+                    "created_at": str(log.created_at),
+                    "type": log.type,
+                    "obj": log.obj
+                }
+                for log in logs
+            ]
+        ).execute()
+
+    def get_messages(self, task_id: str, offset: int = 0, limit: int | None = None) -> list[str]:
+        rows = select_all(
+            lambda: self.client.table("task_messages")
+                .select("message")
+                .eq("task_id", task_id)
+                .order("created_at")
+                .order("id"),
+            offset,
+            limit
+        )
+
+        return [message_data["message"] for message_data in rows]
+
+    def get_logs(self, task_id: str, offset: int = 0, limit: int | None = None) -> list[models.TaskLog]:
+        return get_logs_page(self.client, task_id, offset, limit)
+
+    def get_status(self, task_id: str) -> models.TaskStatus | None:
+        result = self.client.table("tasks") \
+            .select("status") \
+            .eq("id", task_id) \
+            .eq("app_id", self.app_id) \
+            .execute()
+
+        if len(result.data) == 0:
+            return None
+
+        return models.TaskStatus(result.data[0]["status"])
 
-        client.table("tasks").update(
+    def update_feedback(self, task_id: str, feedback: str) -> None:
+        self.client.table("tasks").update(
             {
                 "feedback": feedback
             }
         ).eq("id", task_id).eq("app_id", self.app_id).execute()
 
     def get(self, task_id: str) -> models.Task | None:
-        client = get_db_client("public")
-
-        result = client.table("tasks") \
+        result = self.client.table("tasks") \
             .select("*") \
             .eq("id", task_id) \
             .eq("app_id", self.app_id) \
@@ -135,58 +296,271 @@ class TasksRepository:
             created_at=task_data["created_at"],
             updated_at=task_data["updated_at"],
             running=task_data["running"],
+            status=task_data["status"],
             error=task_data["error"],
-            messages=json.loads(task_data["messages"]),
-            logs=[models.TaskLog(**log) for log in json.loads(task_data["logs"])] if task_data["logs"] else None,
-            intents=[load_intent(intent) for intent in json.loads(task_data["intents"])],
+            messages=self.get_messages(task_id),
+            logs=self.get_logs(task_id),
+            intents=[load_intent(intent) for intent in task_data["intents"]],
             previous_task_id=task_data["previous_task_id"],
             feedback=task_data["feedback"]
         )
 
-    def get_all(self) -> list[models.Task]:
-        client = get_db_client("public")
+    # Returns the task and all the tasks it follows up on, newest first, in a single query
+    def get_chain(self, task_id: str) -> list[models.TaskChainEntry]:
+        result = self.client.rpc("get_task_chain", { "p_task_id": task_id, "p_app_id": self.app_id }).execute()
+
+        return [
+            models.TaskChainEntry(
+                id=task_data["id"],
+                previous_task_id=task_data["previous_task_id"],
+                prompt=task_data["prompt"],
+                intents=[load_intent(intent) for intent in task_data["intents"]],
+                feedback=task_data["feedback"]
+            )
+            for task_data in result.data
+        ]
+
+    # Intents that send, buy or sell the token, newest task first. Addresses are compared case-insensitively
+    def get_intents_for_token(self, token_address: str) -> list[models.TaskIntent]:
+        result = self.client.rpc(
+            "get_task_intents_for_token",
+            { "p_app_id": self.app_id, "p_token_address": ETHAddress(token_address).hex }
+        ).execute()
+
+        return [
+            models.TaskIntent(
+                task_id=intent_data["task_id"],
+                created_at=intent_data["created_at"],
+                intent=load_intent(intent_data["intent"])
+            )
+            for intent_data in result.data
+        ]
+
+    def get_messages_for_tasks(self, task_ids: list[str]) -> dict[str, list[str]]:
+        messages: dict[str, list[str]] = { task_id: [] for task_id in task_ids }
+        if len(task_ids) == 0:
+            return messages
+
+        rows = select_all(
+            lambda: self.client.table("task_messages")
+                .select("task_id, message")
+                .in_("task_id", task_ids)
+                .order("created_at")
+                .order("id")
+        )
+        for message_data in rows:
+            messages[message_data["task_id"]].append(message_data["message"])
+
+        return messages
+
+    def get_logs_for_tasks(self, task_ids: list[str]) -> dict[str, list[dict[str, Any]]]:
+        logs: dict[str, list[dict[str, Any]]] = { task_id: [] for task_id in task_ids }
+        if len(task_ids) == 0:
+            return logs
+
+        rows = select_all(
+            lambda: self.client.table("task_logs")
+                .select("task_id, type, obj, created_at")
+                .in_("task_id", task_ids)
+                .order("created_at")
+                .order("id")
+        )
+        for log_data in rows:
+            logs[log_data.pop("task_id")].append(log_data)
+
+        return logs
+
+    # Returns the tasks newest first, with only the requested fields, and the cursor of the next page
+    def get_page(self, limit: int, cursor: str | None = None, fields: list[str] = TASK_COLUMNS) -> tuple[list[models.TaskSummary], str | None]:
+        columns = [field for field in TASK_COLUMNS if field in fields or field in ["id", "created_at"]]
+
+        query = self.client.table("tasks") \
+            .select(", ".join(columns)) \
+            .eq("app_id", self.app_id)
 
-        result = client.table("tasks").select("*").eq("app_id", self.app_id).execute()
+        if cursor:
+            (cursor_created_at, cursor_id) = decode_task_cursor(cursor)
+            query = query.or_(f"created_at.lt.\"{cursor_created_at}\",and(created_at.eq.\"{cursor_created_at}\",id.lt.{cursor_id})")
+
+        result = query \
+            .order("created_at", desc=True) \
+            .order("id", desc=True) \
+            .limit(limit + 1) \
+            .execute()
+
+        rows = result.data[:limit]
+        next_cursor = encode_task_cursor(rows[-1]["created_at"], rows[-1]["id"]) if len(result.data) > limit else None
+
+        task_ids = [task_data["id"] for task_data in rows]
+        messages = self.get_messages_for_tasks(task_ids) if "messages" in fields else {}
+        logs = self.get_logs_for_tasks(task_ids) if "logs" in fields else {}
 
         tasks = []
+        for task_data in rows:
+            task: dict[str, Any] = { field: task_data[field] for field in fields if field in TASK_COLUMNS }
+            task["id"] = task_data["id"]
+            task["created_at"] = task_data["created_at"]
+            if "intents" in task:
+                task["intents"] = [load_intent(intent) for intent in task_data["intents"]]
+            if "messages" in fields:
+                task["messages"] = messages[task_data["id"]]
+            if "logs" in fields:
+                task["logs"] = logs[task_data["id"]]
+            tasks.append(models.TaskSummary(**task))
+
+        return (tasks, next_cursor)
+
+class TaskQueueRepository(TaskQueue):
+    def __init__(self) -> None:
+        self.client = get_db_client("public")
 
-        for task_data in result.data:
-            tasks.append(
-                models.Task(
-                    id=task_data["id"],
-                    prompt=task_data["prompt"],
-                    address=task_data["address"],
-                    chain_id=task_data["chain_id"],
-                    created_at=task_data["created_at"],
-                    updated_at=task_data["updated_at"],
-                    running=task_data["running"],
-                    error=task_data["error"],
-                    messages=json.loads(task_data["messages"]),
-                    logs=[models.TaskLog(**log) for log in json.loads(task_data["logs"])] if task_data["logs"] else None,
-                    intents=[load_intent(intent) for intent in json.loads(task_data["intents"])],
-                    previous_task_id=task_data["previous_task_id"],
-                    feedback=task_data["feedback"]
-                )
-            )
+    def enqueue(self, queued_task: models.QueuedTask) -> None:
+        self.client.table("task_queue").insert(
+            {
+                "task_id": queued_task.task_id,
+                "app_id": queued_task.app_id,
+                "app_user_id": queued_task.app_user_id,
+                "status": "queued",
+                "enqueued_at": str(queued_task.enqueued_at),
+                "attempts": queued_task.attempts
+            }
+        ).execute()
+
+    def claim(self, worker_id: str, lease_sec: int, excluded_app_ids: list[str], excluded_app_user_ids: list[str]) -> models.QueuedTask | None:
+        result = self.client.rpc(
+            "claim_queued_task",
+            {
+                "p_worker_id": worker_id,
+                "p_lease_seconds": lease_sec,
+                "p_excluded_app_ids": excluded_app_ids,
+                "p_excluded_app_user_ids": excluded_app_user_ids
+            }
+        ).execute()
+
+        if len(result.data) == 0:
+            return None
+
+        queued_task_data = result.data[0]
+
+        return models.QueuedTask(
+            task_id=queued_task_data["task_id"],
+            app_id=queued_task_data["app_id"],
+            app_user_id=queued_task_data["app_user_id"],
+            enqueued_at=queued_task_data["enqueued_at"],
+            attempts=queued_task_data["attempts"]
+        )
+
+    def renew(self, worker_id: str, task_ids: list[str], lease_sec: int) -> None:
+        if len(task_ids) == 0:
+            return
+
+        self.client.table("task_queue").update(
+            {
+                "lease_expires_at": str(datetime.utcnow() + timedelta(seconds=lease_sec))
+            }
+        ).in_("task_id", task_ids).eq("worker_id", worker_id).execute()
+
+    def complete(self, task_id: str, failed: bool) -> None:
+        self.client.table("task_queue").update(
+            {
+                "status": "failed" if failed else "completed",
+                "finished_at": str(datetime.utcnow())
+            }
+        ).eq("task_id", task_id).execute()
+
+    def depth(self) -> int:
+        result = self.client.table("task_queue") \
+            .select("task_id", count=CountMethod.exact) \
+            .eq("status", "queued") \
+            .limit(1) \
+            .execute()
+
+        return result.count or 0
+
+class SafeNonceRepository(SafeNonceStore):
+    def __init__(self) -> None:
+        self.client = get_db_client("public")
+
+    def reserve(self, chain_id: int, safe_address: str, count: int, min_nonce: int, reservation_ttl_sec: int) -> int:
+        result = self.client.rpc(
+            "reserve_safe_nonces",
+            {
+                "p_chain_id": chain_id,
+                "p_safe_address": safe_address,
+                "p_count": count,
+                "p_min_nonce": min_nonce,
+                "p_reservation_ttl_seconds": reservation_ttl_sec
+            }
+        ).execute()
+
+        return int(cast(int, result.data))
+
+    def release(self, chain_id: int, safe_address: str, start_nonce: int, count: int) -> bool:
+        result = self.client.rpc(
+            "release_safe_nonces",
+            {
+                "p_chain_id": chain_id,
+                "p_safe_address": safe_address,
+                "p_start_nonce": start_nonce,
+                "p_count": count
+            }
+        ).execute()
+
+        return bool(result.data)
 
-        return tasks
-    
 def get_app_by_api_key(api_key: str) -> models.App | None:
+    (found, cached_app) = app_cache.lookup(api_key)
+    if found:
+        return cached_app
+
     client = get_db_client("public")
 
     result = client.table("apps").select("*").eq("api_key", api_key).execute()
 
-    if len(result.data) == 0:
+    return cache_app(api_key, result.data)
+
+async def a_get_app_by_api_key(api_key: str) -> models.App | None:
+    (found, cached_app) = app_cache.lookup(api_key)
+    if found:
+        return cached_app
+
+    client = await a_get_db_client("public")
+
+    result = await client.table("apps").select("*").eq("api_key", api_key).execute()
+
+    return cache_app(api_key, result.data)
+
+def cache_app(api_key: str, data: list[dict[str, Any]]) -> models.App | None:
+    if len(data) == 0:
+        app_cache.set(api_key, None, AUTH_CACHE_MISS_TTL_SEC)
         return None
 
-    app_data = result.data[0]
+    app_data = data[0]
 
-    return models.App(
+    app = models.App(
         id=app_data["id"],
         name=app_data["name"],
         api_key=app_data["api_key"],
         allowed=app_data["allowed"]
     )
+    app_cache.set(api_key, app)
+
+    return app
+
+# Running servers keep authorizing the app from their cache for up to AUTH_CACHE_TTL_SEC, only this process' cache is invalidated
+def revoke_app(app_id: str) -> bool:
+    client = get_db_client("public")
+
+    result = client.table("apps").update(
+        {
+            "allowed": False
+        }
+    ).eq("id", app_id).execute()
+
+    for app_data in result.data:
+        app_cache.invalidate(app_data["api_key"])
+
+    return len(result.data) > 0
 
 
 def create_app_user(app_id: str, user_id: str, agent_address: str, agent_private_key: str) -> models.AppUser: 
@@ -203,15 +577,22 @@ def create_app_user(app_id: str, user_id: str, agent_address: str, agent_private
         }
     ).execute()
 
-    return models.AppUser(
+    app_user = models.AppUser(
         id=result.data[0]["id"],
         user_id=user_id,
         agent_address=agent_address,
         created_at=created_at,
         app_id=app_id
     )
+    app_user_cache.set((app_id, user_id), app_user)
+
+    return app_user
 
 def get_app_user(app_id: str, user_id: str) -> models.AppUser | None:
+    (found, cached_app_user) = app_user_cache.lookup((app_id, user_id))
+    if found:
+        return cached_app_user
+
     client = get_db_client("public")
 
     result = client.table("app_users") \
@@ -220,18 +601,40 @@ def get_app_user(app_id: str, user_id: str) -> models.AppUser | None:
         .eq("user_id", user_id) \
         .execute()
 
-    if len(result.data) == 0:
+    return cache_app_user(app_id, user_id, result.data)
+
+async def a_get_app_user(app_id: str, user_id: str) -> models.AppUser | None:
+    (found, cached_app_user) = app_user_cache.lookup((app_id, user_id))
+    if found:
+        return cached_app_user
+
+    client = await a_get_db_client("public")
+
+    result = await client.table("app_users") \
+        .select("*") \
+        .eq("app_id", app_id) \
+        .eq("user_id", user_id) \
+        .execute()
+
+    return cache_app_user(app_id, user_id, result.data)
+
+def cache_app_user(app_id: str, user_id: str, data: list[dict[str, Any]]) -> models.AppUser | None:
+    if len(data) == 0:
+        app_user_cache.set((app_id, user_id), None, AUTH_CACHE_MISS_TTL_SEC)
         return None
 
-    app_user_data = result.data[0]
+    app_user_data = data[0]
 
-    return models.AppUser(
+    app_user = models.AppUser(
         id = app_user_data["id"],
         user_id=app_user_data["user_id"],
         agent_address=app_user_data["agent_address"],
         created_at=app_user_data["created_at"],
         app_id=app_user_data["app_id"]
     )
+    app_user_cache.set((app_id, user_id), app_user)
+
+    return app_user
 
 def get_agent_private_key(app_id: str, user_id: str) -> str | None:
     client = get_db_client("public")
@@ -250,7 +653,7 @@ def get_agent_private_key(app_id: str, user_id: str) -> str | None:
 def save_transactions(app_id: str, address: str, chain_id: int, app_user_id: str, task_id: str, transactions: list[Transaction]) -> str:
     client = get_db_client("public")
     
-    txs = [json.loads(tx.json()) for tx in transactions]
+    txs = dump_pydantic_list(transactions)
 
     created_at = datetime.utcnow()
     result = client.table("submitted_batches") \
@@ -262,7 +665,7 @@ def save_transactions(app_id: str, address: str, chain_id: int, app_user_id: str
                 "app_user_id": app_user_id,
                 "task_id": task_id,
                 "created_at": str(created_at),
-                "transactions": json.dumps(txs)
+                "transactions": txs
             }
         ).execute()
     
@@ -285,7 +688,7 @@ def get_transactions(app_id: str, app_user_id: str, task_id: str, address: str,
         return None
     
     return (
-        [TransactionBase(**tx) for tx in json.loads(result.data[0]["transactions"])], 
+        [TransactionBase(**tx) for tx in result.data[0]["transactions"]], 
         result.data[0]["task_id"]    
     )
     
@@ -328,6 +731,19 @@ class SubmittedBatch(BaseModel):
     submitted_on: datetime | None
     transactions: list[dict[str, Any]]
 
+def load_submitted_batch(batch_data: dict[str, Any]) -> SubmittedBatch:
+    return SubmittedBatch(
+        id=batch_data["id"],
+        app_id=batch_data["app_id"],
+        address=batch_data["address"],
+        chain_id=batch_data["chain_id"],
+        app_user_id=batch_data["app_user_id"],
+        task_id=batch_data["task_id"],
+        created_at=batch_data["created_at"],
+        submitted_on=batch_data["submitted_on"],
+        transactions=batch_data["transactions"]
+    )
+
 def get_submitted_batches(app_id: str, task_id: str) -> list[SubmittedBatch]:
     client = get_db_client("public")
 
@@ -336,40 +752,84 @@ def get_submitted_batches(app_id: str, task_id: str) -> list[SubmittedBatch]:
         .eq("app_id", app_id) \
         .eq("task_id", task_id) \
         .execute()
-    
-    batches = []
-
-    for batch_data in result.data:
-        batches.append(
-            SubmittedBatch(
-                id=batch_data["id"],
-                app_id=batch_data["app_id"],
-                address=batch_data["address"],
-                chain_id=batch_data["chain_id"],
-                app_user_id=batch_data["app_user_id"],
-                task_id=batch_data["task_id"],
-                created_at=batch_data["created_at"],
-                submitted_on=batch_data["submitted_on"],
-                transactions=json.loads(batch_data["transactions"])
-            )
-        )
 
-    return batches
+    return [load_submitted_batch(batch_data) for batch_data in result.data]
+
+# Batches that were prepared but not submitted yet, oldest first
+def get_pending_batches(app_id: str, app_user_id: str) -> list[SubmittedBatch]:
+    client = get_db_client("public")
+
+    result = client.table("submitted_batches") \
+        .select("*") \
+        .eq("app_id", app_id) \
+        .eq("app_user_id", app_user_id) \
+        .is_("submitted_on", "null") \
+        .order("created_at") \
+        .execute()
+
+    return [load_submitted_batch(batch_data) for batch_data in result.data]
+
+# Batches with a transaction that sends, approves or swaps the token, newest first. Addresses are compared case-insensitively
+def get_submitted_batches_for_token(app_id: str, token_address: str) -> list[SubmittedBatch]:
+    client = get_db_client("public")
+
+    result = client.rpc(
+        "get_submitted_batches_for_token",
+        { "p_app_id": app_id, "p_token_address": ETHAddress(token_address).hex }
+    ).execute()
+
+    return [load_submitted_batch(batch_data) for batch_data in result.data]
+
+def get_logs_page(
+    client: Client,
+    task_id: str,
+    offset: int = 0,
+    limit: int | None = None,
+    log_type: str | None = None,
+    since: datetime | None = None
+) -> list[models.TaskLog]:
+    def build_query() -> SyncSelectRequestBuilder[Any]:
+        query = client.table("task_logs") \
+            .select("type, obj, created_at") \
+            .eq("task_id", task_id)
+
+        if log_type is not None:
+            query = query.eq("type", log_type)
+        if since is not None:
+            query = query.gt("created_at", since.isoformat())
+
+        return query.order("created_at").order("id")
+
+    return [models.TaskLog(**log_data) for log_data in select_all(build_query, offset, limit)]
 
-def get_task_logs(task_id: str) -> list[models.TaskLog] | None:
+def task_exists(task_id: str) -> bool:
     client = get_db_client("public")
 
     result = client.table("tasks") \
-        .select("logs") \
+        .select("id") \
         .eq("id", task_id) \
         .execute()
 
-    if len(result.data) == 0:
-        return None
+    return len(result.data) > 0
+
+async def a_task_exists(task_id: str) -> bool:
+    client = await a_get_db_client("public")
+
+    result = await client.table("tasks") \
+        .select("id") \
+        .eq("id", task_id) \
+        .execute()
 
-    task_data = result.data[0]
+    return len(result.data) > 0
 
-    return [models.TaskLog(**log) for log in json.loads(task_data["logs"])] if task_data["logs"] else []
+def get_task_logs_page(task_id: str, offset: int = 0, limit: int | None = None, log_type: str | None = None, since: datetime | None = None) -> list[models.TaskLog]:
+    return get_logs_page(get_db_client("public"), task_id, offset, limit, log_type, since)
+
+def get_task_logs(task_id: str, offset: int = 0, limit: int | None = None) -> list[models.TaskLog] | None:
+    if not task_exists(task_id):
+        return None
+
+    return get_task_logs_page(task_id, offset, limit)
 
 def create_app(name: str, api_key: str) -> models.App:
     client = get_db_client("public")
@@ -382,16 +842,22 @@ def create_app(name: str, api_key: str) -> models.App:
         }
     ).execute()
 
-    return models.App(
+    app = models.App(
         id=result.data[0]["id"],
         name=name,
         api_key=api_key,
         allowed=True
     )
+    app_cache.set(api_key, app)
+
+    return app
 
 def clear_db() -> None:
     client = get_db_client("public")
 
+    app_cache.clear()
+    app_user_cache.clear()
+
     uid = uuid.uuid4().hex
 
     client.table("apps").delete().neq("id", uid).execute()
@@ -1,7 +1,7 @@
 from eth_typing import ChecksumAddress
-from web3 import HTTPProvider, Web3
+from web3 import Web3
 
-from autotx.utils.constants import MAINNET_DEFAULT_RPC
+from autotx.utils.ens_resolver import resolve_ens
 
 class ETHAddress:
     hex: ChecksumAddress
@@ -11,9 +11,8 @@ class ETHAddress:
     def __init__(self, hex_or_ens: str):
         self.original_str = hex_or_ens
         if hex_or_ens.endswith(".eth"):
-            web3 = Web3(HTTPProvider(MAINNET_DEFAULT_RPC))
-            address = web3.ens.address(hex_or_ens)  # type: ignore
-            if address == None:
+            address = resolve_ens(hex_or_ens)
+            if address is None:
                 raise ValueError(f"Invalid ENS: {hex_or_ens}")
             self.hex = address
             self.ens_domain = hex_or_ens
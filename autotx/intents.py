@@ -1,4 +1,5 @@
 from abc import abstractmethod
+import asyncio
 from decimal import Decimal
 from enum import Enum
 from pydantic import BaseModel
@@ -14,8 +15,13 @@ from autotx.utils.ethereum.build_transfer_native import build_transfer_native
 from autotx.utils.ethereum.constants import NATIVE_TOKEN_ADDRESS
 from autotx.eth_address import ETHAddress
 from autotx.utils.ethereum.lifi.swap import a_build_swap_transaction
+from autotx.utils.ens_resolver import a_resolve_ens_names
 from autotx.utils.ethereum.networks import NetworkInfo
 from autotx.utils.format_amount import format_amount
+from autotx.utils.run_blocking import run_blocking
+
+# Each intent may fetch a quote and make several RPC calls, this bounds how many are built at once
+MAX_CONCURRENT_INTENT_BUILDS = 8
 
 class IntentType(str, Enum):
     SEND = "send"
@@ -47,17 +53,19 @@ class SendIntent(IntentBase):
     
     async def build_transactions(self, web3: Web3, network: NetworkInfo, smart_wallet_address: ETHAddress) -> list[Transaction]:
         tx: TxParams
+        # Resolving an ENS receiver that isn't cached is an RPC call
+        receiver = await run_blocking(ETHAddress, self.receiver)
 
         if self.token.address == NATIVE_TOKEN_ADDRESS:
-            tx = build_transfer_native(web3, smart_wallet_address, ETHAddress(self.receiver), self.amount)
+            tx = await run_blocking(build_transfer_native, web3, smart_wallet_address, receiver, self.amount)
         else:
-            tx = build_transfer_erc20(web3, ETHAddress(self.token.address), ETHAddress(self.receiver), self.amount, smart_wallet_address)
+            tx = await run_blocking(build_transfer_erc20, web3, ETHAddress(self.token.address), receiver, self.amount, smart_wallet_address)
             
         transactions: list[Transaction] = [
             SendTransaction.create(
                 token=self.token,
                 amount=self.amount,
-                receiver=ETHAddress(self.receiver),
+                receiver=receiver,
                 params=cast(dict[str, Any], tx),
             )
         ]
@@ -123,6 +131,26 @@ class SellIntent(IntentBase):
 
 Intent = Union[SendIntent, BuyIntent, SellIntent]
 
+# Resolves the ENS receivers of the intents concurrently, later ETHAddress lookups are served from the cache
+async def a_resolve_intent_receivers(intents: list[Intent]) -> None:
+    await a_resolve_ens_names(
+        intent.receiver for intent in intents if isinstance(intent, SendIntent)
+    )
+
+# Builds the intents concurrently, the transactions keep the order of the intents
+async def a_build_intents_transactions(intents: list[Intent], web3: Web3, network: NetworkInfo, smart_wallet_address: ETHAddress) -> list[Transaction]:
+    await a_resolve_intent_receivers(intents)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_INTENT_BUILDS)
+
+    async def build(intent: Intent) -> list[Transaction]:
+        async with semaphore:
+            return await intent.build_transactions(web3, network, smart_wallet_address)
+
+    results = await asyncio.gather(*[build(intent) for intent in intents])
+
+    return [transaction for transactions in results for transaction in transactions]
+
 def load_intent(intent_data: dict[str, Any]) -> Intent:
     if intent_data["type"] == "send":
         return SendIntent.create(
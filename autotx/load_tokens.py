@@ -1,9 +1,9 @@
 import asyncio
-import json
-from textwrap import dedent
 from typing import Union
 import aiohttp
 
+from autotx.utils.ethereum.helpers.token_registry import TOKEN_REGISTRY_PATH, write_token_registry
+
 KLEROS_TOKENS_LIST = "https://t2crtokens.eth.link/"
 COINGECKO_TOKENS_LISTS = [
     "https://tokens.coingecko.com/uniswap/all.json",
@@ -32,15 +32,8 @@ async def fetch_tokens_list() -> None:
         except:
             print("Error while trying to fetch list:", token_list_url)
 
-    loaded_tokens_as_string = json.dumps(loaded_tokens, indent=2)
-    content = dedent(
-        f"""# THIS IS AN AUTOGENERATED FILE. DO NOT MODIFY MANUALLY, PLEASE CHECK autotx/load_tokens.py TO DO ANY MODIFICATIONS
-
-token_list = {loaded_tokens_as_string}
-"""
-    )
-    with open("autotx/utils/ethereum/helpers/token_list.py", "w") as f:
-        f.write(content)
+    write_token_registry(loaded_tokens, TOKEN_REGISTRY_PATH)
+    print(f"Token registry written to {TOKEN_REGISTRY_PATH} ({len(loaded_tokens)} tokens)")
 
 
 def run() -> None:
@@ -1,3 +1,4 @@
+from enum import Enum
 from pydantic import BaseModel
 from typing import Any, Dict, List, Optional
 from datetime import datetime
@@ -9,6 +10,24 @@ class TaskLog(BaseModel):
     obj: str
     created_at: datetime
 
+class TaskStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class TaskIntent(BaseModel):
+    task_id: str
+    created_at: datetime
+    intent: Intent
+
+class TaskEvent(BaseModel):
+    # "message", "log" or "status"
+    type: str
+    # Position of the message or log within the task, None for status events
+    offset: int | None
+    data: Any
+
 class Task(BaseModel):
     id: str
     prompt: str
@@ -17,13 +36,55 @@ class Task(BaseModel):
     created_at: datetime
     updated_at: datetime
     error: str | None
+    # True until the task completes or fails, including while it is queued
     running: bool
+    status: TaskStatus
     messages: List[str]
     logs: List[TaskLog] | None
     intents: List[Intent]
     previous_task_id: str | None
     feedback: str | None
 
+# A task as listed by GET /api/v1/tasks, only the requested fields are set
+class TaskSummary(BaseModel):
+    id: str
+    created_at: datetime
+    prompt: str | None = None
+    address: str | None = None
+    chain_id: int | None = None
+    updated_at: datetime | None = None
+    error: str | None = None
+    running: bool | None = None
+    status: TaskStatus | None = None
+    messages: List[str] | None = None
+    logs: List[TaskLog] | None = None
+    intents: List[Intent] | None = None
+    previous_task_id: str | None = None
+    feedback: str | None = None
+
+class TaskChainEntry(BaseModel):
+    id: str
+    previous_task_id: str | None
+    prompt: str
+    intents: List[Intent]
+    feedback: str | None
+
+class QueuedTask(BaseModel):
+    task_id: str
+    app_id: str
+    app_user_id: str
+    enqueued_at: datetime
+    attempts: int
+
+class TaskQueueMetrics(BaseModel):
+    workers: int
+    queued: int
+    running: int
+    completed: int
+    failed: int
+    average_wait_sec: float
+    max_wait_sec: float
+
 class TaskError(BaseModel):
     id: str
     message: str
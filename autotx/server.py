@@ -1,24 +1,42 @@
+import asyncio
+from contextlib import aclosing
 from datetime import datetime
 import json
-from typing import Annotated, Any, Dict, List
+import os
+from typing import Annotated, Any, AsyncIterator, Dict, List
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
 from gnosis.safe.api.base_api import SafeAPIException
-from fastapi import APIRouter, FastAPI, BackgroundTasks, HTTPException, Header
+from fastapi import APIRouter, FastAPI, HTTPException, Header, Query, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import traceback
 
 from autotx import models, setup, task_logs
 from autotx import db
 from autotx.AutoTx import AutoTx, Config as AutoTxConfig
-from autotx.intents import Intent
+from autotx.intents import Intent, a_build_intents_transactions
 from autotx.smart_accounts.smart_account import SmartAccount
+from autotx.eth_address import ETHAddress
+from autotx.task_events import stream_task_events, task_event_bus
+from autotx.task_queue import LocalTaskQueue, TaskQueue
+from autotx.task_worker_pool import TaskWorkerPool
+from autotx.task_writer import TaskWriter
 from autotx.transactions import Transaction
 from autotx.utils.configuration import AppConfig
 from autotx.utils.ethereum.chain_short_names import CHAIN_ID_TO_SHORT_NAME
-from autotx.utils.ethereum.networks import SUPPORTED_NETWORKS_CONFIGURATION_MAP
+from autotx.utils.chain_connections import warm_chain_connections
+from autotx.utils.constants import ALCHEMY_API_KEY
+from autotx.utils.ethereum.networks import SUPPORTED_NETWORKS_CONFIGURATION_MAP, NetworkInfo
+from autotx.utils.ethereum.get_token_balances import get_ethereum_client
+from autotx.utils.ethereum.is_valid_safe import is_valid_safe
+from autotx.utils.ethereum.lifi import lifi_client
+from autotx.utils.ethereum.safe_nonces import safe_nonce_allocator
+from autotx.utils.ethereum.simulate_multisend import find_multisend_revert
+from autotx.utils.ethereum.transaction_service import SafeTransactionsNotPosted
+from autotx.utils.run_blocking import run_blocking
+from autotx.utils.task_cursor import InvalidCursor
 from autotx.smart_accounts.api_smart_account import ApiSmartAccount
 from autotx.smart_accounts.safe_smart_account import SafeSmartAccount
 
@@ -44,6 +62,24 @@ class AutoTxParams:
 
 autotx_params: AutoTxParams = AutoTxParams(verbose=False, logs=None, cache=False, is_dev=False)
 
+# Throughput of the task pool, tasks beyond these limits wait in the queue. The limits apply to each server process
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "4"))
+TASK_MAX_PER_APP = int(os.getenv("TASK_MAX_PER_APP", "2"))
+TASK_MAX_PER_USER = int(os.getenv("TASK_MAX_PER_USER", "1"))
+# "supabase" keeps queued tasks across restarts, "local" keeps them in memory
+TASK_QUEUE_BACKEND = os.getenv("TASK_QUEUE_BACKEND", "supabase")
+# "supabase" shares reserved Safe nonces between server processes, "local" only within this one
+SAFE_NONCE_BACKEND = os.getenv("SAFE_NONCE_BACKEND", "supabase")
+
+task_pool: TaskWorkerPool | None = None
+
+def get_task_pool() -> TaskWorkerPool:
+    global task_pool
+    if task_pool is None:
+        queue: TaskQueue = LocalTaskQueue() if TASK_QUEUE_BACKEND == "local" else db.TaskQueueRepository()
+        task_pool = TaskWorkerPool(queue, execute_task, abandon_task, TASK_WORKERS, TASK_MAX_PER_APP, TASK_MAX_PER_USER)
+    return task_pool
+
 app_router = APIRouter()
 
 def get_task_or_404(task_id: str, tasks: db.TasksRepository) -> models.Task:
@@ -64,6 +100,18 @@ def authorize(authorization: str | None) -> models.App:
 
     return app
 
+async def a_authorize(authorization: str | None) -> models.App:
+    if not authorization or authorization.startswith("Bearer ") is False:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    api_key = authorization.split("Bearer ")[1]
+    app = await db.a_get_app_by_api_key(api_key)
+
+    if not app or app.allowed is False:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return app
+
 def load_wallet_for_user(app_config: AppConfig, app_id: str, user_id: str, address: str) -> SmartAccount:
     agent_private_key = db.get_agent_private_key(app_id, user_id)
 
@@ -85,6 +133,15 @@ def authorize_app_and_user(authorization: str | None, user_id: str) -> tuple[mod
 
     return (app, app_user)
 
+async def a_authorize_app_and_user(authorization: str | None, user_id: str) -> tuple[models.App, models.AppUser]:
+    app = await a_authorize(authorization)
+    app_user = await db.a_get_app_user(app.id, user_id)
+
+    if not app_user:
+        raise HTTPException(status_code=400, detail="User not found")
+
+    return (app, app_user)
+
 async def build_transactions(app_id: str, user_id: str, chain_id: int, address: str, task: models.Task) -> List[Transaction]:
     if task.running:
         raise HTTPException(status_code=400, detail="Task is still running")
@@ -95,74 +152,85 @@ async def build_transactions(app_id: str, user_id: str, chain_id: int, address:
     if task.intents is None or len(task.intents) == 0:
         return []
 
-    transactions: list[Transaction] = []
+    return await a_build_intents_transactions(task.intents, app_config.web3, app_config.network_info, wallet.address)
 
-    for intent in task.intents:
-        transactions.extend(await intent.build_transactions(app_config.web3, app_config.network_info, wallet.address))
+def stop_task_for_error(tasks: db.TasksRepository, task_id: str, error: str, user_error_message: str, writer: TaskWriter | None = None) -> None:
+    # Buffered messages are written first, so the error message comes last.
+    # Messages that can't be written are lost, the task is still marked as failed
+    if writer:
+        try:
+            writer.close()
+        except Exception:
+            traceback.print_exc()
+    tasks.stop_for_error(task_id, error)
+    tasks.append_messages(task_id, [user_error_message])
+    task_event_bus.publish_status(task_id, models.TaskStatus.FAILED)
 
-    return transactions
+def log(log_type: str, obj: Any, writer: TaskWriter) -> None:
+   writer.add_log(models.TaskLog(type=log_type, obj=json.dumps(obj), created_at=datetime.now()))
 
-def stop_task_for_error(tasks: db.TasksRepository, task_id: str, error: str, user_error_message: str) -> None:
-    task = tasks.get(task_id)
-    if task is None:
-        raise Exception("Task not found: " + task_id)
 
-    task.error = error
-    task.running = False
-    task.messages.append(user_error_message)
-    tasks.update(task)
+def queue_task(prompt: str, task: models.TaskCreate, app: models.App, app_user: models.AppUser, tasks: db.TasksRepository, previous_task_id: str | None = None) -> models.Task:
+    app_config = AppConfig(subsidized_chain_id=task.chain_id)
 
-def log(log_type: str, obj: Any, task_id: str, tasks: db.TasksRepository) -> None:
-   add_task_log(models.TaskLog(type=log_type, obj=json.dumps(obj), created_at=datetime.now()), task_id, tasks)
+    if task.address:
+        # The Safe is validated before the task is queued, so an invalid one is rejected instead of failing the task later
+        try:
+            safe_address = ETHAddress(task.address)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid address")
+        if not is_valid_safe(get_ethereum_client(app_config.web3), safe_address):
+            raise HTTPException(status_code=400, detail="Address is not a valid Safe")
+        address = safe_address.hex
+    else:
+        # Only allowed in dev mode, the dev Safe is loaded to get its address
+        address = SafeSmartAccount(app_config.rpc_url, app_config.network_info).address.hex
 
-def add_task_log(log: models.TaskLog, task_id: str, tasks: db.TasksRepository) -> None:
-    task = tasks.get(task_id)
-    if task is None:
-        raise Exception("Task not found: " + task_id)
+    created_task: models.Task = tasks.start(prompt, address, app_config.network_info.chain_id.value, app_user.id, previous_task_id)
 
-    if task.logs is None:
-        task.logs = []
-    task.logs.append(log)
-    tasks.update(task)
+    try:
+        get_task_pool().enqueue(
+            models.QueuedTask(
+                task_id=created_task.id,
+                app_id=app.id,
+                app_user_id=app_user.id,
+                enqueued_at=created_task.created_at,
+                attempts=0,
+            )
+        )
+    except Exception as e:
+        error = traceback.format_exc()
+        db.add_task_error(f"Route: create_task", app.id, app_user.id, created_task.id, error)
+        stop_task_for_error(tasks, created_task.id, error, f"An error caused AutoTx to stop ({created_task.id})")
+        raise e
 
+    return created_task
 
-def get_previous_tasks(task: models.Task, tasks: db.TasksRepository) -> List[models.Task]:
-    previous_tasks = []
-    current_task: models.Task | None = task
-    while current_task is not None:
-        previous_tasks.append(current_task)
-        if current_task.previous_task_id is None:
-            break
-        current_task = tasks.get(current_task.previous_task_id)
-    return previous_tasks
+# Runs a queued task on a worker of the task pool
+async def execute_task(queued_task: models.QueuedTask) -> None:
+    tasks = db.TasksRepository(queued_task.app_id)
+    task = tasks.get(queued_task.task_id)
+    if task is None:
+        raise Exception("Task not found: " + queued_task.task_id)
 
-def run_task(prompt: str, task: models.TaskCreate, app: models.App, app_user: models.AppUser, tasks: db.TasksRepository, background_tasks: BackgroundTasks, previous_task_id: str | None = None) -> models.Task:
-    app_config = AppConfig(subsidized_chain_id=task.chain_id)
+    task_id = task.id
+    writer = TaskWriter(tasks, task_id, len(task.messages), len(task.logs or []))
 
-    wallet = SafeSmartAccount(app_config.rpc_url, app_config.network_info, smart_account_addr=task.address)
-    api_wallet = ApiSmartAccount(app_config.web3, wallet, tasks)
+    try:
+        tasks.set_running(task_id)
+        task_event_bus.publish_status(task_id, models.TaskStatus.RUNNING)
 
-    created_task: models.Task = tasks.start(prompt, api_wallet.address.hex, app_config.network_info.chain_id.value, app_user.id, previous_task_id)
-    task_id = created_task.id
-    api_wallet.task_id = task_id
+        app_config = AppConfig(subsidized_chain_id=task.chain_id)
+        wallet = SafeSmartAccount(app_config.rpc_url, app_config.network_info, smart_account_addr=task.address)
+        api_wallet = ApiSmartAccount(app_config.web3, wallet, tasks, task_id)
 
-    try:
         (get_llm_config, agents, logs_dir) = setup.setup_agents(autotx_params.logs, cache=autotx_params.cache)
 
         def on_notify_user(message: str) -> None:
-            task = tasks.get(task_id)
-            if task is None:
-                raise Exception("Task not found: " + task_id)
-
-            task.messages.append(message)
-            tasks.update(task)
+            writer.add_message(message)
 
         def on_agent_message(from_agent: str, to_agent: str, message: Any) -> None:
-            add_task_log(
-                task_logs.build_agent_message_log(from_agent, to_agent, message),
-                task_id,
-                tasks
-            )
+            writer.add_log(task_logs.build_agent_message_log(from_agent, to_agent, message))
 
         autotx = AutoTx(
             app_config.web3,
@@ -179,32 +247,34 @@ def run_task(prompt: str, task: models.TaskCreate, app: models.App, app_user: mo
             on_notify_user=on_notify_user,
         )
 
-        async def run_task() -> None:
-            try: 
-                log("execution", "run-start", task_id, tasks)
-                await autotx.a_run(prompt, non_interactive=True)
-                log("execution", "run-end", task_id, tasks)
-            except Exception as e:
-                error = traceback.format_exc()
-                db.add_task_error(f"AutoTx run", app.id, app_user.id, task_id, error)
-                stop_task_for_error(tasks, task_id, error, f"An error caused AutoTx to stop ({task_id})")
-                raise e
-            tasks.stop(task_id)
-            log("execution", "task-stop", task_id, tasks)
-
-        background_tasks.add_task(run_task)
+        log("execution", "run-start", writer)
+        await autotx.a_run(task.prompt, non_interactive=True)
+        log("execution", "run-end", writer)
 
-        return created_task
+        # Messages are written before the task is marked as stopped, clients polling the task see all of them
+        writer.flush()
+        tasks.stop(task_id)
+        log("execution", "task-stop", writer)
+        writer.close()
+        task_event_bus.publish_status(task_id, models.TaskStatus.COMPLETED)
     except Exception as e:
         error = traceback.format_exc()
-        db.add_task_error(f"Route: create_task", app.id, app_user.id, task_id, error)
-        stop_task_for_error(tasks, task_id, error, f"An error caused AutoTx to stop ({task_id})")
+        db.add_task_error(f"AutoTx run", queued_task.app_id, queued_task.app_user_id, task_id, error)
+        stop_task_for_error(tasks, task_id, error, f"An error caused AutoTx to stop ({task_id})", writer)
         raise e
+    finally:
+        # Each task runs on its own event loop, the LiFi session of this loop is closed with it
+        await lifi_client.close()
+
+def abandon_task(queued_task: models.QueuedTask, error: str) -> None:
+    tasks = db.TasksRepository(queued_task.app_id)
+    db.add_task_error(f"AutoTx run", queued_task.app_id, queued_task.app_user_id, queued_task.task_id, error)
+    stop_task_for_error(tasks, queued_task.task_id, error, f"An error caused AutoTx to stop ({queued_task.task_id})")
 
 @app_router.post("/api/v1/tasks", response_model=models.Task)
-async def create_task(task: models.TaskCreate, background_tasks: BackgroundTasks, authorization: Annotated[str | None, Header()] = None) -> models.Task:   
-    app = authorize(authorization)
-    app_user = db.get_app_user(app.id, task.user_id)
+async def create_task(task: models.TaskCreate, authorization: Annotated[str | None, Header()] = None) -> models.Task:   
+    app = await a_authorize(authorization)
+    app_user = await db.a_get_app_user(app.id, task.user_id)
     if not app_user:
         raise HTTPException(status_code=400, detail="User not found")
 
@@ -216,7 +286,7 @@ async def create_task(task: models.TaskCreate, background_tasks: BackgroundTasks
     
     prompt = task.prompt
     
-    created_task = run_task(prompt, task, app, app_user, tasks, background_tasks)
+    created_task = await run_blocking(queue_task, prompt, task, app, app_user, tasks)
 
     return created_task
 
@@ -225,7 +295,7 @@ class FeedbackParams(BaseModel):
     user_id: str
 
 @app_router.post("/api/v1/tasks/{task_id}/feedback", response_model=models.Task)
-def provide_feedback(task_id: str, model: FeedbackParams, background_tasks: BackgroundTasks, authorization: Annotated[str | None, Header()] = None) -> 'models.Task':
+def provide_feedback(task_id: str, model: FeedbackParams, authorization: Annotated[str | None, Header()] = None) -> 'models.Task':
     (app, app_user) = authorize_app_and_user(authorization, model.user_id)
 
     tasks = db.TasksRepository(app.id)
@@ -240,7 +310,7 @@ def provide_feedback(task_id: str, model: FeedbackParams, background_tasks: Back
         raise HTTPException(status_code=400, detail="Address and Chain ID are required for non-dev mode")
     
     # Get all previous tasks
-    previous_tasks = get_previous_tasks(task, tasks)
+    previous_tasks = tasks.get_chain(task.id)
 
     prompt = "History:\n"
     for previous_task in previous_tasks[::-1]:
@@ -257,15 +327,15 @@ def provide_feedback(task_id: str, model: FeedbackParams, background_tasks: Back
     
     tasks.update_feedback(task_id, model.feedback)
 
-    created_task = run_task(prompt, models.TaskCreate(prompt=prompt, address=task.address, chain_id=task.chain_id, user_id=app_user.user_id), app, app_user, tasks, background_tasks, task_id)
+    created_task = queue_task(prompt, models.TaskCreate(prompt=prompt, address=task.address, chain_id=task.chain_id, user_id=app_user.user_id), app, app_user, tasks, task_id)
 
     return created_task
 
 @app_router.post("/api/v1/connect", response_model=models.AppUser)
 async def connect(model: models.ConnectionCreate, authorization: Annotated[str | None, Header()] = None) -> models.AppUser:
-    app = authorize(authorization)
+    app = await a_authorize(authorization)
 
-    app_user = db.get_app_user(app.id, model.user_id)
+    app_user = await db.a_get_app_user(app.id, model.user_id)
 
     if app_user:
         return app_user
@@ -278,13 +348,37 @@ async def connect(model: models.ConnectionCreate, authorization: Annotated[str |
 
         return app_user
 
-@app_router.get("/api/v1/tasks", response_model=List[models.Task])
-def get_tasks(authorization: Annotated[str | None, Header()] = None) -> List['models.Task']:
+TASKS_PAGE_DEFAULT_LIMIT = 50
+TASKS_PAGE_MAX_LIMIT = 200
+
+# Tasks are listed newest first, the cursor of the next page is returned in the X-Next-Cursor header
+# fields is a comma separated list of task fields, id and created_at are always included.
+# Messages and logs are only returned when requested, GET /api/v1/tasks/{task_id} returns the whole task
+@app_router.get("/api/v1/tasks", response_model=List[models.TaskSummary], response_model_exclude_unset=True)
+def get_tasks(
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=TASKS_PAGE_MAX_LIMIT)] = TASKS_PAGE_DEFAULT_LIMIT,
+    cursor: str | None = None,
+    fields: str | None = None,
+    authorization: Annotated[str | None, Header()] = None
+) -> List[models.TaskSummary]:
     app = authorize(authorization)
     tasks = db.TasksRepository(app.id)
-   
-    all_tasks: list[models.Task] = tasks.get_all()
-    return all_tasks
+
+    selected_fields = [field.strip() for field in fields.split(",")] if fields else db.TASK_COLUMNS
+    unknown_fields = [field for field in selected_fields if field not in db.TASK_FIELDS]
+    if unknown_fields:
+        raise HTTPException(status_code=400, detail=f"Unknown task fields: {', '.join(unknown_fields)}")
+
+    try:
+        (page, next_cursor) = tasks.get_page(limit, cursor, selected_fields)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return page
 
 @app_router.get("/api/v1/tasks/{task_id}", response_model=models.Task)
 def get_task(task_id: str, authorization: Annotated[str | None, Header()] = None) -> 'models.Task':
@@ -294,6 +388,85 @@ def get_task(task_id: str, authorization: Annotated[str | None, Header()] = None
     task = get_task_or_404(task_id, tasks)
     return task
 
+def get_event_id(event: models.TaskEvent, messages_offset: int, logs_offset: int) -> tuple[int, int]:
+    if event.type == "message" and event.offset is not None:
+        return (event.offset + 1, logs_offset)
+    if event.type == "log" and event.offset is not None:
+        return (messages_offset, event.offset + 1)
+    return (messages_offset, logs_offset)
+
+# Streams the messages, logs and status changes of a task as server-sent events, until the task finishes.
+# The id of each event is "<messages_offset>:<logs_offset>", a client reconnecting with the Last-Event-ID header
+# (or the messages_offset and logs_offset params) only receives what it hasn't seen yet
+@app_router.get("/api/v1/tasks/{task_id}/events", response_class=StreamingResponse)
+async def stream_task(
+    task_id: str,
+    messages_offset: Annotated[int, Query(ge=0)] = 0,
+    logs_offset: Annotated[int, Query(ge=0)] = 0,
+    authorization: Annotated[str | None, Header()] = None,
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    app = await a_authorize(authorization)
+    tasks = db.TasksRepository(app.id)
+
+    if await run_blocking(tasks.get_status, task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if last_event_id:
+        try:
+            (messages_offset, logs_offset) = [int(offset) for offset in last_event_id.split(":")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    async def generate() -> AsyncIterator[str]:
+        (event_messages_offset, event_logs_offset) = (messages_offset, logs_offset)
+        async with aclosing(stream_task_events(tasks, task_id, messages_offset, logs_offset)) as events:
+            async for event in events:
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                (event_messages_offset, event_logs_offset) = get_event_id(event, event_messages_offset, event_logs_offset)
+                yield f"id: {event_messages_offset}:{event_logs_offset}\nevent: {event.type}\ndata: {event.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={ "Cache-Control": "no-cache", "X-Accel-Buffering": "no" }
+    )
+
+WEBSOCKET_AUTH_TIMEOUT_SEC = 10
+
+# Same events as /events, sent as JSON messages. The connection is closed once the task finishes.
+# Browsers can't set the Authorization header on a WebSocket, they send { "authorization": "Bearer <api_key>" } as the first message instead
+@app_router.websocket("/api/v1/tasks/{task_id}/ws")
+async def stream_task_websocket(websocket: WebSocket, task_id: str, messages_offset: int = 0, logs_offset: int = 0) -> None:
+    await websocket.accept()
+
+    try:
+        authorization = websocket.headers.get("authorization")
+        if authorization is None:
+            auth_message = await asyncio.wait_for(websocket.receive_json(), WEBSOCKET_AUTH_TIMEOUT_SEC)
+            authorization = auth_message.get("authorization") if isinstance(auth_message, dict) else None
+        app = await a_authorize(authorization)
+    except WebSocketDisconnect:
+        return
+    except (HTTPException, asyncio.TimeoutError, KeyError, ValueError):
+        await websocket.close(code=1008)
+        return
+
+    tasks = db.TasksRepository(app.id)
+
+    try:
+        async with aclosing(stream_task_events(tasks, task_id, messages_offset, logs_offset)) as events:
+            async for event in events:
+                if event is not None:
+                    await websocket.send_json(event.model_dump(mode="json"))
+    except WebSocketDisconnect:
+        return
+
+    await websocket.close()
+
 @app_router.get("/api/v1/tasks/{task_id}/intents", response_model=List[Intent])
 def get_intents(task_id: str, authorization: Annotated[str | None, Header()] = None) -> Any:
     app = authorize(authorization)
@@ -310,7 +483,7 @@ async def get_transactions(
     user_id: str, 
     authorization: Annotated[str | None, Header()] = None
 ) -> List[Transaction]:
-    (app, app_user) = authorize_app_and_user(authorization, user_id)
+    (app, app_user) = await a_authorize_app_and_user(authorization, user_id)
 
     tasks = db.TasksRepository(app.id)
     
@@ -339,7 +512,7 @@ async def prepare_transactions(
     user_id: str, 
     authorization: Annotated[str | None, Header()] = None
 ) -> PreparedTransactionsDto:
-    (app, app_user) = authorize_app_and_user(authorization, user_id)
+    (app, app_user) = await a_authorize_app_and_user(authorization, user_id)
 
     tasks = db.TasksRepository(app.id)
     
@@ -354,11 +527,24 @@ async def prepare_transactions(
         if len(transactions) == 0:
             raise HTTPException(status_code=400, detail="No transactions to send")
 
-        submitted_batch_id = db.save_transactions(app.id, address, chain_id, app_user.id, task_id, transactions)
+        # Transactions are sent as one multisend, a batch that would revert is rejected before it is saved
+        app_config = AppConfig(subsidized_chain_id=chain_id)
+        revert = await run_blocking(
+            find_multisend_revert,
+            get_ethereum_client(app_config.web3),
+            ETHAddress(address).hex,
+            [transaction.params for transaction in transactions]
+        )
+        if not revert:
+            submitted_batch_id = db.save_transactions(app.id, address, chain_id, app_user.id, task_id, transactions)
     except Exception as e:
         db.add_task_error(f"Route: prepare_transactions", app.id, app_user.id, task_id, traceback.format_exc())
         raise e
 
+    # A batch that would revert is a client error, not an error of the task
+    if revert:
+        raise HTTPException(status_code=400, detail=f"{transactions[revert.index].summary} would fail: {revert.describe()}")
+
     return PreparedTransactionsDto(batch_id=submitted_batch_id, transactions=transactions)
 
 @app_router.post("/api/v1/tasks/{task_id}/transactions")
@@ -370,7 +556,7 @@ async def send_transactions(
     batch_id: str,
     authorization: Annotated[str | None, Header()] = None
 ) -> str:
-    (app, app_user) = authorize_app_and_user(authorization, user_id)
+    (app, app_user) = await a_authorize_app_and_user(authorization, user_id)
 
     tasks = db.TasksRepository(app.id)
     
@@ -401,7 +587,7 @@ async def send_transactions(
             wallet = load_wallet_for_user(app_config, app.id, user_id, address)
 
             await wallet.send_transactions(transactions)
-        except SafeAPIException as e:
+        except (SafeAPIException, SafeTransactionsNotPosted) as e:
             if "is not an owner or delegate" in str(e):
                 raise HTTPException(status_code=400, detail="Agent is not an owner or delegate")
             else:
@@ -431,27 +617,55 @@ def get_task_logs(task_id: str) -> list[models.TaskLog]:
     
     return logs
 
-@app_router.get("/api/v1/tasks/{task_id}/logs/{log_type}", response_class=HTMLResponse)
-def get_task_logs_formatted(task_id: str, log_type: str) -> str:
+TASK_LOGS_PAGE_SIZE = 100
+
+def format_task_log(log: models.TaskLog) -> str:
+    if log.type == "execution":
+        return log.created_at.strftime("%Y-%m-%d %H:%M:%S") + f": {json.loads(log.obj)}"
+    else:
+        return str(task_logs.format_agent_message_log(json.loads(log.obj)))
+
+# The logs are read a page at a time and rendered as they are read, so long agent chats are never held in memory whole
+@app_router.get("/api/v1/tasks/{task_id}/logs/{log_type}", response_class=StreamingResponse)
+async def get_task_logs_formatted(
+    task_id: str,
+    log_type: str,
+    since: datetime | None = None,
+    limit: Annotated[int | None, Query(ge=1)] = None,
+) -> StreamingResponse:
     if log_type != "agent-message" and log_type != "execution":
         raise HTTPException(status_code=400, detail="Log type not supported")
-    
-    logs = db.get_task_logs(task_id)
-    if logs is None:
+
+    if not await db.a_task_exists(task_id):
         raise HTTPException(status_code=404, detail="Task not found")
 
-    filtered_logs = [log for log in logs if log.type == log_type]
+    separator = "\n" if log_type == "execution" else "\n\n"
 
-    if len(filtered_logs) == 0:
-        return "<pre>No logs found</pre>"
-    
-    if log_type == "execution":
-        return "<pre>" + "\n".join([log.created_at.strftime("%Y-%m-%d %H:%M:%S") + f": {json.loads(log.obj)}" for log in filtered_logs]) + "</pre>"
-    else:
-        agent_logs = [task_logs.format_agent_message_log(json.loads(log.obj)) for log in filtered_logs]
+    async def render() -> AsyncIterator[str]:
+        yield "<pre>"
+
+        offset = 0
+        while limit is None or offset < limit:
+            page_size = TASK_LOGS_PAGE_SIZE if limit is None else min(TASK_LOGS_PAGE_SIZE, limit - offset)
+            logs = await run_blocking(db.get_task_logs_page, task_id, offset, page_size, log_type, since)
+
+            for i, log in enumerate(logs):
+                yield ("" if offset == 0 and i == 0 else separator) + format_task_log(log)
+
+            offset += len(logs)
+            if len(logs) < page_size:
+                break
+
+        if offset == 0:
+            yield "No logs found"
 
-        text = "\n\n".join(agent_logs)
-        return f"<pre>{text}</pre>"
+        yield "</pre>"
+
+    return StreamingResponse(render(), media_type="text/html")
+
+@app_router.get("/api/v1/metrics/tasks", response_model=models.TaskQueueMetrics)
+def get_task_metrics() -> models.TaskQueueMetrics:
+    return get_task_pool().metrics()
 
 @app_router.get("/api/v1/version", response_class=JSONResponse)
 async def get_version() -> Dict[str, str]:
@@ -461,6 +675,13 @@ app = FastAPI()
 
 app.include_router(app_router)
 
+@app.on_event("shutdown")
+async def close_clients() -> None:
+    if task_pool:
+        task_pool.stop()
+    await lifi_client.close()
+    await db.a_close_db_clients()
+
 origins = ["*"]
 
 app.add_middleware(
@@ -469,6 +690,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 def setup_server(verbose: bool, logs: str | None, max_rounds: int | None, cache: bool, is_dev: bool, check_valid_safe: bool) -> None:
@@ -476,6 +698,16 @@ def setup_server(verbose: bool, logs: str | None, max_rounds: int | None, cache:
         app_config = AppConfig() 
         # Loading the SafeSmartAccount will deploy a new Safe if one is not already deployed
         SafeSmartAccount(app_config.rpc_url, app_config.network_info, fill_dev_account=True, check_valid_safe=check_valid_safe)
+    elif ALCHEMY_API_KEY:
+        # Connect to the supported chains upfront, requests then reuse the connections
+        warm_chain_connections([
+            rpc_url
+            for rpc_url in [NetworkInfo(chain_id.value).get_subsidized_rpc_url() for chain_id in SUPPORTED_NETWORKS_CONFIGURATION_MAP]
+            if rpc_url
+        ])
+
+    if SAFE_NONCE_BACKEND == "supabase":
+        safe_nonce_allocator.store = db.SafeNonceRepository()
 
     global autotx_params
     autotx_params = AutoTxParams(
@@ -484,4 +716,6 @@ def setup_server(verbose: bool, logs: str | None, max_rounds: int | None, cache:
         cache=cache,
         max_rounds=max_rounds, 
         is_dev=is_dev,
-    )
\ No newline at end of file
+    )
+
+    get_task_pool().start()
\ No newline at end of file
@@ -20,12 +20,7 @@ class ApiSmartAccount(SmartAccount):
         if self.task_id is None:
             raise ValueError("Task ID is required")
 
-        saved_task = self.tasks.get(self.task_id)
-        if saved_task is None:
-            raise ValueError("Task not found")
-
-        saved_task.intents.extend(intents)
-        self.tasks.update(saved_task)
+        self.tasks.add_intents(self.task_id, intents)
 
     async def on_intents_ready(self, _intents: list[Intent]) -> bool | str:
         return True
@@ -6,7 +6,7 @@ from eth_account.signers.local import LocalAccount
 from web3 import Web3
 
 from autotx.eth_address import ETHAddress
-from autotx.intents import Intent
+from autotx.intents import Intent, a_build_intents_transactions
 from autotx.transactions import TransactionBase
 from autotx.smart_accounts.smart_account import SmartAccount
 from autotx.utils.ethereum.networks import NetworkInfo
@@ -32,9 +32,7 @@ class LocalBiconomySmartAccount(SmartAccount):
                 return False
 
             transactions: list[TransactionBase] = []
-
-            for intent in intents:
-                transactions.extend(await intent.build_transactions(self.web3, NetworkInfo(self.web3.eth.chain_id), self.address))
+            transactions.extend(await a_build_intents_transactions(intents, self.web3, NetworkInfo(self.web3.eth.chain_id), self.address))
 
             dict_transactions = [json.loads(transaction.json()) for transaction in transactions]
 
@@ -1,10 +1,8 @@
 import os
 from eth_account.signers.local import LocalAccount
-from eth_typing import URI
 from eth_account.signers.local import LocalAccount
-from gnosis.eth import EthereumClient
 
-from autotx.intents import Intent
+from autotx.intents import Intent, a_build_intents_transactions
 from autotx.transactions import TransactionBase
 from autotx.utils.ethereum import SafeManager
 from autotx.smart_accounts.smart_account import SmartAccount
@@ -12,6 +10,7 @@ from autotx.setup import setup_safe
 from autotx.utils.ethereum import SafeManager
 from autotx.utils.ethereum.agent_account import get_or_create_agent_account
 from autotx.utils.ethereum.cached_safe_address import get_cached_safe_address
+from autotx.utils.ethereum.get_token_balances import get_ethereum_client_for_url
 from autotx.eth_address import ETHAddress
 from autotx.utils.ethereum.helpers.fill_dev_account_with_tokens import fill_dev_account_with_tokens
 from autotx.smart_accounts.smart_account import SmartAccount
@@ -32,7 +31,7 @@ class SafeSmartAccount(SmartAccount):
         check_valid_safe: bool = False,
         fill_dev_account: bool = False,
     ):
-        client = EthereumClient(URI(rpc_url))
+        client = get_ethereum_client_for_url(rpc_url)
 
         agent = agent if agent else get_or_create_agent_account()
 
@@ -58,9 +57,7 @@ class SafeSmartAccount(SmartAccount):
 
     async def on_intents_ready(self, intents: list[Intent]) -> bool | str:
         transactions: list[TransactionBase] = []
-
-        for intent in intents:
-            transactions.extend(await intent.build_transactions(self.web3, self.manager.network, self.address))
+        transactions.extend(await a_build_intents_transactions(intents, self.web3, self.manager.network, self.address))
 
         return self.manager.send_multisend_tx_batch(transactions, not self.auto_submit_tx)
 
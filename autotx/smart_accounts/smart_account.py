@@ -6,6 +6,7 @@ from web3.types import TxReceipt
 from autotx.intents import Intent
 from autotx.transactions import TransactionBase
 from autotx.eth_address import ETHAddress
+from autotx.utils.ethereum.receipt_tracker import get_receipt_tracker
 
 
 class SmartAccount:
@@ -32,4 +33,10 @@ class SmartAccount:
         raise NotImplementedError()
 
     def wait(self, tx_hash: HexBytes) -> TxReceipt:
-        return self.web3.eth.wait_for_transaction_receipt(tx_hash)
\ No newline at end of file
+        return get_receipt_tracker(self.web3).wait(tx_hash)
+
+    def wait_all(self, tx_hashes: list[HexBytes]) -> list[TxReceipt]:
+        return get_receipt_tracker(self.web3).wait_all(tx_hashes)
+
+    async def a_wait_all(self, tx_hashes: list[HexBytes]) -> list[TxReceipt]:
+        return await get_receipt_tracker(self.web3).a_wait_all(tx_hashes)
\ No newline at end of file
@@ -0,0 +1,144 @@
+import asyncio
+from dataclasses import dataclass, field
+from threading import Lock
+import time
+from typing import AsyncGenerator
+
+from autotx import db, models
+from autotx.utils.run_blocking import run_blocking
+
+# Without live events (e.g. the task runs in another server process) the stream falls back to reading the database.
+# The reads back off while they find nothing new, a keep-alive is still sent every STREAM_POLL_INTERVAL_SEC
+STREAM_POLL_INTERVAL_SEC = 5
+STREAM_MAX_POLL_INTERVAL_SEC = 30
+FINISHED_STATUSES = [models.TaskStatus.COMPLETED, models.TaskStatus.FAILED]
+
+@dataclass
+class TaskSubscription:
+    task_id: str
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[models.TaskEvent] = field(default_factory=asyncio.Queue)
+
+# In-process fan-out of task progress, events are published from the worker threads running the tasks
+# and delivered to subscribers on their own event loop
+class TaskEventBus:
+    subscriptions: dict[str, list[TaskSubscription]]
+
+    def __init__(self) -> None:
+        self.subscriptions = {}
+        self.lock = Lock()
+
+    def subscribe(self, task_id: str) -> TaskSubscription:
+        subscription = TaskSubscription(task_id, asyncio.get_running_loop())
+        with self.lock:
+            self.subscriptions.setdefault(task_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: TaskSubscription) -> None:
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.task_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if len(subscriptions) == 0:
+                self.subscriptions.pop(subscription.task_id, None)
+
+    def publish(self, task_id: str, events: list[models.TaskEvent]) -> None:
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(task_id, []))
+
+        for subscription in subscriptions:
+            for event in events:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, event)
+                except RuntimeError:
+                    # The subscriber's event loop is closed
+                    self.unsubscribe(subscription)
+                    break
+
+    def publish_messages(self, task_id: str, offset: int, messages: list[str]) -> None:
+        self.publish(task_id, [
+            models.TaskEvent(type="message", offset=offset + i, data=message)
+            for i, message in enumerate(messages)
+        ])
+
+    def publish_logs(self, task_id: str, offset: int, logs: list[models.TaskLog]) -> None:
+        self.publish(task_id, [
+            models.TaskEvent(type="log", offset=offset + i, data=log.model_dump(mode="json"))
+            for i, log in enumerate(logs)
+        ])
+
+    def publish_status(self, task_id: str, status: models.TaskStatus) -> None:
+        self.publish(task_id, [models.TaskEvent(type="status", offset=None, data=status.value)])
+
+task_event_bus = TaskEventBus()
+
+# Yields the messages and logs of a task from the given offsets, followed by live events until the task finishes.
+# None is yielded when there was nothing new for a while, so the caller can keep the connection alive
+async def stream_task_events(tasks: db.TasksRepository, task_id: str, messages_offset: int = 0, logs_offset: int = 0) -> AsyncGenerator[models.TaskEvent | None, None]:
+    # Subscribe before reading the database, events published in between are deduplicated by their offset
+    subscription = task_event_bus.subscribe(task_id)
+
+    async def read_new_events() -> tuple[list[models.TaskEvent], models.TaskStatus | None]:
+        # The status is read first, so messages and logs written before the task finished are never missed
+        status = await run_blocking(tasks.get_status, task_id)
+        if status is None or status == models.TaskStatus.QUEUED:
+            # Nothing is written before the task starts
+            return ([], status)
+
+        messages = await run_blocking(tasks.get_messages, task_id, messages_offset)
+        logs = await run_blocking(tasks.get_logs, task_id, logs_offset)
+
+        return (
+            [models.TaskEvent(type="message", offset=messages_offset + i, data=message) for i, message in enumerate(messages)]
+            + [models.TaskEvent(type="log", offset=logs_offset + i, data=log.model_dump(mode="json")) for i, log in enumerate(logs)],
+            status
+        )
+
+    try:
+        read_from_db = True
+        poll_interval_sec: float = STREAM_POLL_INTERVAL_SEC
+        next_read_at = 0.0
+        while True:
+            if read_from_db:
+                (events, status) = await read_new_events()
+                for event in events:
+                    if event.type == "message":
+                        messages_offset += 1
+                    else:
+                        logs_offset += 1
+                    yield event
+
+                if status is None or status in FINISHED_STATUSES:
+                    if status:
+                        yield models.TaskEvent(type="status", offset=None, data=status.value)
+                    return
+
+                poll_interval_sec = STREAM_POLL_INTERVAL_SEC if events else min(poll_interval_sec * 2, STREAM_MAX_POLL_INTERVAL_SEC)
+                next_read_at = time.monotonic() + poll_interval_sec
+
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), STREAM_POLL_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                read_from_db = time.monotonic() >= next_read_at
+                yield None
+                continue
+
+            # Live events mean the task runs in this process, the database isn't read while they keep coming
+            read_from_db = False
+            next_read_at = time.monotonic() + poll_interval_sec
+            if event.type == "status" and event.data in [status.value for status in FINISHED_STATUSES]:
+                # Messages written when the task finished (e.g. the error message) are only in the database
+                read_from_db = True
+                continue
+            elif event.type == "message":
+                if event.offset is None or event.offset < messages_offset:
+                    continue
+                messages_offset = event.offset + 1
+            elif event.type == "log":
+                if event.offset is None or event.offset < logs_offset:
+                    continue
+                logs_offset = event.offset + 1
+
+            yield event
+    finally:
+        task_event_bus.unsubscribe(subscription)
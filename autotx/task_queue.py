@@ -0,0 +1,79 @@
+from abc import abstractmethod
+from dataclasses import dataclass
+from threading import Lock
+import time
+
+from autotx import models
+
+class TaskQueue:
+    @abstractmethod
+    def enqueue(self, queued_task: models.QueuedTask) -> None:
+        pass
+
+    # Claims the oldest task that is queued, or whose worker stopped renewing its lease
+    @abstractmethod
+    def claim(self, worker_id: str, lease_sec: int, excluded_app_ids: list[str], excluded_app_user_ids: list[str]) -> models.QueuedTask | None:
+        pass
+
+    @abstractmethod
+    def renew(self, worker_id: str, task_ids: list[str], lease_sec: int) -> None:
+        pass
+
+    @abstractmethod
+    def complete(self, task_id: str, failed: bool) -> None:
+        pass
+
+    @abstractmethod
+    def depth(self) -> int:
+        pass
+
+@dataclass
+class LocalQueueEntry:
+    queued_task: models.QueuedTask
+    status: str
+    worker_id: str | None = None
+    lease_expires_at: float = 0
+
+# In-memory stand-in for the task_queue table, queued tasks don't survive a restart
+class LocalTaskQueue(TaskQueue):
+    entries: dict[str, LocalQueueEntry]
+
+    def __init__(self) -> None:
+        self.entries = {}
+        self.lock = Lock()
+
+    def enqueue(self, queued_task: models.QueuedTask) -> None:
+        with self.lock:
+            self.entries[queued_task.task_id] = LocalQueueEntry(queued_task, "queued")
+
+    def claim(self, worker_id: str, lease_sec: int, excluded_app_ids: list[str], excluded_app_user_ids: list[str]) -> models.QueuedTask | None:
+        with self.lock:
+            now = time.monotonic()
+            # Entries keep their insertion order, which is the order they were enqueued in
+            for entry in self.entries.values():
+                claimable = entry.status == "queued" or (entry.status == "running" and entry.lease_expires_at < now)
+                if not claimable or entry.queued_task.app_id in excluded_app_ids or entry.queued_task.app_user_id in excluded_app_user_ids:
+                    continue
+
+                entry.status = "running"
+                entry.worker_id = worker_id
+                entry.lease_expires_at = now + lease_sec
+                entry.queued_task = entry.queued_task.model_copy(update={ "attempts": entry.queued_task.attempts + 1 })
+                return entry.queued_task
+
+            return None
+
+    def renew(self, worker_id: str, task_ids: list[str], lease_sec: int) -> None:
+        with self.lock:
+            for task_id in task_ids:
+                entry = self.entries.get(task_id)
+                if entry and entry.worker_id == worker_id:
+                    entry.lease_expires_at = time.monotonic() + lease_sec
+
+    def complete(self, task_id: str, failed: bool) -> None:
+        with self.lock:
+            self.entries.pop(task_id, None)
+
+    def depth(self) -> int:
+        with self.lock:
+            return len([entry for entry in self.entries.values() if entry.status == "queued"])
@@ -0,0 +1,181 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import os
+import socket
+from threading import Event, Lock, Thread
+import time
+import traceback
+from typing import Any, Callable, Coroutine
+import uuid
+
+from autotx import models
+from autotx.task_queue import TaskQueue
+
+POLL_INTERVAL_SEC = 2
+# Polling backs off while the queue is empty. Tasks enqueued or finished in this process wake the dispatcher right away
+MAX_POLL_INTERVAL_SEC = 30
+# Workers renew the lease of their running tasks, tasks of a worker that died are claimed again once their lease expires
+LEASE_SEC = 120
+LEASE_RENEW_INTERVAL_SEC = LEASE_SEC / 4
+# A task claimed more often than this keeps crashing its worker, it is abandoned instead of run again
+MAX_TASK_ATTEMPTS = 3
+
+# Runs queued tasks on a bounded pool of threads, each task gets its own event loop so a long agent run
+# never blocks the server's event loop. Tasks are claimed from the queue in order, skipping apps and users at their quota.
+# Quotas only count the tasks running in this process, with several server processes an app or user can run up to
+# the quota in each of them
+class TaskWorkerPool:
+    queue: TaskQueue
+    execute: Callable[[models.QueuedTask], Coroutine[Any, Any, None]]
+    abandon: Callable[[models.QueuedTask, str], None]
+    running: dict[str, models.QueuedTask]
+
+    def __init__(
+        self,
+        queue: TaskQueue,
+        execute: Callable[[models.QueuedTask], Coroutine[Any, Any, None]],
+        abandon: Callable[[models.QueuedTask, str], None],
+        max_workers: int,
+        max_tasks_per_app: int,
+        max_tasks_per_user: int,
+        poll_interval_sec: float = POLL_INTERVAL_SEC,
+        max_attempts: int = MAX_TASK_ATTEMPTS,
+        max_poll_interval_sec: float = MAX_POLL_INTERVAL_SEC,
+    ):
+        self.queue = queue
+        self.execute = execute
+        self.abandon = abandon
+        self.max_workers = max_workers
+        self.max_tasks_per_app = max_tasks_per_app
+        self.max_tasks_per_user = max_tasks_per_user
+        self.poll_interval_sec = poll_interval_sec
+        self.max_poll_interval_sec = max_poll_interval_sec
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="autotx-task")
+        self.running = {}
+        self.lock = Lock()
+        self.wakeup = Event()
+        self.stopped = Event()
+        self.thread: Thread | None = None
+        self.completed = 0
+        self.failed = 0
+        self.wait_count = 0
+        self.total_wait_sec = 0.0
+        self.max_wait_sec = 0.0
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.thread = Thread(target=self.dispatch, name="autotx-task-dispatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.wakeup.set()
+        self.executor.shutdown(wait=False)
+
+    def enqueue(self, queued_task: models.QueuedTask) -> None:
+        self.queue.enqueue(queued_task)
+        self.wakeup.set()
+
+    def excluded(self) -> tuple[list[str], list[str]]:
+        with self.lock:
+            tasks_per_app: dict[str, int] = {}
+            tasks_per_user: dict[str, int] = {}
+            for queued_task in self.running.values():
+                tasks_per_app[queued_task.app_id] = tasks_per_app.get(queued_task.app_id, 0) + 1
+                tasks_per_user[queued_task.app_user_id] = tasks_per_user.get(queued_task.app_user_id, 0) + 1
+
+        return (
+            [app_id for app_id, count in tasks_per_app.items() if count >= self.max_tasks_per_app],
+            [app_user_id for app_user_id, count in tasks_per_user.items() if count >= self.max_tasks_per_user],
+        )
+
+    def poll_wait_sec(self, empty_polls: int) -> float:
+        return min(self.poll_interval_sec * 2.0 ** max(0, empty_polls - 1), self.max_poll_interval_sec)
+
+    def dispatch(self) -> None:
+        renewed_at = time.monotonic()
+        empty_polls = 0
+        while not self.stopped.is_set():
+            self.wakeup.clear()
+            try:
+                if time.monotonic() - renewed_at > LEASE_RENEW_INTERVAL_SEC:
+                    with self.lock:
+                        running_task_ids = list(self.running)
+                    self.queue.renew(self.worker_id, running_task_ids, LEASE_SEC)
+                    renewed_at = time.monotonic()
+
+                claimed = False
+                with self.lock:
+                    has_capacity = len(self.running) < self.max_workers
+
+                if has_capacity:
+                    (excluded_app_ids, excluded_app_user_ids) = self.excluded()
+                    queued_task = self.queue.claim(self.worker_id, LEASE_SEC, excluded_app_ids, excluded_app_user_ids)
+                    if queued_task:
+                        self.submit(queued_task)
+                        claimed = True
+                    else:
+                        empty_polls += 1
+
+                # Keep claiming while there are tasks and free workers, otherwise wait for a new task or a finished one
+                if claimed:
+                    empty_polls = 0
+                    continue
+            except Exception:
+                traceback.print_exc()
+
+            if self.wakeup.wait(self.poll_wait_sec(empty_polls)):
+                empty_polls = 0
+
+    def submit(self, queued_task: models.QueuedTask) -> None:
+        enqueued_at = queued_task.enqueued_at if queued_task.enqueued_at.tzinfo else queued_task.enqueued_at.replace(tzinfo=timezone.utc)
+        wait_sec = max(0.0, (datetime.now(timezone.utc) - enqueued_at).total_seconds())
+
+        with self.lock:
+            self.running[queued_task.task_id] = queued_task
+            self.wait_count += 1
+            self.total_wait_sec += wait_sec
+            self.max_wait_sec = max(self.max_wait_sec, wait_sec)
+
+        self.executor.submit(self.run_task, queued_task)
+
+    def run_task(self, queued_task: models.QueuedTask) -> None:
+        failed = False
+        try:
+            if queued_task.attempts > self.max_attempts:
+                failed = True
+                self.abandon(queued_task, f"Task was interrupted {queued_task.attempts - 1} times")
+            else:
+                asyncio.run(self.execute(queued_task))
+        except Exception:
+            failed = True
+            traceback.print_exc()
+        finally:
+            with self.lock:
+                self.running.pop(queued_task.task_id, None)
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            try:
+                self.queue.complete(queued_task.task_id, failed)
+            except Exception:
+                traceback.print_exc()
+            self.wakeup.set()
+
+    def metrics(self) -> models.TaskQueueMetrics:
+        queued = self.queue.depth()
+        with self.lock:
+            return models.TaskQueueMetrics(
+                workers=self.max_workers,
+                queued=queued,
+                running=len(self.running),
+                completed=self.completed,
+                failed=self.failed,
+                average_wait_sec=self.total_wait_sec / self.wait_count if self.wait_count else 0,
+                max_wait_sec=self.max_wait_sec,
+            )
@@ -0,0 +1,109 @@
+from threading import Condition, Lock, Thread
+import traceback
+
+from autotx import db, models
+from autotx.task_events import task_event_bus
+
+FLUSH_INTERVAL_MS = 500
+FLUSH_MAX_ENTRIES = 50
+
+# Buffers the messages and logs of a running task and writes them in batches on a background thread,
+# so the agents don't wait on a database round trip for every message. Entries are written in the order they were added
+# and published to the task's stream subscribers once they are written
+class TaskWriter:
+    tasks: db.TasksRepository
+    task_id: str
+    messages: list[str]
+    logs: list[models.TaskLog]
+
+    def __init__(
+        self,
+        tasks: db.TasksRepository,
+        task_id: str,
+        messages_offset: int = 0,
+        logs_offset: int = 0,
+        flush_interval_ms: int = FLUSH_INTERVAL_MS,
+        flush_max_entries: int = FLUSH_MAX_ENTRIES
+    ):
+        self.tasks = tasks
+        self.task_id = task_id
+        # Number of messages and logs the task already has, a retried task continues after them
+        self.messages_offset = messages_offset
+        self.logs_offset = logs_offset
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_max_entries = flush_max_entries
+        self.messages = []
+        self.logs = []
+        self.closed = False
+        self.condition = Condition()
+        self.flush_lock = Lock()
+        self.thread = Thread(target=self.run, name=f"task-writer-{task_id}", daemon=True)
+        self.thread.start()
+
+    def add_message(self, message: str) -> None:
+        with self.condition:
+            if self.closed:
+                raise Exception(f"Task writer for task {self.task_id} is closed")
+            self.messages.append(message)
+            if self.pending() >= self.flush_max_entries:
+                self.condition.notify()
+
+    def add_log(self, log: models.TaskLog) -> None:
+        with self.condition:
+            if self.closed:
+                raise Exception(f"Task writer for task {self.task_id} is closed")
+            self.logs.append(log)
+            if self.pending() >= self.flush_max_entries:
+                self.condition.notify()
+
+    def pending(self) -> int:
+        return len(self.messages) + len(self.logs)
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                if not self.closed and self.pending() < self.flush_max_entries:
+                    self.condition.wait(self.flush_interval_ms / 1000)
+                closed = self.closed
+
+            try:
+                self.flush()
+            except Exception:
+                # Entries that failed to be written are kept and retried on the next flush
+                traceback.print_exc()
+
+            if closed:
+                return
+
+    def flush(self) -> None:
+        # Only one flush runs at a time, so batches are written in order
+        with self.flush_lock:
+            with self.condition:
+                messages, self.messages = self.messages, []
+                logs, self.logs = self.logs, []
+
+            try:
+                self.tasks.append_messages(self.task_id, messages)
+                task_event_bus.publish_messages(self.task_id, self.messages_offset, messages)
+                self.messages_offset += len(messages)
+                messages = []
+
+                self.tasks.append_logs(self.task_id, logs)
+                task_event_bus.publish_logs(self.task_id, self.logs_offset, logs)
+                self.logs_offset += len(logs)
+            except Exception as e:
+                with self.condition:
+                    self.messages = messages + self.messages
+                    self.logs = logs + self.logs
+                raise e
+
+    # Writes everything that is still buffered and stops the background thread
+    def close(self) -> None:
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+
+        self.thread.join()
+        self.flush()
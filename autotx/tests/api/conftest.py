@@ -0,0 +1,25 @@
+import time
+from typing import Any, Callable
+from fastapi.testclient import TestClient
+import pytest
+
+from autotx.server import app
+
+@pytest.fixture
+def wait_for_task() -> Callable[[str], Any]:
+    client = TestClient(app)
+
+    def wait(task_id: str) -> Any:
+        # Tasks are queued and run by the task pool, poll until the run finished
+        for _ in range(300):
+            response = client.get(f"/api/v1/tasks/{task_id}", headers={
+                "Authorization": f"Bearer 1234"
+            })
+            data = response.json()
+            if data["running"] is False:
+                return data
+            time.sleep(1)
+
+        raise Exception(f"Task {task_id} did not finish in time")
+
+    return wait
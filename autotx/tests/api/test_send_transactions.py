@@ -47,7 +47,7 @@ def test_send_transactions_auth():
     assert response.status_code == 401
 
 
-def test_get_transactions():
+def test_get_transactions(wait_for_task):
     db.clear_db()
     db.create_app("test", "1234")
     server.setup_server(verbose=True, logs=None, max_rounds=None, cache=False, is_dev=True, check_valid_safe=False)
@@ -75,6 +75,7 @@ def test_get_transactions():
     data = response.json()
 
     task_id = data["id"]
+    wait_for_task(task_id)
 
     response = client.get(f"/api/v1/tasks/{task_id}/intents", headers={
         "Authorization": f"Bearer 1234"
@@ -105,7 +106,7 @@ def test_get_transactions():
     })
     assert response.status_code == 400
 
-def test_send_transactions():
+def test_send_transactions(wait_for_task):
     db.clear_db()
     db.create_app("test", "1234")
     server.setup_server(verbose=True, logs=None, max_rounds=None, cache=False, is_dev=True, check_valid_safe=False)
@@ -133,6 +134,7 @@ def test_send_transactions():
     data = response.json()
 
     task_id = data["id"]
+    wait_for_task(task_id)
 
     response = client.post(f"/api/v1/tasks/{task_id}/transactions/prepare", params={
         "user_id": user_id,
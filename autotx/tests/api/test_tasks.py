@@ -1,3 +1,4 @@
+from typing import Any
 import uuid
 from fastapi.testclient import TestClient
 import pytest
@@ -33,7 +34,7 @@ def test_get_task_auth():
     response = client.get("/api/v1/tasks/123")
     assert response.status_code == 401
 
-def test_create_task():
+def test_create_task(wait_for_task):
     server.setup_server(verbose=True, logs=None, max_rounds=None, cache=False, is_dev=True, check_valid_safe=False)
     
     smart_wallet_address = get_cached_safe_address()
@@ -63,11 +64,9 @@ def test_create_task():
     assert data["messages"] == []
     assert data["intents"] == []
     assert data["running"] is True
+    assert data["status"] == "queued"
 
-    response = client.get(f"/api/v1/tasks/{data['id']}", headers={
-        "Authorization": f"Bearer 1234"
-    })
-    data = response.json()
+    data = wait_for_task(data["id"])
 
     assert data["running"] is False
     assert len(data["intents"]) > 0
@@ -81,6 +80,58 @@ def test_get_tasks():
     assert len(data) > 0
     assert "id" in data[0]
 
+def test_get_tasks_fields():
+    response = client.get("/api/v1/tasks", headers={
+        "Authorization": f"Bearer 1234"
+    })
+    assert response.status_code == 200
+    task = response.json()[0]
+    assert "prompt" in task
+    assert "messages" not in task
+    assert "logs" not in task
+
+    response = client.get("/api/v1/tasks", params={ "fields": "messages" }, headers={
+        "Authorization": f"Bearer 1234"
+    })
+    assert response.status_code == 200
+    task = response.json()[0]
+    assert set(task.keys()) == { "id", "created_at", "messages" }
+    assert len(task["messages"]) > 0
+
+    response = client.get("/api/v1/tasks", params={ "fields": "secret" }, headers={
+        "Authorization": f"Bearer 1234"
+    })
+    assert response.status_code == 400
+
+def test_get_tasks_pages():
+    response = client.get("/api/v1/tasks", params={ "limit": server.TASKS_PAGE_MAX_LIMIT, "fields": "id" }, headers={
+        "Authorization": f"Bearer 1234"
+    })
+    all_ids = [task["id"] for task in response.json()]
+
+    ids = []
+    cursor = None
+    while len(ids) <= len(all_ids):
+        params: dict[str, Any] = { "limit": 1, "fields": "id" }
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/tasks", params=params, headers={
+            "Authorization": f"Bearer 1234"
+        })
+        assert response.status_code == 200
+        ids.extend([task["id"] for task in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert ids == all_ids
+
+def test_get_tasks_invalid_cursor():
+    response = client.get("/api/v1/tasks", params={ "cursor": "invalid" }, headers={
+        "Authorization": f"Bearer 1234"
+    })
+    assert response.status_code == 400
+
 def test_get_task():
     response = client.get("/api/v1/tasks", headers={
         "Authorization": f"Bearer 1234"
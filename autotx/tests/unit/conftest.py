@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+# autotx.db requires these to be set, the unit tests replace its clients with fakes
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "unit-tests")
+
+# Unit tests don't need the local fork started by the parent conftest
+@pytest.fixture(autouse=True)
+def start_and_stop_local_fork():
+    yield
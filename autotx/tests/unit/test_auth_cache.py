@@ -0,0 +1,116 @@
+from typing import Any
+
+from fastapi import HTTPException
+import pytest
+
+from autotx import db, server
+from autotx.utils.ttl_cache import TTLCache
+
+class FakeQuery:
+    def __init__(self, client: "FakeClient", table: str):
+        self.client = client
+        self.table = table
+        self.filters: dict[str, Any] = {}
+        self.values: dict[str, Any] | None = None
+        self.inserted: dict[str, Any] | None = None
+
+    def select(self, columns: str) -> "FakeQuery":
+        return self
+
+    def update(self, values: dict[str, Any]) -> "FakeQuery":
+        self.values = values
+        return self
+
+    def insert(self, values: dict[str, Any]) -> "FakeQuery":
+        self.inserted = { "id": f"user-{len(self.client.rows[self.table])}", **values }
+        self.client.rows[self.table].append(self.inserted)
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.filters[column] = value
+        return self
+
+    def execute(self) -> Any:
+        self.client.queries.append(self.table)
+        if self.inserted is not None:
+            return type("Response", (), { "data": [self.inserted] })
+        rows = [
+            row for row in self.client.rows[self.table]
+            if all(row.get(column) == value for column, value in self.filters.items())
+        ]
+        if self.values is not None:
+            for row in rows:
+                row.update(self.values)
+        return type("Response", (), { "data": rows })
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.rows: dict[str, list[dict[str, Any]]] = {
+            "apps": [{ "id": "app-1", "name": "App", "api_key": "key-1", "allowed": True }],
+            "app_users": [{ "id": "user-0", "app_id": "app-1", "user_id": "alice", "agent_address": "0x1", "created_at": "2026-01-01T00:00:00" }],
+        }
+        self.queries: list[str] = []
+
+    def table(self, table: str) -> FakeQuery:
+        return FakeQuery(self, table)
+
+@pytest.fixture()
+def client(monkeypatch) -> FakeClient:
+    client = FakeClient()
+    monkeypatch.setattr(db, "get_db_client", lambda schema: client)
+    monkeypatch.setattr(db, "app_cache", TTLCache(16, db.AUTH_CACHE_TTL_SEC))
+    monkeypatch.setattr(db, "app_user_cache", TTLCache(16, db.AUTH_CACHE_TTL_SEC))
+    return client
+
+def test_authorized_app_is_served_from_the_cache(client: FakeClient) -> None:
+    for _ in range(3):
+        app = server.authorize("Bearer key-1")
+
+    assert app.id == "app-1"
+    assert client.queries == ["apps"]
+
+def test_unknown_api_key_is_cached_briefly(client: FakeClient, monkeypatch) -> None:
+    monkeypatch.setattr("autotx.utils.ttl_cache.time.monotonic", lambda: 1000.0)
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            server.authorize("Bearer unknown")
+    assert client.queries == ["apps"]
+
+    monkeypatch.setattr("autotx.utils.ttl_cache.time.monotonic", lambda: 1000.0 + db.AUTH_CACHE_MISS_TTL_SEC + 1)
+    with pytest.raises(HTTPException):
+        server.authorize("Bearer unknown")
+    assert client.queries == ["apps", "apps"]
+
+def test_cached_app_expires(client: FakeClient, monkeypatch) -> None:
+    monkeypatch.setattr("autotx.utils.ttl_cache.time.monotonic", lambda: 1000.0)
+    server.authorize("Bearer key-1")
+
+    # Revoked directly in the database, the cached entry is used until it expires
+    client.rows["apps"][0]["allowed"] = False
+    server.authorize("Bearer key-1")
+
+    monkeypatch.setattr("autotx.utils.ttl_cache.time.monotonic", lambda: 1000.0 + db.AUTH_CACHE_TTL_SEC + 1)
+    with pytest.raises(HTTPException) as error:
+        server.authorize("Bearer key-1")
+    assert error.value.status_code == 401
+
+def test_revoked_app_is_rejected_immediately(client: FakeClient) -> None:
+    server.authorize("Bearer key-1")
+
+    assert db.revoke_app("app-1")
+
+    with pytest.raises(HTTPException) as error:
+        server.authorize("Bearer key-1")
+    assert error.value.status_code == 401
+    assert not db.revoke_app("app-2")
+
+def test_app_users_are_cached_on_lookup_and_creation(client: FakeClient) -> None:
+    (app, alice) = server.authorize_app_and_user("Bearer key-1", "alice")
+    server.authorize_app_and_user("Bearer key-1", "alice")
+    bob = db.create_app_user(app.id, "bob", "0x2", "private-key")
+    (_, cached_bob) = server.authorize_app_and_user("Bearer key-1", "bob")
+
+    assert alice.user_id == "alice"
+    assert cached_bob is bob
+    assert client.queries == ["apps", "app_users", "app_users"]
+    assert cached_bob.id == "user-1"
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from autotx.agents import SwapTokensAgent
+from autotx.agents.SwapTokensAgent import BulkSwapTool, InvalidInput
+
+class FakeIntent:
+    def __init__(self, summary: str):
+        self.summary = summary
+
+class FakeAutoTx:
+    def __init__(self) -> None:
+        self.intents: list[FakeIntent] = []
+        self.notifications: list[str] = []
+
+    def add_intents(self, intents: list[FakeIntent]) -> None:
+        self.intents.extend(intents)
+
+    def notify_user(self, message: str) -> None:
+        self.notifications.append(message)
+
+class FakeQuotes:
+    def __init__(self, delays: dict[str, float], errors: dict[str, Exception] = {}):
+        self.delays = delays
+        self.errors = errors
+        self.started: list[str] = []
+        self.finished: list[str] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def build_swap_intent(self, autotx: FakeAutoTx, token_to_sell: str, token_to_buy: str) -> FakeIntent:
+        line = f"{token_to_sell} to {token_to_buy}"
+        self.started.append(line)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delays.get(line, 0))
+        self.running -= 1
+        self.finished.append(line)
+        if line in self.errors:
+            raise self.errors[line]
+        return FakeIntent(f"Swap {line}")
+
+@pytest.fixture()
+def autotx() -> FakeAutoTx:
+    return FakeAutoTx()
+
+def run_tool(monkeypatch, autotx: FakeAutoTx, quotes: FakeQuotes, tokens: str) -> str:
+    monkeypatch.setattr(SwapTokensAgent, "build_swap_intent", quotes.build_swap_intent)
+    tool = BulkSwapTool().build_tool(autotx) # type: ignore
+    return asyncio.run(tool(tokens))
+
+def test_independent_lines_are_quoted_concurrently_and_added_in_order(monkeypatch, autotx: FakeAutoTx) -> None:
+    quotes = FakeQuotes({ "0.2 ETH to UNI": 0.03, "0.2 ETH to WBTC": 0.02, "0.2 ETH to USDC": 0.01 })
+
+    run_tool(monkeypatch, autotx, quotes, "0.2 ETH to UNI\n0.2 ETH to WBTC\n0.2 ETH to USDC")
+
+    assert quotes.max_running == 3
+    assert quotes.finished == ["0.2 ETH to USDC", "0.2 ETH to WBTC", "0.2 ETH to UNI"]
+    assert [intent.summary for intent in autotx.intents] == ["Swap 0.2 ETH to UNI", "Swap 0.2 ETH to WBTC", "Swap 0.2 ETH to USDC"]
+
+def test_concurrent_quotes_are_bounded(monkeypatch, autotx: FakeAutoTx) -> None:
+    monkeypatch.setattr(SwapTokensAgent, "MAX_CONCURRENT_SWAPS", 2)
+    lines = [f"0.1 ETH to TOKEN{i}" for i in range(5)]
+    quotes = FakeQuotes({ line: 0.01 for line in lines })
+
+    run_tool(monkeypatch, autotx, quotes, "\n".join(lines))
+
+    assert quotes.max_running == 2
+    assert len(autotx.intents) == 5
+
+def test_line_selling_an_earlier_output_waits_for_it(monkeypatch, autotx: FakeAutoTx) -> None:
+    quotes = FakeQuotes({ "ETH to 5 USDC": 0.02 })
+
+    run_tool(monkeypatch, autotx, quotes, "ETH to 5 USDC\nUSDC to 6 UNI\n0.1 ETH to WBTC")
+
+    assert quotes.started.index("USDC to 6 UNI") > quotes.finished.index("ETH to 5 USDC")
+    # Unrelated lines don't wait
+    assert quotes.finished.index("0.1 ETH to WBTC") < quotes.finished.index("ETH to 5 USDC")
+
+def test_errors_are_summarized_in_line_order(monkeypatch, autotx: FakeAutoTx) -> None:
+    quotes = FakeQuotes(
+        { "0.1 ETH to UNI": 0.02 },
+        {
+            "0.1 ETH to UNI": Exception("No route"),
+            "1 ETH to 2 DAI": InvalidInput("Invalid input: \"1 ETH to 2 DAI\"."),
+        },
+    )
+
+    summary = run_tool(monkeypatch, autotx, quotes, "0.1 ETH to UNI\n1 ETH to 2 DAI\n0.1 ETH to USDC")
+
+    assert [intent.summary for intent in autotx.intents] == ["Swap 0.1 ETH to USDC"]
+    assert autotx.notifications == [
+        "Prepared transaction: Swap 0.1 ETH to USDC\n"
+        "Error: No route for swap \"0.1 ETH to UNI\"\n"
+        "Invalid input: \"1 ETH to 2 DAI\".\n"
+        "2 errors occurred. 1 transactions were prepared. There is no need to re-run the transactions that were prepared."
+    ]
+    assert "1. Swap 0.1 ETH to USDC" in summary
@@ -0,0 +1,86 @@
+import pytest
+
+from autotx.utils import chain_connections
+from autotx.utils.chain_connections import get_chain_connection, check_chain_connections
+
+RPC_URL = "http://node.test"
+
+class FakeEth:
+    chain_id = 10
+
+class FakeWeb3:
+    def __init__(self) -> None:
+        self.eth = FakeEth()
+        self.connected = True
+        self.checks = 0
+
+    def is_connected(self) -> bool:
+        self.checks += 1
+        return self.connected
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.w3 = FakeWeb3()
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture()
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr("autotx.utils.chain_connections.time.monotonic", clock.monotonic)
+    monkeypatch.setattr("autotx.utils.chain_connections.time.sleep", lambda seconds: None)
+    return clock
+
+@pytest.fixture()
+def web3(monkeypatch, clock: Clock) -> FakeWeb3:
+    client = FakeClient()
+    monkeypatch.setattr(chain_connections, "connections", {})
+    monkeypatch.setattr(chain_connections, "get_ethereum_client_for_url", lambda rpc_url: client)
+    # The checks are run by the tests instead of the background thread
+    monkeypatch.setattr(chain_connections, "start_health_checks", lambda: None)
+    return client.w3
+
+def test_connection_is_reused_without_checking_the_node(web3: FakeWeb3, clock: Clock) -> None:
+    first = get_chain_connection(RPC_URL)
+    clock.now += chain_connections.HEALTH_CHECK_INTERVAL_SEC * 10
+    second = get_chain_connection(RPC_URL)
+
+    assert first is not None and first is second
+    assert first.chain_id == 10
+    assert web3.checks == 1
+
+def test_unreachable_node_is_not_connected(web3: FakeWeb3) -> None:
+    web3.connected = False
+
+    assert get_chain_connection(RPC_URL, attempts=3) is None
+    assert web3.checks == 3
+    assert chain_connections.connections == {}
+
+def test_health_check_only_checks_connections_that_are_due(web3: FakeWeb3, clock: Clock) -> None:
+    get_chain_connection(RPC_URL)
+
+    clock.now += chain_connections.HEALTH_CHECK_INTERVAL_SEC - 1
+    check_chain_connections()
+    assert web3.checks == 1
+
+    clock.now += 1
+    check_chain_connections()
+    assert web3.checks == 2
+
+def test_unhealthy_connection_is_skipped_until_the_node_is_back(web3: FakeWeb3, clock: Clock) -> None:
+    get_chain_connection(RPC_URL)
+
+    web3.connected = False
+    clock.now += chain_connections.HEALTH_CHECK_INTERVAL_SEC
+    check_chain_connections()
+    assert get_chain_connection(RPC_URL) is None
+
+    web3.connected = True
+    clock.now += chain_connections.UNHEALTHY_CHECK_INTERVAL_SEC
+    check_chain_connections()
+    assert get_chain_connection(RPC_URL) is not None
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from autotx import db
+from autotx.utils.ttl_cache import TTLCache
+
+APP = { "id": "app-1", "name": "App", "api_key": "key-1", "allowed": True }
+
+class FakeQuery:
+    def __init__(self, client: "FakeAsyncClient", table: str):
+        self.client = client
+        self.table = table
+
+    def select(self, columns: str) -> "FakeQuery":
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self
+
+    async def execute(self) -> Any:
+        self.client.queries.append(self.table)
+        return type("Response", (), { "data": self.client.rows.get(self.table, []) })
+
+class FakePostgrest:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+class FakeAsyncClient:
+    def __init__(self, rows: dict[str, list[dict[str, Any]]]):
+        self.rows = rows
+        self.queries: list[str] = []
+        self.postgrest = FakePostgrest()
+
+    def table(self, table: str) -> FakeQuery:
+        return FakeQuery(self, table)
+
+@pytest.fixture()
+def created_clients(monkeypatch) -> list[FakeAsyncClient]:
+    created: list[FakeAsyncClient] = []
+
+    async def acreate_client(url: str, key: str, options: Any) -> FakeAsyncClient:
+        client = FakeAsyncClient({ "apps": [APP] })
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(db, "acreate_client", acreate_client)
+    monkeypatch.setattr(db, "async_db_clients", {})
+    monkeypatch.setattr(db, "app_cache", TTLCache(16, 60))
+    return created
+
+def test_async_client_is_reused_within_an_event_loop(created_clients: list[FakeAsyncClient]) -> None:
+    async def get_twice() -> tuple[Any, Any]:
+        return (await db.a_get_db_client("public"), await db.a_get_db_client("public"))
+
+    (first, second) = asyncio.run(get_twice())
+
+    assert first is second
+    assert len(created_clients) == 1
+
+def test_async_client_is_replaced_on_a_new_event_loop(created_clients: list[FakeAsyncClient]) -> None:
+    first = asyncio.run(db.a_get_db_client("public"))
+    second = asyncio.run(db.a_get_db_client("public"))
+
+    assert first is not second
+    assert len(db.async_db_clients) == 1
+
+def test_async_clients_are_closed(created_clients: list[FakeAsyncClient]) -> None:
+    async def get_and_close() -> None:
+        await db.a_get_db_client("public")
+        await db.a_close_db_clients()
+
+    asyncio.run(get_and_close())
+
+    assert created_clients[0].postgrest.closed
+    assert db.async_db_clients == {}
+
+def test_async_app_lookup_is_cached(created_clients: list[FakeAsyncClient]) -> None:
+    async def lookup_twice() -> tuple[Any, Any]:
+        return (await db.a_get_app_by_api_key("key-1"), await db.a_get_app_by_api_key("key-1"))
+
+    (first, second) = asyncio.run(lookup_twice())
+
+    assert first is not None and first.id == "app-1"
+    assert second is first
+    assert created_clients[0].queries == ["apps"]
@@ -0,0 +1,110 @@
+from typing import Any
+
+import pytest
+
+from autotx import db
+from autotx.intents import BuyIntent
+
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+ETH = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+
+class FakeQuery:
+    def __init__(self, client: "FakeClient", name: str):
+        self.client = client
+        self.filters: list[tuple[str, str, Any]] = []
+        client.queries.append((name, self.filters))
+
+    def select(self, columns: str) -> "FakeQuery":
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.filters.append(("eq", column, value))
+        return self
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        self.filters.append(("is", column, value))
+        return self
+
+    def order(self, column: str) -> "FakeQuery":
+        self.filters.append(("order", column, None))
+        return self
+
+    def execute(self) -> Any:
+        return type("Response", (), { "data": self.client.rows })
+
+class FakeClient:
+    def __init__(self, rows: list[dict[str, Any]]):
+        self.rows = rows
+        self.queries: list[tuple[str, Any]] = []
+
+    def table(self, table: str) -> FakeQuery:
+        return FakeQuery(self, table)
+
+    def rpc(self, name: str, params: dict[str, Any]) -> FakeQuery:
+        query = FakeQuery(self, name)
+        query.filters.append(("params", name, params))
+        return query
+
+def batch_row() -> dict[str, Any]:
+    return {
+        "id": "batch-1",
+        "app_id": "app-1",
+        "address": "0x1111111111111111111111111111111111111111",
+        "chain_id": 1,
+        "app_user_id": "user-1",
+        "task_id": "task-1",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "submitted_on": None,
+        # jsonb columns come back decoded
+        "transactions": [{ "type": "send", "summary": "Transfer 1 USDC", "params": {} }],
+    }
+
+@pytest.fixture()
+def client(monkeypatch) -> FakeClient:
+    client = FakeClient([])
+    monkeypatch.setattr(db, "get_db_client", lambda schema: client)
+    return client
+
+def test_pending_batches_are_filtered_in_the_database(client: FakeClient) -> None:
+    client.rows = [batch_row()]
+
+    batches = db.get_pending_batches("app-1", "user-1")
+
+    assert client.queries == [("submitted_batches", [
+        ("eq", "app_id", "app-1"),
+        ("eq", "app_user_id", "user-1"),
+        ("is", "submitted_on", "null"),
+        ("order", "created_at", None),
+    ])]
+    assert [batch.id for batch in batches] == ["batch-1"]
+    assert batches[0].transactions[0]["summary"] == "Transfer 1 USDC"
+
+def test_batches_for_token_are_looked_up_by_checksummed_address(client: FakeClient) -> None:
+    client.rows = [batch_row()]
+
+    batches = db.get_submitted_batches_for_token("app-1", USDC.lower())
+
+    assert client.queries == [("get_submitted_batches_for_token", [
+        ("params", "get_submitted_batches_for_token", { "p_app_id": "app-1", "p_token_address": USDC }),
+    ])]
+    assert len(batches) == 1
+
+def test_intents_for_token_are_loaded(client: FakeClient) -> None:
+    client.rows = [{
+        "task_id": "task-1",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "intent": {
+            "type": "buy",
+            "summary": "Buy 10 USDC with ETH",
+            "from_token": { "symbol": "ETH", "address": ETH },
+            "to_token": { "symbol": "USDC", "address": USDC },
+            "amount": 10,
+        },
+    }]
+
+    intents = db.TasksRepository("app-1").get_intents_for_token(USDC.lower())
+
+    assert client.queries[0][1][0][2] == { "p_app_id": "app-1", "p_token_address": USDC }
+    assert intents[0].task_id == "task-1"
+    assert isinstance(intents[0].intent, BuyIntent)
+    assert intents[0].intent.to_token.address == USDC
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+
+from autotx import db
+
+MAX_ROWS = 1000
+MESSAGE_COUNT = 2500
+LOG_COUNT = 1200
+CREATED_AT = datetime(2026, 1, 1)
+
+class FakeQuery:
+    def __init__(self, client: "FakeClient", table: str):
+        self.client = client
+        self.rows = client.tables[table]
+        self.columns: list[str] | None = None
+        self.ordering: list[str] = []
+        self.offset = 0
+        self.limit: int | None = None
+
+    def select(self, columns: str) -> "FakeQuery":
+        if columns != "*":
+            self.columns = [column.strip() for column in columns.split(",")]
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [row for row in self.rows if row[column] == value]
+        return self
+
+    def in_(self, column: str, values: list[Any]) -> "FakeQuery":
+        self.rows = [row for row in self.rows if row[column] in values]
+        return self
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [row for row in self.rows if row[column] > value]
+        return self
+
+    def order(self, column: str) -> "FakeQuery":
+        self.ordering.append(column)
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self.offset = start
+        self.limit = end - start + 1
+        return self
+
+    def execute(self) -> Any:
+        self.client.requests += 1
+        # Like PostgREST, rows beyond max_rows are dropped without an error
+        limit = MAX_ROWS if self.limit is None else min(self.limit, MAX_ROWS)
+        rows = sorted(self.rows, key=lambda row: [row[column] for column in self.ordering])
+        rows = rows[self.offset:self.offset + limit]
+        if self.columns is not None:
+            rows = [{ column: row[column] for column in self.columns } for row in rows]
+        return type("Response", (), { "data": rows })
+
+class FakeClient:
+    def __init__(self, tables: dict[str, list[dict[str, Any]]]):
+        self.tables = tables
+        self.requests = 0
+
+    def table(self, table: str) -> FakeQuery:
+        return FakeQuery(self, table)
+
+@pytest.fixture()
+def client(monkeypatch) -> FakeClient:
+    client = FakeClient({
+        "tasks": [{
+            "id": "task-1", "app_id": "app-1", "prompt": "Send", "address": "0x1", "chain_id": 1,
+            "created_at": CREATED_AT.isoformat(), "updated_at": CREATED_AT.isoformat(),
+            "running": False, "status": "completed", "error": None, "intents": [],
+            "previous_task_id": None, "feedback": None,
+        }],
+        "task_messages": [
+            { "id": i, "task_id": "task-1", "message": f"message {i}", "created_at": (CREATED_AT + timedelta(seconds=i)).isoformat() }
+            for i in range(MESSAGE_COUNT)
+        ],
+        "task_logs": [
+            { "id": i, "task_id": "task-1", "type": "execution", "obj": "{}", "created_at": (CREATED_AT + timedelta(seconds=i)).isoformat() }
+            for i in range(LOG_COUNT)
+        ],
+    })
+    monkeypatch.setattr(db, "get_db_client", lambda schema: client)
+    return client
+
+def test_messages_beyond_max_rows_are_read(client: FakeClient) -> None:
+    messages = db.TasksRepository("app-1").get_messages("task-1")
+
+    assert messages == [f"message {i}" for i in range(MESSAGE_COUNT)]
+    assert client.requests == 3
+
+def test_messages_are_read_from_offset_with_limit(client: FakeClient) -> None:
+    messages = db.TasksRepository("app-1").get_messages("task-1", offset=900, limit=1200)
+
+    assert messages == [f"message {i}" for i in range(900, 2100)]
+
+def test_full_page_is_followed_by_one_more_read(client: FakeClient) -> None:
+    client.tables["task_messages"] = client.tables["task_messages"][:MAX_ROWS]
+
+    messages = db.TasksRepository("app-1").get_messages("task-1")
+
+    assert len(messages) == MAX_ROWS
+    assert client.requests == 2
+
+def test_task_includes_every_message_and_log(client: FakeClient) -> None:
+    task = db.TasksRepository("app-1").get("task-1")
+
+    assert task is not None
+    assert len(task.messages) == MESSAGE_COUNT
+    assert len(task.logs) == LOG_COUNT
+
+def test_task_logs_since_are_paged(client: FakeClient) -> None:
+    since = CREATED_AT + timedelta(seconds=99)
+
+    logs = db.get_task_logs_page("task-1", since=since)
+
+    assert len(logs) == LOG_COUNT - 100
+    assert logs[0].created_at == CREATED_AT + timedelta(seconds=100)
+
+def test_messages_and_logs_of_several_tasks_are_read_past_max_rows(client: FakeClient) -> None:
+    client.tables["task_messages"] += [
+        { "id": MESSAGE_COUNT + i, "task_id": "task-2", "message": f"other {i}", "created_at": (CREATED_AT + timedelta(seconds=i, milliseconds=1)).isoformat() }
+        for i in range(10)
+    ]
+    tasks = db.TasksRepository("app-1")
+
+    messages = tasks.get_messages_for_tasks(["task-1", "task-2"])
+    logs = tasks.get_logs_for_tasks(["task-1", "task-2"])
+
+    assert messages["task-1"] == [f"message {i}" for i in range(MESSAGE_COUNT)]
+    assert messages["task-2"] == [f"other {i}" for i in range(10)]
+    assert len(logs["task-1"]) == LOG_COUNT
+    assert logs["task-2"] == []
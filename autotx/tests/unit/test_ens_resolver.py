@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from autotx.utils import ens_resolver
+from autotx.utils.ttl_cache import TTLCache
+
+VITALIK = "0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045"
+OTHER = "0x1111111111111111111111111111111111111111"
+
+class FakeENS:
+    def __init__(self, addresses: dict[str, Any], names: dict[str, str]):
+        self.addresses = addresses
+        self.names = names
+        self.calls: list[str] = []
+
+    def address(self, name: str) -> str | None:
+        self.calls.append(name)
+        address = self.addresses.get(name)
+        if isinstance(address, Exception):
+            raise address
+        return address
+
+    def name(self, address: str) -> str | None:
+        self.calls.append(address)
+        return self.names.get(address)
+
+class FakeWeb3:
+    def __init__(self, ens: FakeENS):
+        self.ens = ens
+
+@pytest.fixture()
+def ens(monkeypatch) -> FakeENS:
+    ens = FakeENS(
+        { "vitalik.eth": VITALIK, "broken.eth": Exception("node unreachable") },
+        { VITALIK: "vitalik.eth", OTHER: "vitalik.eth" },
+    )
+    monkeypatch.setattr(ens_resolver, "get_mainnet_web3", lambda: FakeWeb3(ens))
+    monkeypatch.setattr(ens_resolver, "forward_cache", TTLCache(16, 60))
+    monkeypatch.setattr(ens_resolver, "reverse_cache", TTLCache(16, 60))
+    return ens
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("autotx.utils.ttl_cache.time.monotonic", lambda: now[0])
+    cache: TTLCache[str, int | None] = TTLCache(2, 10)
+
+    cache.set("a", 1)
+    cache.set("b", None, 5)
+    assert cache.lookup("b") == (True, None)
+    assert cache.lookup("c") == (False, None)
+
+    now[0] += 6
+    assert cache.lookup("b") == (False, None)
+    assert cache.get("a") == 1
+
+    # "a" was used last, "b" is evicted first
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+    now[0] += 11
+    assert cache.get("a") is None
+
+def test_forward_lookups_are_cached(ens):
+    assert ens_resolver.resolve_ens("Vitalik.eth") == VITALIK
+    assert ens_resolver.resolve_ens("vitalik.eth") == VITALIK
+    assert ens_resolver.resolve_ens("missing.eth") is None
+    assert ens_resolver.resolve_ens("missing.eth") is None
+
+    assert ens.calls == ["vitalik.eth", "missing.eth"]
+
+def test_reverse_lookups_are_verified_and_cached(ens):
+    assert ens_resolver.lookup_ens_name(VITALIK.lower()) == "vitalik.eth"
+    assert ens_resolver.lookup_ens_name(VITALIK) == "vitalik.eth"
+    # The reverse record of OTHER claims a name that resolves to another address
+    assert ens_resolver.lookup_ens_name(OTHER) is None
+    assert ens_resolver.lookup_ens_name(OTHER) is None
+
+    assert ens.calls == [VITALIK, "vitalik.eth", OTHER]
+
+def test_failed_lookup_does_not_fail_the_others(ens):
+    addresses = asyncio.run(ens_resolver.a_resolve_ens_names(["vitalik.eth", "broken.eth", "missing.eth", VITALIK]))
+
+    assert addresses == { "vitalik.eth": VITALIK, "missing.eth": None }
+    # Failures are not cached
+    assert ens_resolver.forward_cache.lookup("broken.eth") == (False, None)
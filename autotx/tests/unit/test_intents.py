@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from typing import Any, Iterable
+
+import pytest
+from web3 import Web3
+
+from autotx import eth_address, intents
+from autotx.eth_address import ETHAddress
+from autotx.intents import IntentType, SendIntent, a_build_intents_transactions
+from autotx.token import Token
+from autotx.utils.ethereum.constants import NATIVE_TOKEN_ADDRESS
+from autotx.utils.ethereum.networks import NetworkInfo
+
+VITALIK = "0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045"
+SMART_WALLET = "0x1111111111111111111111111111111111111111"
+
+def send_intent(receiver: str, amount: float) -> SendIntent:
+    return SendIntent(
+        type=IntentType.SEND,
+        receiver=receiver,
+        token=Token(symbol="ETH", address=NATIVE_TOKEN_ADDRESS),
+        amount=amount,
+        summary=f"Transfer {amount} ETH to {receiver}",
+    )
+
+@pytest.fixture()
+def resolve_threads(monkeypatch) -> list[threading.Thread]:
+    threads: list[threading.Thread] = []
+
+    def resolve_ens(name: str) -> str:
+        threads.append(threading.current_thread())
+        return VITALIK
+
+    async def a_resolve_ens_names(names: Iterable[str]) -> None:
+        # Simulates a failed prefetch, the receiver is then resolved while building
+        list(names)
+
+    monkeypatch.setattr(eth_address, "resolve_ens", resolve_ens)
+    monkeypatch.setattr(intents, "a_resolve_ens_names", a_resolve_ens_names)
+    return threads
+
+def build(intent_list: list[Any]) -> list[Any]:
+    return asyncio.run(
+        a_build_intents_transactions(intent_list, Web3(), NetworkInfo(1), ETHAddress(SMART_WALLET))
+    )
+
+def test_send_intent_resolves_ens_receiver_off_the_event_loop(resolve_threads: list[threading.Thread]) -> None:
+    transactions = build([send_intent("vitalik.eth", 1)])
+
+    assert len(resolve_threads) == 1
+    assert resolve_threads[0] is not threading.main_thread()
+    assert transactions[0].params["to"] == VITALIK
+    assert transactions[0].params["value"] == 10**18
+
+def test_intent_transactions_keep_intent_order(resolve_threads: list[threading.Thread]) -> None:
+    transactions = build([send_intent("vitalik.eth", amount) for amount in [3, 1, 2]])
+
+    assert [transaction.amount for transaction in transactions] == [3, 1, 2]
+    assert [transaction.params["from"] for transaction in transactions] == [SMART_WALLET] * 3
@@ -0,0 +1,54 @@
+import asyncio
+
+from autotx.utils.ethereum.lifi import LifiClient, TokenBucket
+
+def test_sessions_are_closed_with_their_loop():
+    client = LifiClient("http://localhost")
+    sessions = []
+
+    async def use_client() -> None:
+        state = await client.get_state()
+        assert await client.get_state() is state
+        sessions.append(state.session)
+
+    for _ in range(5):
+        asyncio.run(use_client())
+
+    assert client.states == {}
+    assert all(session.closed for session in sessions)
+
+def test_closed_loops_are_pruned():
+    client = LifiClient("http://localhost")
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(client.get_state())
+    loop.close()
+    assert len(client.states) == 1
+
+    asyncio.run(client.get_state())
+
+    assert client.states == {}
+
+def test_close_reopens_session():
+    client = LifiClient("http://localhost")
+
+    async def close_and_reopen() -> None:
+        state = await client.get_state()
+        await client.close()
+        assert state.session.closed
+        assert not (await client.get_state()).session.closed
+
+    asyncio.run(close_and_reopen())
+
+def test_bucket_without_rate_only_waits_when_blocked():
+    bucket = TokenBucket(None, 1)
+    assert all(bucket.reserve() <= 0 for _ in range(100))
+
+    bucket.block(5)
+    assert bucket.reserve() > 4
+
+def test_bucket_throttles_past_burst():
+    bucket = TokenBucket(1.5, 2)
+    assert bucket.reserve() <= 0
+    assert bucket.reserve() <= 0
+    assert 0.6 < bucket.reserve() <= 1 / 1.5
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from decimal import Decimal
+from typing import Any
+
+import pytest
+
+from autotx.eth_address import ETHAddress
+from autotx.utils.ethereum.lifi import Lifi
+from autotx.utils.ethereum.lifi import swap
+from autotx.utils.ethereum.networks import ChainId
+
+USDC = ETHAddress("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48")
+WETH = ETHAddress("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2")
+SENDER = ETHAddress("0x1111111111111111111111111111111111111111")
+
+def build_quote(weth_price: str) -> dict[str, Any]:
+    return {
+        "action": {
+            "fromToken": { "priceUSD": weth_price },
+            "toToken": { "priceUSD": "1" },
+        },
+        "estimate": {
+            "approvalAddress": "0x2222222222222222222222222222222222222222",
+            "toAmount": "3000000000",
+            "toAmountMin": "2985000000",
+        },
+        "transactionRequest": {
+            "to": "0x3333333333333333333333333333333333333333",
+            "from": SENDER.hex,
+            "data": "0x",
+            "gasPrice": "0x1",
+            "gasLimit": "0x5208",
+            "value": "0x0",
+            "chainId": 1,
+        },
+        "toolDetails": { "name": "test" },
+    }
+
+@pytest.fixture()
+def lifi(monkeypatch) -> dict[str, Any]:
+    state: dict[str, Any] = { "quotes": 0, "weth_price": "3000" }
+
+    async def get_quote_from_amount(*args: Any) -> dict[str, Any]:
+        state["quotes"] += 1
+        return build_quote(state["weth_price"])
+
+    monkeypatch.setattr(Lifi, "get_quote_from_amount", get_quote_from_amount)
+    swap.quote_store.clear()
+    swap.token_prices.clear()
+    return state
+
+def get_quote() -> swap.QuoteInformation:
+    return asyncio.run(swap.get_quote(WETH, 18, "WETH", USDC, 6, "USDC", ChainId.MAINNET, Decimal(1), False, SENDER))
+
+def test_quote_is_reused_while_price_is_within_slippage(lifi):
+    get_quote()
+    # Output drops by 0.3%, less than the 0.5% between toAmount and toAmountMin
+    swap.token_prices.set((1, WETH.hex), 2991.0)
+
+    get_quote()
+
+    assert lifi["quotes"] == 1
+
+def test_quote_is_refetched_when_price_moved_beyond_slippage(lifi):
+    get_quote()
+    swap.token_prices.set((1, WETH.hex), 2980.0)
+    lifi["weth_price"] = "2980"
+
+    quote = get_quote()
+
+    assert lifi["quotes"] == 2
+    assert quote.price_ratio == 2980
+
+def test_quote_is_refetched_without_prices(lifi):
+    get_quote()
+    swap.token_prices.clear()
+
+    get_quote()
+
+    assert lifi["quotes"] == 2
+
+def test_quote_expires(lifi, monkeypatch):
+    get_quote()
+    now = time.time()
+    monkeypatch.setattr("autotx.utils.ethereum.lifi.swap.time.time", lambda: now + swap.QUOTE_TTL_SEC + 1)
+
+    get_quote()
+
+    assert lifi["quotes"] == 2
+
+def test_malformed_price_does_not_fail_the_quote(lifi):
+    lifi["weth_price"] = "not a price"
+
+    quote = get_quote()
+
+    assert quote.price_ratio is None
+    assert swap.token_prices.get((1, WETH.hex)) is None
+    # Without a price the quote can't be checked, so it isn't reused
+    get_quote()
+    assert lifi["quotes"] == 2
+
+def test_stored_quote_is_not_shared(lifi):
+    quote = get_quote()
+    quote.transaction["gas"] = 1
+
+    reused = get_quote()
+    reused.transaction["nonce"] = 5
+
+    assert lifi["quotes"] == 1
+    assert reused.transaction["gas"] == "0x5208"
+    assert "nonce" not in get_quote().transaction
@@ -0,0 +1,43 @@
+import pytest
+
+from autotx.utils.ethereum.networks import NetworkInfo, TokensOverlay, get_chain_tokens, ChainId
+
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+TOKEN = "0x1111111111111111111111111111111111111111"
+
+def test_network_infos_share_the_tokens_of_a_chain() -> None:
+    first = NetworkInfo(1)
+    second = NetworkInfo(1)
+
+    assert isinstance(first.tokens, TokensOverlay) and isinstance(second.tokens, TokensOverlay)
+    assert first.tokens.base is second.tokens.base is get_chain_tokens(ChainId.MAINNET)
+    assert first.tokens["usdc"] == USDC
+    assert get_chain_tokens(ChainId.OPTIMISM) is not get_chain_tokens(ChainId.MAINNET)
+
+def test_added_tokens_stay_local_to_the_network_info() -> None:
+    network = NetworkInfo(1)
+    other = NetworkInfo(1)
+
+    network.tokens["new-token"] = TOKEN
+    network.tokens["usdc"] = TOKEN
+
+    assert network.tokens["new-token"] == TOKEN and network.tokens["usdc"] == TOKEN
+    assert "new-token" not in other.tokens
+    assert other.tokens["usdc"] == USDC
+    assert "new-token" not in get_chain_tokens(ChainId.MAINNET)
+
+def test_overlay_removes_tokens_locally() -> None:
+    tokens = TokensOverlay({ "usdc": USDC, "dai": TOKEN })
+    tokens["weth"] = TOKEN
+
+    del tokens["usdc"]
+    del tokens["weth"]
+
+    assert "usdc" not in tokens and "weth" not in tokens
+    assert list(tokens) == ["dai"] and len(tokens) == 1
+    with pytest.raises(KeyError):
+        del tokens["usdc"]
+
+    tokens["usdc"] = TOKEN
+    assert dict(tokens) == { "dai": TOKEN, "usdc": TOKEN }
+    assert tokens.base == { "usdc": USDC, "dai": TOKEN }
@@ -0,0 +1,128 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+from threading import Thread
+import time
+from typing import Any
+
+from hexbytes import HexBytes
+import pytest
+from web3 import HTTPProvider, Web3
+from web3.exceptions import TimeExhausted
+
+from autotx.utils.ethereum.receipt_tracker import ReceiptTracker
+
+TX_HASHES = [HexBytes(bytes([i + 1]) * 32) for i in range(3)]
+
+def build_receipt(tx_hash: str) -> dict[str, Any]:
+    return {
+        "transactionHash": tx_hash,
+        "blockHash": "0x" + "11" * 32,
+        "blockNumber": "0x5",
+        "transactionIndex": "0x0",
+        "from": "0x" + "22" * 20,
+        "to": "0x" + "33" * 20,
+        "cumulativeGasUsed": "0x5208",
+        "gasUsed": "0x5208",
+        "effectiveGasPrice": "0x1",
+        "contractAddress": None,
+        "logs": [],
+        "logsBloom": "0x" + "00" * 256,
+        "status": "0x1",
+        "type": "0x0",
+    }
+
+class FakeNode:
+    def __init__(self) -> None:
+        self.mined: set[str] = set()
+        self.batches: list[list[str]] = []
+
+class FakeNodeHandler(BaseHTTPRequestHandler):
+    node: FakeNode
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(request, dict):
+            # EthereumClient reads the chain id when it's created
+            response: Any = { "jsonrpc": "2.0", "id": request["id"], "result": "0x1" }
+        else:
+            self.node.batches.append([query["params"][0] for query in request])
+            response = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": query["id"],
+                    "result": build_receipt(query["params"][0]) if query["params"][0] in self.node.mined else None,
+                }
+                for query in request
+            ]
+
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+@pytest.fixture()
+def node():
+    node = FakeNode()
+    handler = type("Handler", (FakeNodeHandler,), { "node": node })
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    node.url = f"http://127.0.0.1:{server.server_port}"
+    yield node
+    server.shutdown()
+    server.server_close()
+
+def mine_later(node: FakeNode, tx_hash: HexBytes, delay: float) -> None:
+    def mine() -> None:
+        time.sleep(delay)
+        node.mined.add(tx_hash.hex())
+    Thread(target=mine, daemon=True).start()
+
+def test_receipts_are_fetched_in_batches(node):
+    tracker = ReceiptTracker(Web3(HTTPProvider(node.url)))
+    mine_later(node, TX_HASHES[2], 0)
+    mine_later(node, TX_HASHES[1], 0.6)
+    mine_later(node, TX_HASHES[0], 1.2)
+
+    receipts = tracker.wait_all(TX_HASHES, 10)
+
+    # Receipts come back in the order of the hashes, whatever order they were mined in
+    assert [receipt["transactionHash"] for receipt in receipts] == TX_HASHES
+    assert node.batches[0] == [tx_hash.hex() for tx_hash in TX_HASHES]
+    # Mined transactions are not fetched again
+    assert TX_HASHES[2].hex() not in node.batches[-1]
+    assert tracker.pending == {}
+
+def test_async_wait(node):
+    tracker = ReceiptTracker(Web3(HTTPProvider(node.url)))
+    node.mined.update(tx_hash.hex() for tx_hash in TX_HASHES[:2])
+
+    receipts = asyncio.run(tracker.a_wait_all(TX_HASHES[:2], 10))
+
+    assert [receipt["transactionHash"] for receipt in receipts] == TX_HASHES[:2]
+
+def test_timeout_applies_to_the_whole_batch(node):
+    tracker = ReceiptTracker(Web3(HTTPProvider(node.url)))
+    # Waiting for the first receipt uses up most of the timeout
+    mine_later(node, TX_HASHES[0], 0.2)
+
+    started_at = time.monotonic()
+    with pytest.raises(TimeExhausted) as error:
+        tracker.wait_all(TX_HASHES, 1)
+
+    assert time.monotonic() - started_at < 1.3
+    assert TX_HASHES[0].hex() not in str(error.value)
+    assert TX_HASHES[1].hex() in str(error.value) and TX_HASHES[2].hex() in str(error.value)
+    assert tracker.pending == {}
+
+def test_async_timeout(node):
+    tracker = ReceiptTracker(Web3(HTTPProvider(node.url)))
+
+    with pytest.raises(TimeExhausted):
+        asyncio.run(tracker.a_wait_all(TX_HASHES[:1], 0.5))
+    assert tracker.pending == {}
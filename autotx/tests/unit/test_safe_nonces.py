@@ -0,0 +1,138 @@
+from gnosis.safe.api.base_api import SafeAPIException
+import pytest
+
+from autotx.utils.ethereum.safe_nonces import SafeNonceAllocator, LocalSafeNonceStore
+from autotx.utils.ethereum.transaction_service import SafeTransactionsNotPosted, post_safe_transactions
+
+SAFE = "0xAbC0000000000000000000000000000000000001"
+TTL_SEC = 600
+
+@pytest.fixture()
+def now(monkeypatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr("autotx.utils.ethereum.safe_nonces.time.monotonic", lambda: now[0])
+    return now
+
+def test_reservations_are_consecutive(now):
+    store = LocalSafeNonceStore()
+
+    assert store.reserve(1, SAFE, 3, 5, TTL_SEC) == 5
+    assert store.reserve(1, SAFE, 1, 5, TTL_SEC) == 8
+    # Nonces used on chain or queued in the transaction service are skipped
+    assert store.reserve(1, SAFE, 1, 20, TTL_SEC) == 20
+    # Other chains and Safes have their own nonces
+    assert store.reserve(2, SAFE, 1, 0, TTL_SEC) == 0
+
+def test_latest_reservation_is_released(now):
+    store = LocalSafeNonceStore()
+    store.reserve(1, SAFE, 2, 0, TTL_SEC)
+
+    assert store.release(1, SAFE, 0, 2)
+    assert store.reserve(1, SAFE, 1, 0, TTL_SEC) == 0
+
+    # Releasing the end of a reservation keeps the start of it reserved
+    store.reserve(1, SAFE, 2, 0, TTL_SEC)
+    assert store.release(1, SAFE, 2, 1)
+    assert store.reserve(1, SAFE, 1, 0, TTL_SEC) == 2
+    assert store.reserve(1, SAFE, 1, 0, TTL_SEC) == 3
+
+def test_declined_reservation_before_a_later_one_is_refilled(now):
+    store = LocalSafeNonceStore()
+    assert store.reserve(1, SAFE, 2, 5, TTL_SEC) == 5
+    assert store.reserve(1, SAFE, 1, 5, TTL_SEC) == 7
+
+    # The first proposal is declined, the gap before nonce 7 is filled by the next reservations that fit in it
+    assert store.release(1, SAFE, 5, 2)
+    assert store.reserve(1, SAFE, 3, 5, TTL_SEC) == 8
+    assert store.reserve(1, SAFE, 1, 5, TTL_SEC) == 5
+    assert store.reserve(1, SAFE, 1, 5, TTL_SEC) == 6
+    assert store.reserve(1, SAFE, 1, 5, TTL_SEC) == 11
+
+def test_released_ranges_are_merged(now):
+    store = LocalSafeNonceStore()
+    for _ in range(4):
+        store.reserve(1, SAFE, 1, 0, TTL_SEC)
+
+    assert store.release(1, SAFE, 0, 1)
+    assert store.release(1, SAFE, 2, 1)
+    assert store.release(1, SAFE, 1, 1)
+    # Nonces can't be released twice
+    assert not store.release(1, SAFE, 1, 1)
+    # Nor before they are reserved
+    assert not store.release(1, SAFE, 4, 1)
+    assert store.reserve(1, SAFE, 3, 0, TTL_SEC) == 0
+
+    # Released nonces at the end of the reservations are handed out after the latest one again
+    assert store.release(1, SAFE, 1, 1)
+    assert store.release(1, SAFE, 2, 2)
+    assert store.reserve(1, SAFE, 3, 0, TTL_SEC) == 1
+
+def test_released_nonces_below_min_nonce_are_dropped(now):
+    store = LocalSafeNonceStore()
+    store.reserve(1, SAFE, 4, 0, TTL_SEC)
+    store.reserve(1, SAFE, 1, 0, TTL_SEC)
+    store.release(1, SAFE, 0, 4)
+
+    # Nonces 0 and 1 were used on chain in the meantime
+    assert store.reserve(1, SAFE, 1, 2, TTL_SEC) == 2
+    assert store.reserve(1, SAFE, 2, 2, TTL_SEC) == 5
+
+def test_expired_reservations_are_dropped(now):
+    store = LocalSafeNonceStore()
+    store.reserve(1, SAFE, 5, 0, TTL_SEC)
+
+    now[0] += TTL_SEC - 1
+    assert store.reserve(1, SAFE, 1, 0, TTL_SEC) == 5
+
+    now[0] += TTL_SEC + 1
+    assert store.reserve(1, SAFE, 1, 2, TTL_SEC) == 2
+
+def test_allocator_caches_min_nonce():
+    allocator = SafeNonceAllocator(LocalSafeNonceStore())
+    reads: list[int] = []
+
+    def get_min_nonce() -> int:
+        reads.append(len(reads))
+        return 10
+
+    assert allocator.reserve(1, SAFE, 1, get_min_nonce) == 10
+    # Addresses are keyed case-insensitively
+    assert allocator.reserve(1, SAFE.lower(), 1, get_min_nonce) == 11
+    assert len(reads) == 1
+
+    assert allocator.release(1, SAFE, 11, 1)
+    allocator.reconcile(1, SAFE)
+    assert allocator.reserve(1, SAFE, 1, lambda: 15) == 15
+
+class FakeSafeTx:
+    def __init__(self, safe_tx_hash: str, fail: bool):
+        self.safe_tx_hash = safe_tx_hash
+        self.fail = fail
+
+class FakeTransactionServiceApi:
+    def __init__(self) -> None:
+        self.posted: list[str] = []
+
+    def post_transaction(self, safe_tx: FakeSafeTx) -> None:
+        if safe_tx.fail:
+            raise SafeAPIException("Invalid transaction")
+        self.posted.append(safe_tx.safe_tx_hash)
+
+    def get_safe_transaction(self, safe_tx_hash: str) -> None:
+        if safe_tx_hash not in self.posted:
+            raise SafeAPIException("Not found")
+
+def test_post_safe_transactions_reports_posted():
+    ts_api = FakeTransactionServiceApi()
+    safe_txs = [FakeSafeTx("a", False), FakeSafeTx("b", True), FakeSafeTx("c", False)]
+
+    with pytest.raises(SafeTransactionsNotPosted) as error:
+        post_safe_transactions(ts_api, safe_txs)
+
+    assert error.value.posted == [True, False, True]
+    assert isinstance(error.value.error, SafeAPIException)
+    assert sorted(ts_api.posted) == ["a", "c"]
+
+    with pytest.raises(SafeTransactionsNotPosted) as error:
+        post_safe_transactions(ts_api, [FakeSafeTx("d", True)])
+    assert error.value.posted == [False]
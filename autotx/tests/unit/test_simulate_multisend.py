@@ -0,0 +1,211 @@
+from typing import Any
+
+from eth_abi.abi import encode
+from fastapi.testclient import TestClient
+from hexbytes import HexBytes
+import pytest
+from web3 import Web3
+
+from autotx import models, server
+from autotx.token import Token
+from autotx.transactions import SendTransaction, TransactionType
+from autotx.utils.ethereum.simulate_multisend import (
+    MultisendRevert,
+    decode_revert_reason,
+    find_multisend_revert,
+    find_revert_in_trace,
+    simulate_multisend_prefixes,
+)
+
+SAFE = "0x1111111111111111111111111111111111111111"
+MULTISEND = "0x40A2aCCbd92BCA938b02010E17A5b8929b49130D"
+TO = "0x2222222222222222222222222222222222222222"
+
+def error_data(reason: str) -> str:
+    return "0x08c379a0" + encode(["string"], [reason]).hex()
+
+def simulation_revert(success: bool, return_data: str = "0x") -> str:
+    data = HexBytes(return_data)
+    return "0x" + (int(success).to_bytes(32, "big") + len(data).to_bytes(32, "big") + data).hex().removeprefix("0x")
+
+class FakeResponse:
+    def __init__(self, body: Any, ok: bool = True):
+        self.body = body
+        self.ok = ok
+
+    def json(self) -> Any:
+        return self.body
+
+class FakeClient:
+    ethereum_node_url = "http://node.test"
+
+    def __init__(self, respond):
+        self.w3 = Web3()
+        self.http_session = self
+        self.respond = respond
+        self.requests: list[Any] = []
+
+    def post(self, url: str, json: Any, timeout: int) -> FakeResponse:
+        self.requests.append(json)
+        return self.respond(json)
+
+def txs(count: int) -> list[dict[str, Any]]:
+    return [{ "to": TO, "value": 0, "data": bytes([i]) } for i in range(count)]
+
+def test_decode_revert_reason() -> None:
+    assert decode_revert_reason(error_data("Insufficient allowance")) == "Insufficient allowance"
+    assert decode_revert_reason("0x4e487b71" + encode(["uint256"], [17]).hex()) == "Panic(17)"
+    assert decode_revert_reason(None) is None
+    assert decode_revert_reason("0x") is None
+    # Custom errors are returned as hex
+    assert decode_revert_reason("0xdeadbeef") == "0xdeadbeef"
+
+def test_revert_is_found_in_the_multisend_frame_of_the_trace() -> None:
+    trace = {
+        "type": "CALL",
+        "to": SAFE,
+        "error": "execution reverted",
+        "calls": [{
+            "type": "DELEGATECALL",
+            "to": MULTISEND.lower(),
+            "error": "execution reverted",
+            "calls": [
+                { "type": "CALL", "to": TO },
+                { "type": "CALL", "to": TO, "error": "execution reverted", "output": error_data("Insufficient balance") },
+                { "type": "CALL", "to": TO, "error": "execution reverted", "revertReason": "Not reached" },
+            ],
+        }],
+    }
+
+    assert find_revert_in_trace(trace, MULTISEND) == MultisendRevert(1, "Insufficient balance")
+
+def test_trace_prefers_the_tracer_revert_reason() -> None:
+    trace = {
+        "type": "DELEGATECALL",
+        "to": MULTISEND,
+        "calls": [{ "type": "CALL", "to": TO, "error": "execution reverted", "revertReason": "Paused", "output": "0x" }],
+    }
+
+    assert find_revert_in_trace(trace, MULTISEND) == MultisendRevert(0, "Paused")
+
+def test_trace_without_reverts() -> None:
+    trace = { "type": "DELEGATECALL", "to": MULTISEND, "calls": [{ "type": "CALL", "to": TO }] }
+
+    assert find_revert_in_trace(trace, MULTISEND) is None
+    assert find_revert_in_trace({ "type": "CALL", "to": SAFE }, MULTISEND) is None
+
+def respond_to_prefixes(prefix_results: list[str], direct_results: list[dict[str, Any]]):
+    def respond(queries: list[dict[str, Any]]) -> FakeResponse:
+        count = len(prefix_results)
+        return FakeResponse([
+            { "jsonrpc": "2.0", "id": query["id"], "error": { "message": "execution reverted", "data": prefix_results[query["id"]] } }
+            if query["id"] < count
+            else { "jsonrpc": "2.0", "id": query["id"], **direct_results[query["id"] - count] }
+            for query in queries
+        ])
+    return respond
+
+def test_prefixes_use_the_revert_data_passed_on_by_the_multisend() -> None:
+    client = FakeClient(respond_to_prefixes(
+        [simulation_revert(True), simulation_revert(False, error_data("Slippage too high")), simulation_revert(False)],
+        [{ "result": "0x" }, { "error": { "data": error_data("Other reason") } }, { "result": "0x" }],
+    ))
+
+    revert = simulate_multisend_prefixes(client, SAFE, MULTISEND, txs(3)) # type: ignore
+
+    assert revert == MultisendRevert(1, "Slippage too high")
+    assert revert.describe() == "Slippage too high"
+    # Every prefix and every direct call in one batch request
+    assert len(client.requests) == 1 and len(client.requests[0]) == 6
+
+def test_prefixes_guess_the_reason_from_the_direct_call() -> None:
+    client = FakeClient(respond_to_prefixes(
+        [simulation_revert(True), simulation_revert(False)],
+        [{ "result": "0x" }, { "error": { "data": error_data("Insufficient allowance") } }],
+    ))
+
+    revert = simulate_multisend_prefixes(client, SAFE, MULTISEND, txs(2)) # type: ignore
+
+    assert revert == MultisendRevert(1, "Insufficient allowance", guessed=True)
+    assert revert.describe() == "possibly Insufficient allowance"
+
+def test_prefixes_without_any_reason() -> None:
+    client = FakeClient(respond_to_prefixes([simulation_revert(False)], [{ "result": "0x" }]))
+
+    assert simulate_multisend_prefixes(client, SAFE, MULTISEND, txs(1)) == MultisendRevert(0, "execution reverted") # type: ignore
+
+def test_prefixes_of_a_succeeding_batch() -> None:
+    client = FakeClient(respond_to_prefixes([simulation_revert(True)] * 2, [{ "result": "0x" }] * 2))
+
+    assert simulate_multisend_prefixes(client, SAFE, MULTISEND, txs(2)) is None # type: ignore
+
+def test_prefixes_are_simulated_when_the_node_has_no_tracer() -> None:
+    prefixes = respond_to_prefixes([simulation_revert(False, error_data("Expired"))], [{ "result": "0x" }])
+
+    def respond(payload: Any) -> FakeResponse:
+        if isinstance(payload, dict) and payload["method"] == "debug_traceCall":
+            return FakeResponse({ "jsonrpc": "2.0", "id": 1, "error": { "message": "the method debug_traceCall does not exist" } })
+        return prefixes(payload)
+
+    client = FakeClient(respond)
+
+    assert find_multisend_revert(client, SAFE, txs(1), MULTISEND) == MultisendRevert(0, "Expired") # type: ignore
+    assert len(client.requests) == 2
+
+@pytest.fixture()
+def prepare(monkeypatch) -> dict[str, Any]:
+    recorded: dict[str, Any] = { "errors": [], "saved": [], "revert": None }
+    task = models.Task(
+        id="task-1", prompt="Send", address=SAFE, chain_id=1, created_at="2026-01-01T00:00:00", updated_at="2026-01-01T00:00:00",
+        running=False, status=models.TaskStatus.COMPLETED, error=None, messages=[], logs=[], intents=[], previous_task_id=None, feedback=None,
+    )
+    transaction = SendTransaction(
+        type=TransactionType.SEND, token=Token(symbol="ETH", address=TO), amount=1, receiver=TO,
+        params={ "to": TO, "value": 10**18, "data": "0x" }, summary="Transfer 1 ETH",
+    )
+
+    async def a_authorize_app_and_user(authorization: str | None, user_id: str) -> Any:
+        return (models.App(id="app-1", name="App", api_key="key-1", allowed=True), type("AppUser", (), { "id": "user-1", "user_id": user_id }))
+
+    async def build_transactions(*args: Any) -> list[Any]:
+        return [transaction]
+
+    class FakeTasks:
+        def __init__(self, app_id: str):
+            pass
+
+        def get(self, task_id: str) -> models.Task:
+            return task
+
+    monkeypatch.setattr(server, "a_authorize_app_and_user", a_authorize_app_and_user)
+    monkeypatch.setattr(server.db, "TasksRepository", FakeTasks)
+    monkeypatch.setattr(server, "build_transactions", build_transactions)
+    monkeypatch.setattr(server, "AppConfig", lambda subsidized_chain_id: type("AppConfig", (), { "web3": None }))
+    monkeypatch.setattr(server, "get_ethereum_client", lambda web3: None)
+    monkeypatch.setattr(server, "find_multisend_revert", lambda client, address, params: recorded["revert"])
+    monkeypatch.setattr(server.db, "add_task_error", lambda *args: recorded["errors"].append(args))
+    monkeypatch.setattr(server.db, "save_transactions", lambda *args: recorded["saved"].append(args) or "batch-1")
+    return recorded
+
+def post_prepare() -> Any:
+    return TestClient(server.app).post(
+        "/api/v1/tasks/task-1/transactions/prepare",
+        params={ "address": SAFE, "chain_id": 1, "user_id": "alice" },
+        headers={ "Authorization": "Bearer key-1" },
+    )
+
+def test_batch_that_would_revert_is_rejected_without_a_task_error(prepare: dict[str, Any]) -> None:
+    prepare["revert"] = MultisendRevert(0, "Insufficient balance", guessed=True)
+
+    response = post_prepare()
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Transfer 1 ETH would fail: possibly Insufficient balance"
+    assert prepare["errors"] == [] and prepare["saved"] == []
+
+def test_batch_that_succeeds_is_saved(prepare: dict[str, Any]) -> None:
+    response = post_prepare()
+
+    assert response.status_code == 200
+    assert response.json()["batch_id"] == "batch-1"
+    assert len(prepare["saved"]) == 1
@@ -0,0 +1,82 @@
+from typing import Any
+
+import pytest
+
+from autotx import db
+from autotx.intents import BuyIntent, SendIntent
+
+RECEIVER = "0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045"
+ETH = { "symbol": "ETH", "address": "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE" }
+USDC = { "symbol": "USDC", "address": "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48" }
+
+class FakeRPC:
+    def __init__(self, rows: list[dict[str, Any]]):
+        self.rows = rows
+
+    def execute(self) -> Any:
+        return type("Response", (), { "data": self.rows })
+
+class FakeClient:
+    def __init__(self, rows: list[dict[str, Any]]):
+        self.rows = rows
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    def rpc(self, name: str, params: dict[str, Any]) -> FakeRPC:
+        self.calls.append((name, params))
+        return FakeRPC(self.rows)
+
+def chain_row(task_id: str, previous_task_id: str | None, depth: int, intents: list[dict[str, Any]], feedback: str | None) -> dict[str, Any]:
+    return {
+        "id": task_id,
+        "previous_task_id": previous_task_id,
+        "prompt": f"prompt of {task_id}",
+        "intents": intents,
+        "feedback": feedback,
+        "depth": depth,
+    }
+
+@pytest.fixture()
+def client(monkeypatch) -> FakeClient:
+    client = FakeClient([
+        chain_row("task-3", "task-2", 0, [], None),
+        chain_row("task-2", "task-1", 1, [
+            { "type": "buy", "summary": "Buy 10 USDC with ETH", "from_token": ETH, "to_token": USDC, "amount": 10 },
+        ], "Buy more"),
+        chain_row("task-1", None, 2, [
+            { "type": "send", "summary": f"Transfer 1 ETH to {RECEIVER}", "token": ETH, "amount": 1, "receiver": RECEIVER },
+        ], "Also buy USDC"),
+    ])
+    monkeypatch.setattr(db, "get_db_client", lambda schema: client)
+    return client
+
+def test_task_chain_is_read_with_one_rpc(client: FakeClient) -> None:
+    db.TasksRepository("app-1").get_chain("task-3")
+
+    assert client.calls == [("get_task_chain", { "p_task_id": "task-3", "p_app_id": "app-1" })]
+
+def test_task_chain_is_returned_newest_first(client: FakeClient) -> None:
+    chain = db.TasksRepository("app-1").get_chain("task-3")
+
+    assert [(entry.id, entry.previous_task_id) for entry in chain] == [
+        ("task-3", "task-2"),
+        ("task-2", "task-1"),
+        ("task-1", None),
+    ]
+    assert [entry.feedback for entry in chain] == [None, "Buy more", "Also buy USDC"]
+    assert chain[0].prompt == "prompt of task-3"
+
+def test_task_chain_loads_intents(client: FakeClient) -> None:
+    chain = db.TasksRepository("app-1").get_chain("task-3")
+
+    assert chain[0].intents == []
+    buy = chain[1].intents[0]
+    assert isinstance(buy, BuyIntent)
+    assert (buy.from_token.symbol, buy.to_token.symbol, buy.amount) == ("ETH", "USDC", 10)
+    send = chain[2].intents[0]
+    assert isinstance(send, SendIntent)
+    assert (send.receiver, send.amount) == (RECEIVER, 1)
+
+def test_unknown_task_has_an_empty_chain(client: FakeClient) -> None:
+    client.rows = []
+
+    assert db.TasksRepository("app-1").get_chain("missing") == []
@@ -0,0 +1,43 @@
+import base64
+import json
+
+import pytest
+
+from autotx.utils.task_cursor import InvalidCursor, decode_task_cursor, encode_task_cursor
+
+TASK_ID = "5f0c6a3e-1b2d-4c8e-9f7a-2d3b4c5e6f70"
+
+def test_cursor_round_trip():
+    created_at = "2026-10-18T12:00:00.123456+00:00"
+
+    assert decode_task_cursor(encode_task_cursor(created_at, TASK_ID)) == (created_at, TASK_ID)
+
+def test_cursor_normalizes_values():
+    cursor = encode_task_cursor("2026-10-18 12:00:00+00:00", TASK_ID.upper())
+
+    assert decode_task_cursor(cursor) == ("2026-10-18T12:00:00+00:00", TASK_ID)
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(json.dumps(["2026-10-18T12:00:00+00:00"]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["yesterday", TASK_ID]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["2026-10-18T12:00:00+00:00", "1 or 1=1"]).encode()).decode(),
+    # Values are interpolated in the PostgREST filter, they must not be able to change it
+    base64.urlsafe_b64encode(json.dumps(["2026-10-18T12:00:00+00:00\",id.gt.0", TASK_ID]).encode()).decode(),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_task_cursor(cursor)
+
+@pytest.mark.parametrize("created_at", [
+    "2026-10-18T12:00:00.1+00:00",
+    "2026-10-18T12:00:00.10000+00:00",
+    "2026-10-18T12:00:00.100000+00:00",
+    "2026-10-18T12:00:00.1",
+])
+def test_cursor_accepts_short_fractions(created_at):
+    (decoded, _) = decode_task_cursor(encode_task_cursor(created_at, TASK_ID))
+
+    assert decoded.startswith("2026-10-18T12:00:00.100000")
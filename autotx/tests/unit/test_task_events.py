@@ -0,0 +1,116 @@
+import asyncio
+from typing import Any
+
+from fastapi.testclient import TestClient
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from autotx import models, server, task_events
+from autotx.task_events import stream_task_events
+
+class FakeTasks:
+    def __init__(self, status: models.TaskStatus, messages: list[str]):
+        self.status = status
+        self.messages = messages
+        self.reads: list[str] = []
+
+    def get_status(self, task_id: str) -> models.TaskStatus | None:
+        self.reads.append("status")
+        return self.status
+
+    def get_messages(self, task_id: str, offset: int = 0) -> list[str]:
+        self.reads.append("messages")
+        return self.messages[offset:]
+
+    def get_logs(self, task_id: str, offset: int = 0) -> list[models.TaskLog]:
+        self.reads.append("logs")
+        return []
+
+async def collect(tasks: FakeTasks, count: int, on_keep_alive: Any = None) -> list[models.TaskEvent | None]:
+    collected: list[models.TaskEvent | None] = []
+    events = stream_task_events(tasks, "task-1") # type: ignore
+    try:
+        async for event in events:
+            collected.append(event)
+            if event is None and on_keep_alive:
+                on_keep_alive(collected.count(None))
+            if len(collected) >= count:
+                break
+    finally:
+        await events.aclose()
+    return collected
+
+@pytest.fixture()
+def fast_polling(monkeypatch) -> None:
+    monkeypatch.setattr(task_events, "STREAM_POLL_INTERVAL_SEC", 0.01)
+    monkeypatch.setattr(task_events, "STREAM_MAX_POLL_INTERVAL_SEC", 0.04)
+
+def test_finished_task_is_replayed_from_the_database() -> None:
+    tasks = FakeTasks(models.TaskStatus.COMPLETED, ["first", "second"])
+
+    events = asyncio.run(collect(tasks, 10))
+
+    assert [(event.type, event.data) for event in events if event] == [
+        ("message", "first"),
+        ("message", "second"),
+        ("status", "completed"),
+    ]
+
+def test_queued_task_only_reads_its_status(fast_polling: None) -> None:
+    tasks = FakeTasks(models.TaskStatus.QUEUED, [])
+
+    events = asyncio.run(collect(tasks, 5))
+
+    assert events == [None] * 5
+    assert set(tasks.reads) == {"status"}
+
+def test_database_reads_back_off_while_nothing_changes(fast_polling: None) -> None:
+    tasks = FakeTasks(models.TaskStatus.RUNNING, [])
+
+    events = asyncio.run(collect(tasks, 30))
+
+    assert events == [None] * 30
+    # One read per keep-alive without backing off
+    assert tasks.reads.count("status") < 15
+
+def test_messages_written_by_another_process_are_streamed(fast_polling: None) -> None:
+    tasks = FakeTasks(models.TaskStatus.RUNNING, [])
+
+    def write(keep_alives: int) -> None:
+        if keep_alives == 3:
+            tasks.messages.append("from another process")
+        if keep_alives == 6:
+            tasks.status = models.TaskStatus.COMPLETED
+
+    events = asyncio.run(collect(tasks, 100, write))
+
+    assert [(event.type, event.data) for event in events if event] == [
+        ("message", "from another process"),
+        ("status", "completed"),
+    ]
+
+@pytest.fixture()
+def client(monkeypatch) -> TestClient:
+    async def a_get_app_by_api_key(api_key: str) -> models.App | None:
+        return models.App(id="app-1", name="App", api_key=api_key, allowed=True) if api_key == "key-1" else None
+
+    monkeypatch.setattr(server.db, "a_get_app_by_api_key", a_get_app_by_api_key)
+    monkeypatch.setattr(server.db, "TasksRepository", lambda app_id: FakeTasks(models.TaskStatus.COMPLETED, ["done"]))
+    return TestClient(server.app)
+
+def test_websocket_authorizes_with_the_header(client: TestClient) -> None:
+    with client.websocket_connect("/api/v1/tasks/task-1/ws", headers={ "Authorization": "Bearer key-1" }) as websocket:
+        assert websocket.receive_json()["data"] == "done"
+        assert websocket.receive_json()["data"] == "completed"
+
+def test_websocket_authorizes_with_the_first_message(client: TestClient) -> None:
+    with client.websocket_connect("/api/v1/tasks/task-1/ws") as websocket:
+        websocket.send_json({ "authorization": "Bearer key-1" })
+        assert websocket.receive_json()["data"] == "done"
+
+def test_websocket_rejects_an_invalid_api_key(client: TestClient) -> None:
+    with client.websocket_connect("/api/v1/tasks/task-1/ws") as websocket:
+        websocket.send_json({ "authorization": "Bearer wrong" })
+        with pytest.raises(WebSocketDisconnect) as error:
+            websocket.receive_json()
+        assert error.value.code == 1008
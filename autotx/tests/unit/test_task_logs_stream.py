@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+import json
+from typing import Any
+
+from fastapi.testclient import TestClient
+import pytest
+
+from autotx import db, server
+
+CREATED_AT = datetime(2026, 1, 1)
+
+class FakeQuery:
+    def __init__(self, client: "FakeClient"):
+        self.client = client
+        self.rows = client.logs
+        self.offset = 0
+        self.limit = 0
+
+    def select(self, columns: str) -> "FakeQuery":
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [row for row in self.rows if row[column] == value]
+        return self
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [row for row in self.rows if row[column] > value]
+        return self
+
+    def order(self, column: str) -> "FakeQuery":
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        (self.offset, self.limit) = (start, end - start + 1)
+        return self
+
+    def execute(self) -> Any:
+        self.client.pages.append((self.offset, self.limit))
+        return type("Response", (), { "data": self.rows[self.offset:self.offset + self.limit] })
+
+class FakeClient:
+    def __init__(self, logs: list[dict[str, Any]]):
+        self.logs = logs
+        self.pages: list[tuple[int, int]] = []
+
+    def table(self, table: str) -> FakeQuery:
+        return FakeQuery(self)
+
+def execution_log(i: int) -> dict[str, Any]:
+    return {
+        "task_id": "task-1",
+        "type": "execution",
+        "obj": json.dumps(f"step {i}"),
+        "created_at": (CREATED_AT + timedelta(minutes=i)).isoformat(),
+    }
+
+@pytest.fixture()
+def logs_client(monkeypatch) -> FakeClient:
+    logs_client = FakeClient([execution_log(i) for i in range(5)])
+
+    async def a_task_exists(task_id: str) -> bool:
+        return task_id == "task-1"
+
+    monkeypatch.setattr(db, "get_db_client", lambda schema: logs_client)
+    monkeypatch.setattr(db, "a_task_exists", a_task_exists)
+    monkeypatch.setattr(server, "TASK_LOGS_PAGE_SIZE", 2)
+    return logs_client
+
+def get_logs(params: dict[str, Any] = {}, task_id: str = "task-1", log_type: str = "execution") -> Any:
+    return TestClient(server.app).get(f"/api/v1/tasks/{task_id}/logs/{log_type}", params=params)
+
+def rendered_steps(text: str) -> list[str]:
+    assert text.startswith("<pre>") and text.endswith("</pre>")
+    return [line.split(": ", 1)[1] for line in text[len("<pre>"):-len("</pre>")].split("\n")]
+
+def test_logs_are_rendered_a_page_at_a_time(logs_client: FakeClient) -> None:
+    response = get_logs()
+
+    assert response.status_code == 200
+    assert rendered_steps(response.text) == [f"step {i}" for i in range(5)]
+    assert logs_client.pages == [(0, 2), (2, 2), (4, 2)]
+
+def test_logs_since_a_time(logs_client: FakeClient) -> None:
+    response = get_logs({ "since": (CREATED_AT + timedelta(minutes=2)).isoformat() })
+
+    assert rendered_steps(response.text) == ["step 3", "step 4"]
+
+def test_logs_up_to_a_limit(logs_client: FakeClient) -> None:
+    response = get_logs({ "limit": 3 })
+
+    assert rendered_steps(response.text) == ["step 0", "step 1", "step 2"]
+    # The last page only asks for what is left of the limit
+    assert logs_client.pages == [(0, 2), (2, 1)]
+
+def test_logs_since_and_limit(logs_client: FakeClient) -> None:
+    response = get_logs({ "since": CREATED_AT.isoformat(), "limit": 2 })
+
+    assert rendered_steps(response.text) == ["step 1", "step 2"]
+
+def test_no_logs_found(logs_client: FakeClient) -> None:
+    response = get_logs({ "since": (CREATED_AT + timedelta(days=1)).isoformat() })
+
+    assert response.text == "<pre>No logs found</pre>"
+
+def test_invalid_requests(logs_client: FakeClient) -> None:
+    assert get_logs(log_type="debug").status_code == 400
+    assert get_logs(task_id="missing").status_code == 404
+    assert get_logs({ "limit": 0 }).status_code == 422
@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+from threading import Event, Lock
+import time
+
+from autotx import models
+from autotx.task_queue import LocalTaskQueue
+from autotx.task_worker_pool import TaskWorkerPool
+
+def queued_task(task_id: str, app_id: str = "app", app_user_id: str = "user", attempts: int = 0) -> models.QueuedTask:
+    return models.QueuedTask(task_id=task_id, app_id=app_id, app_user_id=app_user_id, enqueued_at=datetime.now(timezone.utc), attempts=attempts)
+
+def wait_until(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise Exception("Condition was not met in time")
+        time.sleep(0.01)
+
+def test_claim_in_order_and_skip_excluded():
+    queue = LocalTaskQueue()
+    queue.enqueue(queued_task("1", app_id="a"))
+    queue.enqueue(queued_task("2", app_id="b", app_user_id="u2"))
+    queue.enqueue(queued_task("3", app_id="b", app_user_id="u3"))
+
+    assert queue.claim("w", 60, ["a"], ["u2"]).task_id == "3"
+    assert queue.claim("w", 60, [], []).task_id == "1"
+    assert queue.depth() == 1
+
+def test_expired_lease_is_claimed_again(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("autotx.task_queue.time.monotonic", lambda: now[0])
+    queue = LocalTaskQueue()
+    queue.enqueue(queued_task("1"))
+
+    assert queue.claim("w1", 60, [], []).attempts == 1
+    now[0] += 30
+    assert queue.claim("w2", 60, [], []) is None
+
+    now[0] += 31
+    reclaimed = queue.claim("w2", 60, [], [])
+    assert reclaimed.task_id == "1"
+    assert reclaimed.attempts == 2
+
+def test_renew_extends_lease_of_own_tasks(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("autotx.task_queue.time.monotonic", lambda: now[0])
+    queue = LocalTaskQueue()
+    queue.enqueue(queued_task("1"))
+    queue.claim("w1", 60, [], [])
+
+    now[0] += 50
+    # Only the worker holding the lease can renew it
+    queue.renew("w2", ["1"], 60)
+    queue.renew("w1", ["1"], 60)
+    now[0] += 50
+    assert queue.claim("w2", 60, [], []) is None
+
+    now[0] += 11
+    assert queue.claim("w2", 60, [], []).task_id == "1"
+
+def test_task_is_abandoned_after_max_attempts():
+    queue = LocalTaskQueue()
+    executed: list[str] = []
+    abandoned: list[tuple[str, str]] = []
+
+    async def execute(task: models.QueuedTask) -> None:
+        executed.append(task.task_id)
+
+    pool = TaskWorkerPool(queue, execute, lambda task, error: abandoned.append((task.task_id, error)), 1, 1, 1, max_attempts=3)
+    queue.enqueue(queued_task("1", attempts=2))
+    queue.enqueue(queued_task("2", attempts=3))
+
+    pool.run_task(queue.claim(pool.worker_id, 60, [], []))
+    pool.run_task(queue.claim(pool.worker_id, 60, [], []))
+
+    assert executed == ["1"]
+    assert abandoned == [("2", "Task was interrupted 3 times")]
+    assert queue.depth() == 0 and queue.claim(pool.worker_id, 60, [], []) is None
+    assert (pool.completed, pool.failed) == (1, 1)
+
+def test_quotas_limit_running_tasks():
+    queue = LocalTaskQueue()
+    release = Event()
+    lock = Lock()
+    started: list[str] = []
+
+    async def execute(task: models.QueuedTask) -> None:
+        with lock:
+            started.append(task.task_id)
+        release.wait(5)
+
+    pool = TaskWorkerPool(queue, execute, lambda task, error: None, 4, 2, 1, poll_interval_sec=0.01)
+    queue.enqueue(queued_task("1", app_id="a", app_user_id="u1"))
+    queue.enqueue(queued_task("2", app_id="a", app_user_id="u1"))
+    queue.enqueue(queued_task("3", app_id="a", app_user_id="u2"))
+    queue.enqueue(queued_task("4", app_id="a", app_user_id="u3"))
+    queue.enqueue(queued_task("5", app_id="b", app_user_id="u4"))
+    pool.start()
+    try:
+        wait_until(lambda: len(started) == 3)
+        time.sleep(0.1)
+        # One task per user and two per app are running, the rest waits in the queue
+        assert sorted(started) == ["1", "3", "5"]
+        assert pool.metrics().queued == 2
+
+        release.set()
+        wait_until(lambda: pool.metrics().completed == 5)
+        assert sorted(started) == ["1", "2", "3", "4", "5"]
+    finally:
+        release.set()
+        pool.stop()
+
+class CountingQueue(LocalTaskQueue):
+    def __init__(self) -> None:
+        super().__init__()
+        self.claims = 0
+
+    def claim(self, worker_id: str, lease_sec: int, excluded_app_ids: list[str], excluded_app_user_ids: list[str]) -> models.QueuedTask | None:
+        self.claims += 1
+        return super().claim(worker_id, lease_sec, excluded_app_ids, excluded_app_user_ids)
+
+def test_poll_interval_backs_off_while_queue_is_empty():
+    pool = TaskWorkerPool(LocalTaskQueue(), None, None, 1, 1, 1, poll_interval_sec=2, max_poll_interval_sec=30) # type: ignore
+
+    assert [pool.poll_wait_sec(empty_polls) for empty_polls in range(7)] == [2, 2, 4, 8, 16, 30, 30]
+
+def test_idle_pool_polls_less_and_wakes_up_on_enqueue():
+    queue = CountingQueue()
+    executed = Event()
+
+    async def execute(task: models.QueuedTask) -> None:
+        executed.set()
+
+    pool = TaskWorkerPool(queue, execute, lambda task, error: None, 1, 1, 1, poll_interval_sec=0.01, max_poll_interval_sec=0.2)
+    pool.start()
+    try:
+        time.sleep(0.6)
+        # Without backing off the pool would have polled about 60 times
+        assert queue.claims < 15
+
+        enqueued_at = time.monotonic()
+        pool.enqueue(queued_task("1"))
+        assert executed.wait(5)
+        assert time.monotonic() - enqueued_at < 0.15
+    finally:
+        pool.stop()
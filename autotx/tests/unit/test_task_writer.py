@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+from autotx import models, server
+from autotx.task_writer import TaskWriter
+
+class FakeTasks:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.messages: list[str] = []
+        self.logs: list[models.TaskLog] = []
+        self.stopped_for_error: list[tuple[str, str]] = []
+
+    def append_messages(self, task_id: str, messages: list[str]) -> None:
+        if len(messages) == 0:
+            return
+        if self.failures > 0:
+            self.failures -= 1
+            raise Exception("Database unavailable")
+        self.messages.extend(messages)
+
+    def append_logs(self, task_id: str, logs: list[models.TaskLog]) -> None:
+        self.logs.extend(logs)
+
+    def stop_for_error(self, task_id: str, error: str) -> None:
+        self.stopped_for_error.append((task_id, error))
+
+def task_log(i: int) -> models.TaskLog:
+    return models.TaskLog(type="execution", obj=str(i), created_at=datetime(2026, 1, 1))
+
+def writer_for(tasks: FakeTasks, **kwargs: Any) -> TaskWriter:
+    # A long interval so only the tests decide when entries are flushed
+    return TaskWriter(tasks, "task-1", flush_interval_ms=60_000, **kwargs) # type: ignore
+
+def test_entries_are_written_in_the_order_they_were_added() -> None:
+    tasks = FakeTasks()
+    writer = writer_for(tasks, flush_max_entries=3)
+
+    for i in range(10):
+        writer.add_message(f"message {i}")
+        writer.add_log(task_log(i))
+    writer.close()
+
+    assert tasks.messages == [f"message {i}" for i in range(10)]
+    assert [log.obj for log in tasks.logs] == [str(i) for i in range(10)]
+
+def test_failed_flush_keeps_entries_ahead_of_new_ones() -> None:
+    tasks = FakeTasks(failures=1)
+    writer = writer_for(tasks)
+
+    writer.add_message("first")
+    with pytest.raises(Exception, match="Database unavailable"):
+        writer.flush()
+    writer.add_message("second")
+    writer.close()
+
+    assert tasks.messages == ["first", "second"]
+
+def test_close_raises_when_entries_cant_be_written() -> None:
+    # The background thread's final flush and the flush in close() both fail
+    tasks = FakeTasks(failures=2)
+    writer = writer_for(tasks)
+
+    writer.add_message("lost")
+    with pytest.raises(Exception, match="Database unavailable"):
+        writer.close()
+
+    assert tasks.messages == []
+
+def test_entries_cant_be_added_after_close() -> None:
+    writer = writer_for(FakeTasks())
+    writer.close()
+
+    with pytest.raises(Exception, match="closed"):
+        writer.add_message("late")
+
+def test_task_is_marked_failed_when_the_writer_cant_be_closed() -> None:
+    tasks = FakeTasks(failures=2)
+    writer = writer_for(tasks)
+    writer.add_message("lost")
+
+    server.stop_task_for_error(tasks, "task-1", "Agent crashed", "An error occurred", writer) # type: ignore
+
+    assert tasks.stopped_for_error == [("task-1", "Agent crashed")]
+    assert tasks.messages == ["An error occurred"]
@@ -0,0 +1,101 @@
+from typing import Any
+
+from eth_abi.abi import decode, encode
+from hexbytes import HexBytes
+import pytest
+from web3 import Web3
+from web3.providers import BaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from autotx.eth_address import ETHAddress
+from autotx.utils.ethereum.constants import NATIVE_TOKEN_ADDRESS
+from autotx.utils.ethereum.get_token_balances import MULTICALL3_ADDRESS, get_token_balances
+from autotx.utils.ethereum.networks import ChainId
+
+USDC = ETHAddress("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48")
+MKR = ETHAddress("0x9f8F72aA9304c8B593d555F12eF6589cC3A579A2")
+OWNER = ETHAddress("0x1111111111111111111111111111111111111111")
+
+SYMBOL = HexBytes(Web3.keccak(text="symbol()")[:4])
+DECIMALS = HexBytes(Web3.keccak(text="decimals()")[:4])
+BALANCE_OF = HexBytes(Web3.keccak(text="balanceOf(address)")[:4])
+GET_ETH_BALANCE = HexBytes(Web3.keccak(text="getEthBalance(address)")[:4])
+AGGREGATE3 = HexBytes(Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4])
+
+# A node with USDC, MKR (bytes32 symbol) and optionally Multicall3, custom providers are supported as well as HTTP ones
+class FakeProvider(BaseProvider):
+    def __init__(self, multicall: bool):
+        self.multicall = multicall
+        self.requests: list[str] = []
+
+    def call(self, to: str, data: HexBytes) -> bytes | None:
+        selector, args = data[:4], data[4:]
+        if to == USDC.hex:
+            if selector == SYMBOL:
+                return encode(["string"], ["USDC"])
+            if selector == DECIMALS:
+                return encode(["uint8"], [6])
+            if selector == BALANCE_OF:
+                return encode(["uint256"], [5_000_000])
+        if to == MKR.hex:
+            if selector == SYMBOL:
+                return encode(["bytes32"], [b"MKR"])
+            if selector == DECIMALS:
+                return encode(["uint8"], [18])
+        if to == MULTICALL3_ADDRESS and self.multicall and selector == GET_ETH_BALANCE:
+            return encode(["uint256"], [3 * 10 ** 18])
+        return None
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        self.requests.append(method)
+        if method == "eth_chainId":
+            return { "jsonrpc": "2.0", "id": 1, "result": "0x1" }
+        if method == "eth_getBalance":
+            return { "jsonrpc": "2.0", "id": 1, "result": hex(2 * 10 ** 18) }
+        if method == "eth_call":
+            to = Web3.to_checksum_address(params[0]["to"])
+            data = HexBytes(params[0]["data"])
+            if to == MULTICALL3_ADDRESS and data[:4] == AGGREGATE3:
+                if not self.multicall:
+                    return { "jsonrpc": "2.0", "id": 1, "result": "0x" }
+                [calls] = decode(["(address,bool,bytes)[]"], data[4:])
+                results = [(result is not None, result or b"") for result in [self.call(Web3.to_checksum_address(target), HexBytes(call_data)) for target, _, call_data in calls]]
+                return { "jsonrpc": "2.0", "id": 1, "result": "0x" + encode(["(bool,bytes)[]"], [results]).hex() }
+
+            result = self.call(to, data)
+            if result is None:
+                return { "jsonrpc": "2.0", "id": 1, "error": { "code": 3, "message": "execution reverted" } }
+            return { "jsonrpc": "2.0", "id": 1, "result": "0x" + result.hex() }
+        raise Exception(f"Unexpected request {method}")
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+def test_balances_in_one_multicall():
+    provider = FakeProvider(multicall=True)
+    balances = get_token_balances(
+        Web3(provider),
+        [(ETHAddress(NATIVE_TOKEN_ADDRESS), OWNER), (USDC, OWNER), (MKR, None), (USDC, None)],
+        ChainId.MAINNET,
+    )
+
+    assert [(balance.symbol, balance.decimals, balance.balance) for balance in balances] == [
+        ("ETH", 18, 3 * 10 ** 18),
+        ("USDC", 6, 5_000_000),
+        ("MKR", 18, None),
+        ("USDC", 6, None),
+    ]
+    assert balances[1].amount == 5
+    # The chain id is read by web3's validation middleware, not to find the native token symbol
+    assert provider.requests.count("eth_call") == 1 and "eth_getBalance" not in provider.requests
+
+def test_falls_back_to_single_calls_without_multicall():
+    provider = FakeProvider(multicall=False)
+    balances = get_token_balances(Web3(provider), [(ETHAddress(NATIVE_TOKEN_ADDRESS), OWNER), (USDC, OWNER)])
+
+    assert [(balance.symbol, balance.balance) for balance in balances] == [("ETH", 2 * 10 ** 18), ("USDC", 5_000_000)]
+    assert "eth_getBalance" in provider.requests
+
+def test_invalid_token():
+    with pytest.raises(Exception, match="not a valid ERC20 token"):
+        get_token_balances(Web3(FakeProvider(multicall=True)), [(OWNER, None)], ChainId.MAINNET)
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from autotx.eth_address import ETHAddress
+from autotx.utils.ethereum import token_metadata
+from autotx.utils.ethereum.cache import Cache
+from autotx.utils.ethereum.get_token_balances import TokenBalance
+from autotx.utils.ethereum.networks import ChainId
+from autotx.utils.ethereum.token_metadata import TOKEN_METADATA_FILE_NAME, TokenMetadata, TokenMetadataCache, get_tokens_metadata
+
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+DAI = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+TOKEN = "0x1111111111111111111111111111111111111111"
+
+@pytest.fixture()
+def cache(tmp_path, monkeypatch) -> Cache:
+    cache = Cache(str(tmp_path))
+    monkeypatch.setattr(token_metadata, "cache", cache)
+    return cache
+
+def test_cold_start(cache, capsys):
+    metadata_cache = TokenMetadataCache()
+
+    assert metadata_cache.get(1, TOKEN) is None
+    assert "not found" not in capsys.readouterr().out
+
+def test_corrupted_cache_is_ignored(cache):
+    cache_path = f"{cache.folder}/{TOKEN_METADATA_FILE_NAME}"
+    with open(cache_path, "w") as f:
+        f.write('{"1:0x11')
+
+    metadata_cache = TokenMetadataCache()
+
+    assert metadata_cache.get(1, TOKEN) is None
+    # Tokens of the registry are still known
+    assert metadata_cache.get_seeded(1, USDC) == TokenMetadata("USDC", 6)
+
+    metadata_cache.set(1, TOKEN, TokenMetadata("TKN", 18))
+    with open(cache_path) as f:
+        assert json.load(f) == { f"1:{TOKEN}": { "symbol": "TKN", "decimals": 18, "expires_at": None } }
+
+def test_set_many_writes_once(cache, monkeypatch):
+    writes: list[str] = []
+    write = cache.write
+    monkeypatch.setattr(cache, "write", lambda file_name, data: (writes.append(file_name), write(file_name, data)))
+
+    metadata_cache = TokenMetadataCache()
+    metadata_cache.set_many(1, {
+        TOKEN: TokenMetadata("TKN", 18),
+        USDC: TokenMetadata("USDC", 6),
+    })
+
+    assert writes == [TOKEN_METADATA_FILE_NAME]
+    assert TokenMetadataCache().get(1, TOKEN) == TokenMetadata("TKN", 18)
+
+def test_write_replaces_file_atomically(cache):
+    cache.write("file.txt", "first")
+    cache.write("file.txt", "second")
+
+    assert cache.read("file.txt") == "second"
+    assert os.listdir(cache.folder) == ["file.txt"]
+
+def test_seeded_tokens_are_checked_for_proxies(cache, monkeypatch):
+    fetched: list[str] = []
+
+    def get_token_balances(web3, pairs, chain):
+        fetched.extend(token.hex for (token, _) in pairs)
+        return [TokenBalance(token, None, "USDC", 6, None) for (token, _) in pairs]
+
+    monkeypatch.setattr(token_metadata, "token_metadata_cache", TokenMetadataCache())
+    monkeypatch.setattr(token_metadata, "get_token_balances", get_token_balances)
+    monkeypatch.setattr(token_metadata, "is_proxy_token", lambda web3, token: token.hex == USDC)
+
+    [usdc, dai] = get_tokens_metadata(None, ChainId.MAINNET, [ETHAddress(USDC), ETHAddress(DAI)])
+
+    # USDC is an upgradeable proxy, it's read from the chain and expires, DAI keeps the token list metadata for good
+    assert fetched == [USDC]
+    assert usdc.expires_at is not None
+    assert dai == TokenMetadata("DAI", 18)
+    assert token_metadata.token_metadata_cache.get(1, DAI) == TokenMetadata("DAI", 18)
@@ -0,0 +1,105 @@
+from typing import Union, cast
+from web3 import Web3
+
+from autotx.utils.ethereum.helpers.token_registry import TokenRegistry, get_token_registry, write_token_registry
+from autotx.utils.ethereum.networks import SUPPORTED_NETWORKS_CONFIGURATION_MAP, ChainId, get_chain_tokens
+
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+DAI = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+GNOSIS_USDC = "0xDDAfbb505ad214D7b80b1f830fcCc89B60fb7A83"
+
+SOURCE_LIST: list[dict[str, Union[str, int]]] = [
+    { "chainId": 1, "address": USDC, "symbol": "USDC", "name": "USD Coin", "decimals": 6 },
+    { "chainId": 1, "address": DAI, "symbol": "DAI", "name": "Dai Stablecoin", "decimals": 18 },
+    # Duplicated symbol, the last one of the list wins
+    { "chainId": 1, "address": "0x0000000000085d4780B73119b644AE5ecd22b376", "symbol": "weth", "name": "Fake", "decimals": 18 },
+    { "chainId": 1, "address": WETH, "symbol": "WETH", "name": "Wrapped Ether", "decimals": 18 },
+    # Not checksummed, kept in the registry but not listed
+    { "chainId": 1, "address": "0xdac17f958d2ee523a2206206994597c13d831ec7", "symbol": "USDT", "name": "Tether USD", "decimals": 6 },
+    { "chainId": 100, "address": GNOSIS_USDC, "symbol": "USDC", "name": "USD Coin on xDai", "decimals": 6 },
+    # Invalid entries are skipped
+    { "chainId": 1, "address": "0x123", "symbol": "BAD", "name": "Bad", "decimals": 18 },
+    { "chainId": "1", "address": USDC, "symbol": "STR", "name": "Bad chain", "decimals": 18 },
+]
+
+# Same as NetworkInfo.fetch_tokens_for_chain before the registry replaced the token list literal
+def tokens_from_source(token_list: list[dict[str, Union[str, int]]], chain_id: int) -> dict[str, str]:
+    return {
+        cast(str, token["symbol"]).lower(): Web3.to_checksum_address(cast(str, token["address"]))
+        for token in token_list
+        if token["chainId"] == chain_id and Web3.is_address(token["address"]) and Web3.is_checksum_address(cast(str, token["address"]))
+    }
+
+def test_registry_matches_source_list(tmp_path):
+    path = str(tmp_path / "token_list.bin")
+    write_token_registry(SOURCE_LIST, path)
+    registry = TokenRegistry(path)
+
+    for chain_id in [1, 100, 137]:
+        assert registry.tokens_for_chain(chain_id) == tokens_from_source(SOURCE_LIST, chain_id)
+
+    assert registry.tokens_for_chain(1)["weth"] == WETH
+
+    tokens = { token.symbol: token for token in registry.tokens(1) }
+    assert tokens["USDC"].decimals == 6
+    assert tokens["USDC"].name == "USD Coin"
+    assert tokens["USDT"].address == Web3.to_checksum_address("0xdac17f958d2ee523a2206206994597c13d831ec7")
+    assert tokens["USDT"].checksummed is False
+    assert "BAD" not in tokens and "STR" not in tokens
+
+def test_registry_is_deterministic(tmp_path):
+    write_token_registry(SOURCE_LIST, str(tmp_path / "a.bin"))
+    write_token_registry(list(SOURCE_LIST), str(tmp_path / "b.bin"))
+
+    assert (tmp_path / "a.bin").read_bytes() == (tmp_path / "b.bin").read_bytes()
+
+def test_committed_registry():
+    registry = get_token_registry()
+
+    mainnet = registry.tokens_for_chain(1)
+    assert mainnet["usdc"] == USDC
+    assert mainnet["dai"] == DAI
+    assert mainnet["weth"] == WETH
+    assert registry.tokens_for_chain(100)["usdc"] == GNOSIS_USDC
+
+    for chain_id in registry.chains:
+        for token in registry.tokens(chain_id):
+            assert Web3.is_checksum_address(token.address)
+
+def test_find_by_symbol(tmp_path):
+    path = str(tmp_path / "token_list.bin")
+    write_token_registry(SOURCE_LIST, path)
+    registry = TokenRegistry(path)
+
+    assert registry.find(1, "USDC").address == USDC
+    assert registry.find(1, "dai").decimals == 18
+    # The last checksummed duplicate wins, like in the symbol map
+    assert registry.find(1, "weth").address == WETH
+    assert registry.find(1, "usdt") is None
+    assert registry.find(1, "missing") is None
+    assert registry.find(100, "usdc").address == GNOSIS_USDC
+    assert registry.find(137, "usdc") is None
+
+def test_chain_tokens_match_symbol_map():
+    tokens = get_chain_tokens(ChainId.MAINNET)
+    expected = { **get_token_registry().tokens_for_chain(1), **SUPPORTED_NETWORKS_CONFIGURATION_MAP[ChainId.MAINNET].default_tokens }
+
+    for symbol in list(expected)[:200] + ["usdc", "eth"]:
+        assert tokens[symbol] == expected[symbol]
+    assert "USDC" not in tokens
+    assert "not-a-token" not in tokens
+    assert dict(tokens) == expected
+
+def test_unknown_decimals(tmp_path):
+    path = str(tmp_path / "token_list.bin")
+    write_token_registry([
+        { "chainId": 1, "address": USDC, "symbol": "USDC", "name": "USD Coin", "decimals": "6" },
+        { "chainId": 1, "address": DAI, "symbol": "DAI", "name": "Dai Stablecoin" },
+        { "chainId": 1, "address": WETH, "symbol": "WETH", "name": "Wrapped Ether", "decimals": "eighteen" },
+    ], path)
+    registry = TokenRegistry(path)
+
+    assert { token.symbol: token.decimals for token in registry.tokens(1) } == { "USDC": 6, "DAI": None, "WETH": None }
+    # Tokens without decimals can still be looked up by symbol
+    assert registry.tokens_for_chain(1)["dai"] == DAI
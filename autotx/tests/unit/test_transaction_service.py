@@ -0,0 +1,117 @@
+from gnosis.eth import EthereumNetwork
+from gnosis.safe.api.base_api import SafeAPIException
+import pytest
+import requests
+
+from autotx.utils.ethereum import transaction_service
+from autotx.utils.ethereum.transaction_service import (
+    PooledTransactionServiceApi,
+    SafeTransactionsNotPosted,
+    TransactionServiceUnavailable,
+    post_safe_transaction,
+    post_safe_transactions,
+)
+
+class FakeSafeTx:
+    def __init__(self, safe_tx_hash: str, errors: list[Exception] = []):
+        self.safe_tx_hash = safe_tx_hash
+        # Raised by the next posts, in order
+        self.errors = list(errors)
+        # The transaction service stores the transaction even though the post raised, e.g. on a timeout
+        self.stored_on_error = False
+
+class FakeTransactionServiceApi:
+    def __init__(self) -> None:
+        self.posts: list[str] = []
+        self.stored: set[str] = set()
+
+    def post_transaction(self, safe_tx: FakeSafeTx) -> None:
+        self.posts.append(safe_tx.safe_tx_hash)
+        if safe_tx.errors:
+            if safe_tx.stored_on_error:
+                self.stored.add(safe_tx.safe_tx_hash)
+            raise safe_tx.errors.pop(0)
+        self.stored.add(safe_tx.safe_tx_hash)
+
+    def get_safe_transaction(self, safe_tx_hash: str) -> None:
+        if safe_tx_hash not in self.stored:
+            raise SafeAPIException("Not found")
+
+@pytest.fixture()
+def sleeps(monkeypatch) -> list[float]:
+    sleeps: list[float] = []
+    monkeypatch.setattr("autotx.utils.ethereum.transaction_service.time.sleep", sleeps.append)
+    return sleeps
+
+def test_unavailable_service_is_retried_with_backoff(sleeps: list[float]) -> None:
+    ts_api = FakeTransactionServiceApi()
+    safe_tx = FakeSafeTx("a", [TransactionServiceUnavailable("503"), requests.ConnectionError("reset")])
+
+    post_safe_transaction(ts_api, safe_tx) # type: ignore
+
+    assert ts_api.posts == ["a", "a", "a"]
+    assert ts_api.stored == {"a"}
+    assert len(sleeps) == 2
+    assert sleeps[0] <= transaction_service.TX_SERVICE_BACKOFF_BASE_SEC
+    assert sleeps[1] <= transaction_service.TX_SERVICE_BACKOFF_BASE_SEC * 2
+
+def test_error_is_raised_after_the_last_attempt(sleeps: list[float]) -> None:
+    ts_api = FakeTransactionServiceApi()
+    safe_tx = FakeSafeTx("a", [requests.Timeout("timeout")] * transaction_service.TX_SERVICE_MAX_ATTEMPTS)
+
+    with pytest.raises(requests.Timeout):
+        post_safe_transaction(ts_api, safe_tx) # type: ignore
+
+    assert len(ts_api.posts) == transaction_service.TX_SERVICE_MAX_ATTEMPTS
+    assert len(sleeps) == transaction_service.TX_SERVICE_MAX_ATTEMPTS - 1
+
+def test_transaction_stored_by_a_failed_attempt_counts_as_posted(sleeps: list[float]) -> None:
+    ts_api = FakeTransactionServiceApi()
+    safe_tx = FakeSafeTx("a", [requests.Timeout("timeout")] * transaction_service.TX_SERVICE_MAX_ATTEMPTS)
+    safe_tx.stored_on_error = True
+
+    post_safe_transaction(ts_api, safe_tx) # type: ignore
+
+    assert len(ts_api.posts) == transaction_service.TX_SERVICE_MAX_ATTEMPTS
+
+def test_rejected_transaction_is_not_retried(sleeps: list[float]) -> None:
+    ts_api = FakeTransactionServiceApi()
+
+    with pytest.raises(SafeAPIException):
+        post_safe_transaction(ts_api, FakeSafeTx("a", [SafeAPIException("Invalid signature")])) # type: ignore
+
+    # Posting a transaction that is already stored is rejected too, which is not an error
+    ts_api.stored.add("b")
+    post_safe_transaction(ts_api, FakeSafeTx("b", [SafeAPIException("Already exists")])) # type: ignore
+
+    assert ts_api.posts == ["a", "b"]
+    assert sleeps == []
+
+def test_partial_post_reports_which_transactions_were_posted(sleeps: list[float]) -> None:
+    ts_api = FakeTransactionServiceApi()
+    safe_txs = [
+        FakeSafeTx("a", [TransactionServiceUnavailable("429")]),
+        FakeSafeTx("b", [requests.ConnectionError("reset")] * transaction_service.TX_SERVICE_MAX_ATTEMPTS),
+        FakeSafeTx("c"),
+    ]
+
+    with pytest.raises(SafeTransactionsNotPosted) as error:
+        post_safe_transactions(ts_api, safe_txs) # type: ignore
+
+    assert error.value.posted == [True, False, True]
+    assert isinstance(error.value.error, requests.ConnectionError)
+    assert ts_api.stored == {"a", "c"}
+
+@pytest.mark.parametrize("status_code, retried", [(200, False), (201, False), (422, False), (429, True), (500, True), (503, True)])
+def test_rate_limits_and_server_errors_are_retryable(monkeypatch, status_code: int, retried: bool) -> None:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b"{}"
+    monkeypatch.setattr(transaction_service.TransactionServiceApi, "_post_request", lambda self, url, payload: response)
+    ts_api = PooledTransactionServiceApi(EthereumNetwork.MAINNET, base_url="http://tx-service.test")
+
+    if retried:
+        with pytest.raises(TransactionServiceUnavailable):
+            ts_api._post_request("/api/v1/safes/", {})
+    else:
+        assert ts_api._post_request("/api/v1/safes/", {}) is response
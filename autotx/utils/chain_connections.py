@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock, Thread
+import time
+import traceback
+
+from gnosis.eth import EthereumClient
+from web3 import Web3
+
+from autotx.utils.ethereum.get_token_balances import get_ethereum_client_for_url
+
+CONNECT_ATTEMPTS = 16
+CONNECT_RETRY_DELAY_SEC = 0.5
+HEALTH_CHECK_INTERVAL_SEC = 30
+# Unreachable nodes are checked more often, so requests resume soon after the node is back
+UNHEALTHY_CHECK_INTERVAL_SEC = 5
+
+@dataclass
+class ChainConnection:
+    rpc_url: str
+    client: EthereumClient
+    chain_id: int
+    healthy: bool
+    checked_at: float
+
+    @property
+    def web3(self) -> Web3:
+        return self.client.w3
+
+connections: dict[str, ChainConnection] = {}
+connections_lock = Lock()
+health_check_thread: Thread | None = None
+
+def wait_for_node(web3: Web3, attempts: int) -> bool:
+    for i in range(attempts):
+        if web3.is_connected():
+            return True
+        if i < attempts - 1:
+            time.sleep(CONNECT_RETRY_DELAY_SEC)
+    return False
+
+# Connections are created once per RPC url and reused. Their health is checked on a background thread,
+# so once connected, getting a connection is a dict lookup
+def get_chain_connection(rpc_url: str, attempts: int = CONNECT_ATTEMPTS) -> ChainConnection | None:
+    with connections_lock:
+        connection = connections.get(rpc_url)
+        if connection is not None:
+            return connection if connection.healthy else None
+
+    client = get_ethereum_client_for_url(rpc_url)
+    if not wait_for_node(client.w3, attempts):
+        return None
+
+    connection = ChainConnection(rpc_url, client, client.w3.eth.chain_id, True, time.monotonic())
+    with connections_lock:
+        connection = connections.setdefault(rpc_url, connection)
+
+    start_health_checks()
+
+    return connection
+
+# Checks the connections that are due, healthy ones every HEALTH_CHECK_INTERVAL_SEC and unhealthy ones every UNHEALTHY_CHECK_INTERVAL_SEC
+def check_chain_connections() -> None:
+    now = time.monotonic()
+    with connections_lock:
+        due = [
+            connection
+            for connection in connections.values()
+            if now - connection.checked_at >= (HEALTH_CHECK_INTERVAL_SEC if connection.healthy else UNHEALTHY_CHECK_INTERVAL_SEC)
+        ]
+
+    for connection in due:
+        healthy = connection.web3.is_connected()
+        with connections_lock:
+            connection.healthy = healthy
+            connection.checked_at = time.monotonic()
+
+def run_health_checks() -> None:
+    while True:
+        time.sleep(UNHEALTHY_CHECK_INTERVAL_SEC)
+        try:
+            check_chain_connections()
+        except Exception:
+            traceback.print_exc()
+
+def start_health_checks() -> None:
+    global health_check_thread
+    with connections_lock:
+        if health_check_thread is not None:
+            return
+        health_check_thread = Thread(target=run_health_checks, name="chain-health-checks", daemon=True)
+        health_check_thread.start()
+
+def warm_chain_connections(rpc_urls: list[str]) -> None:
+    if len(rpc_urls) == 0:
+        return
+
+    # Warming is best effort, unreachable nodes are connected to again on first use
+    with ThreadPoolExecutor(max_workers=len(rpc_urls)) as executor:
+        list(executor.map(lambda rpc_url: get_chain_connection(rpc_url, attempts=1), rpc_urls))
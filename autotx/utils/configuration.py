@@ -1,11 +1,10 @@
 import os
 import sys
-from time import sleep
 
-from web3 import HTTPProvider, Web3
+from web3 import Web3
 from autotx.get_env_vars import get_env_vars
-from eth_typing import URI
 
+from autotx.utils.chain_connections import get_chain_connection
 from autotx.utils.ethereum.constants import DEVNET_RPC_URL
 from autotx.utils.ethereum.networks import NetworkInfo
 from autotx.utils.is_dev_env import is_dev_env
@@ -39,17 +38,14 @@ class AppConfig:
             
             rpc_url = provided_rpc_url
             
-        web3 = Web3(HTTPProvider(rpc_url))
-        for i in range(16):
-            if web3.is_connected():
-                break
-            if i == 15:
-                if is_dev_env():
-                    sys.exit("Can not connect with local node. Did you run `poetry run start-devnet`?")
-                else:
-                    sys.exit("Can not connect with remote node. Check your CHAIN_RPC_URL")
-            sleep(0.5)
+        # Web3 and the chain ID are cached per RPC url, only the network info (with its token overlay) is per config
+        connection = get_chain_connection(rpc_url)
+        if connection is None:
+            if is_dev_env():
+                sys.exit("Can not connect with local node. Did you run `poetry run start-devnet`?")
+            else:
+                sys.exit("Can not connect with remote node. Check your CHAIN_RPC_URL")
 
         self.rpc_url = rpc_url
-        self.web3 = web3
-        self.network_info = NetworkInfo(web3.eth.chain_id)
+        self.web3 = connection.web3
+        self.network_info = NetworkInfo(connection.chain_id)
@@ -1,7 +1,7 @@
 import json
-from typing import Sequence
+from typing import Any, Sequence
 from pydantic import BaseModel
 
 
-def dump_pydantic_list(items: Sequence[BaseModel]) -> str:
-    return json.dumps([json.loads(log.model_dump_json()) for log in items])
\ No newline at end of file
+def dump_pydantic_list(items: Sequence[BaseModel]) -> list[Any]:
+    return [json.loads(item.model_dump_json()) for item in items]
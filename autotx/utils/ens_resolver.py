@@ -0,0 +1,75 @@
+import asyncio
+from threading import Lock
+from typing import Iterable
+
+from eth_typing import ChecksumAddress
+from requests import Session
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider, Web3
+
+from autotx.utils.constants import MAINNET_DEFAULT_RPC
+from autotx.utils.ttl_cache import TTLCache
+
+ENS_CACHE_SIZE = 1024
+ENS_CACHE_TTL_SEC = 300
+ENS_NEGATIVE_CACHE_TTL_SEC = 60
+ENS_POOL_SIZE = 16
+
+_web3: Web3 | None = None
+_web3_lock = Lock()
+
+forward_cache: TTLCache[str, ChecksumAddress | None] = TTLCache(ENS_CACHE_SIZE, ENS_CACHE_TTL_SEC)
+reverse_cache: TTLCache[ChecksumAddress, str | None] = TTLCache(ENS_CACHE_SIZE, ENS_CACHE_TTL_SEC)
+
+def get_mainnet_web3() -> Web3:
+    global _web3
+    with _web3_lock:
+        if _web3 is None:
+            session = Session()
+            adapter = HTTPAdapter(pool_connections=ENS_POOL_SIZE, pool_maxsize=ENS_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _web3 = Web3(HTTPProvider(MAINNET_DEFAULT_RPC, session=session))
+        return _web3
+
+def resolve_ens(name: str) -> ChecksumAddress | None:
+    name = name.lower()
+    (found, address) = forward_cache.lookup(name)
+    if found:
+        return address
+
+    address = get_mainnet_web3().ens.address(name)  # type: ignore
+    forward_cache.set(name, address, ENS_CACHE_TTL_SEC if address else ENS_NEGATIVE_CACHE_TTL_SEC)
+
+    return address
+
+# The primary name of an address, only if it resolves back to the address. Reverse records are set by the
+# owner of the address and can claim any name, so they are never taken from (or added to) the forward cache
+def lookup_ens_name(address: str) -> str | None:
+    address = Web3.to_checksum_address(address)
+    (found, name) = reverse_cache.lookup(address)
+    if found:
+        return name
+
+    name = get_mainnet_web3().ens.name(address)  # type: ignore
+    if name is not None and resolve_ens(name) != address:
+        name = None
+    reverse_cache.set(address, name, ENS_CACHE_TTL_SEC if name else ENS_NEGATIVE_CACHE_TTL_SEC)
+
+    return name
+
+async def a_resolve_ens(name: str) -> ChecksumAddress | None:
+    return await asyncio.to_thread(resolve_ens, name)
+
+async def a_lookup_ens_name(address: str) -> str | None:
+    return await asyncio.to_thread(lookup_ens_name, address)
+
+# Names that failed to resolve (e.g. the node is unreachable) are left out, they are resolved again when used
+async def a_resolve_ens_names(names: Iterable[str]) -> dict[str, ChecksumAddress | None]:
+    unique_names = list({ name.lower() for name in names if name.endswith(".eth") })
+    addresses = await asyncio.gather(*[a_resolve_ens(name) for name in unique_names], return_exceptions=True)
+    return {
+        name: address
+        for name, address in zip(unique_names, addresses)
+        if not isinstance(address, BaseException)
+    }
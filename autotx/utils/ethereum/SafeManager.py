@@ -11,7 +11,6 @@ from gnosis.eth.multicall import Multicall
 from gnosis.safe import Safe, SafeOperation, SafeTx
 from gnosis.safe.multi_send import MultiSend, MultiSendOperation, MultiSendTx
 from web3.types import TxParams, TxReceipt
-from gnosis.safe.api import TransactionServiceApi
 from eth_account.signers.local import LocalAccount
 
 from autotx.transactions import TransactionBase
@@ -23,6 +22,10 @@ from autotx.utils.ethereum.networks import NetworkInfo
 from .deploy_safe_with_create2 import deploy_safe_with_create2
 from .deploy_multicall import deploy_multicall
 from .get_erc20_balance import get_erc20_balance
+from .receipt_tracker import get_receipt_tracker
+from .safe_nonces import safe_nonce_allocator
+from .simulate_multisend import MultisendRevert, find_multisend_revert
+from .transaction_service import PooledTransactionServiceApi, SafeTransactionsNotPosted, get_transaction_service_api, post_safe_transactions
 from .constants import MULTI_SEND_ADDRESS, GAS_PRICE_MULTIPLIER
 
 
@@ -39,6 +42,7 @@ class SafeManager:
     dev_account: LocalAccount | None = None
     network: NetworkInfo
     transaction_service_url: str | None = None
+    ts_api: PooledTransactionServiceApi | None = None
     address: ETHAddress
     use_tx_service: bool
 
@@ -97,10 +101,17 @@ class SafeManager:
     def connect_tx_service(self, transaction_service_url: str) -> None:
         self.use_tx_service = True
         self.transaction_service_url = transaction_service_url
+        self.ts_api = None
     
     def disconnect_tx_service(self) -> None:
         self.use_tx_service = False
         self.transaction_service_url = None
+        self.ts_api = None
+
+    def get_tx_service(self) -> PooledTransactionServiceApi:
+        if self.ts_api is None:
+            self.ts_api = get_transaction_service_api(self.network.chain_id, self.client, self.transaction_service_url)
+        return self.ts_api
 
     def connect_multisend(self, address: ChecksumAddress) -> None:
         self.multisend = MultiSend(self.client, address=address)
@@ -136,26 +147,37 @@ class SafeManager:
         return safe_tx
 
     def build_tx(self, tx: TxParams | dict[str, Any], safe_nonce: Optional[int] = None, skip_estimate_gas: bool = False) -> SafeTx:
-        safe_tx = SafeTx(
-            self.client,
-            self.address.hex,
-            str(tx["to"]),
-            tx["value"],
-            cast(bytes, tx["data"]),
-            0,
-            0,
-            0,
-            0,
-            None,
-            self.address.hex,
-            safe_nonce=self.track_nonce(safe_nonce),
-        )
+        return self.build_txs([tx], safe_nonce, skip_estimate_gas)[0]
+
+    # Transactions get consecutive nonces. Their gas is estimated against the current state, so only the first
+    # estimate is right when they depend on each other (e.g. an approve and the swap using it). That's why send_tx_batch
+    # executes and estimates its transactions one by one, and proposals skip the estimate
+    def build_txs(self, txs: list[TxParams | dict[str, Any]], safe_nonce: Optional[int] = None, skip_estimate_gas: bool = False) -> list[SafeTx]:
+        start_nonce = self.reserve_nonces(len(txs), safe_nonce) if len(txs) > 0 else 0
+        safe_txs = [
+            SafeTx(
+                self.client,
+                self.address.hex,
+                str(tx["to"]),
+                tx["value"],
+                cast(bytes, tx["data"]),
+                0,
+                0,
+                0,
+                0,
+                None,
+                self.address.hex,
+                safe_nonce=start_nonce + i,
+            )
+            for i, tx in enumerate(txs)
+        ]
 
         if not skip_estimate_gas:
-            safe_tx.safe_tx_gas = self.safe.estimate_tx_gas(safe_tx.to, safe_tx.value, safe_tx.data, safe_tx.operation)
-            safe_tx.base_gas = self.safe.estimate_tx_base_gas(safe_tx.to, safe_tx.value, safe_tx.data, safe_tx.operation, NULL_ADDRESS, safe_tx.safe_tx_gas)
+            for safe_tx in safe_txs:
+                safe_tx.safe_tx_gas = self.safe.estimate_tx_gas(safe_tx.to, safe_tx.value, safe_tx.data, safe_tx.operation)
+                safe_tx.base_gas = self.safe.estimate_tx_base_gas(safe_tx.to, safe_tx.value, safe_tx.data, safe_tx.operation, NULL_ADDRESS, safe_tx.safe_tx_gas)
 
-        return safe_tx
+        return safe_txs
     
     def execute_tx(self, tx: TxParams | dict[str, Any], safe_nonce: Optional[int] = None) -> HexBytes:
         if not self.dev_account:
@@ -198,33 +220,46 @@ class SafeManager:
             return tx_hash
         except Exception as e:
             if "revert: GS013" in str(e):
-                print(str(e))
-                print("Executing transactions one by one to get a more detailed revert message")
-                nonce = self.track_nonce(safe_nonce)
-                for i, tx in enumerate(txs):
-                    print(f"Executing transaction {i + 1}...")
-                    self.execute_tx(tx, nonce + i)
+                revert = self.find_multisend_revert(txs)
+                if revert:
+                    raise ExecutionRevertedError(f"Transaction {revert.index + 1} reverted: {revert.describe()}")
             raise e
 
+    def find_multisend_revert(self, txs: list[TxParams | dict[str, Any]]) -> MultisendRevert | None:
+        if not self.multisend:
+            raise Exception("No multisend contract address has been set to SafeManager")
+
+        return find_multisend_revert(self.client, self.address.hex, txs, str(self.multisend.address))
+
     def post_transaction(self, tx: TxParams | dict[str, Any], safe_nonce: Optional[int] = None) -> None:
-        ts_api = TransactionServiceApi(
-            self.network.chain_id, ethereum_client=self.client, base_url=self.transaction_service_url
-        )
+        self.post_transactions([tx], safe_nonce)
 
-        safe_tx = self.build_tx(tx, safe_nonce, skip_estimate_gas=True)
-        safe_tx.sign(self.agent.key.hex())
+    # Each transaction gets the next nonce, the whole range is posted at once
+    def post_transactions(self, txs: list[TxParams | dict[str, Any]], safe_nonce: Optional[int] = None) -> None:
+        start_nonce = self.reserve_nonces(len(txs), safe_nonce)
+        try:
+            safe_txs = self.build_txs(txs, start_nonce, skip_estimate_gas=True)
+            for safe_tx in safe_txs:
+                safe_tx.sign(self.agent.key.hex())
 
-        ts_api.post_transaction(safe_tx)
+            post_safe_transactions(self.get_tx_service(), safe_txs)
+        except Exception as e:
+            # Nonces reserved here are given back, a caller that passed the nonce releases it itself
+            if safe_nonce is None:
+                self.release_unposted_nonces(start_nonce, len(txs), e)
+            raise e
 
     def post_multisend_transaction(self, txs: list[TxParams | dict[str, Any]], safe_nonce: Optional[int] = None) -> None:
-        ts_api = TransactionServiceApi(
-            self.network.chain_id, ethereum_client=self.client, base_url=self.transaction_service_url
-        )
-
-        tx = self.build_multisend_tx(txs, safe_nonce)
-        tx.sign(self.agent.key.hex())
+        nonce = self.reserve_nonces(1, safe_nonce)
+        try:
+            tx = self.build_multisend_tx(txs, nonce)
+            tx.sign(self.agent.key.hex())
 
-        ts_api.post_transaction(tx)
+            post_safe_transactions(self.get_tx_service(), [tx])
+        except Exception as e:
+            if safe_nonce is None:
+                self.release_nonces(nonce, 1)
+            raise e
 
     def send_tx(self, tx: TxParams | dict[str, Any], safe_nonce: Optional[int] = None) -> str | None:
         if self.use_tx_service:
@@ -255,7 +290,7 @@ class SafeManager:
             print("No transactions to send.")
             return True
 
-        start_nonce = self.track_nonce(safe_nonce)
+        start_nonce = self.reserve_nonces(len(txs), safe_nonce)
 
         transactions_info = "\n".join(
             [
@@ -273,12 +308,12 @@ class SafeManager:
                 if response.lower() == "n" or response.lower() == "no":
                     print("Transactions not sent to your smart account (declined).")
                   
-                    self.reset_nonce(start_nonce)
+                    self.release_nonces(start_nonce, len(txs))
                   
                     return False
                 elif response.lower() != "y" and response.lower() != "yes":
                     
-                    self.reset_nonce(start_nonce)
+                    self.release_nonces(start_nonce, len(txs))
                     
                     return response
             else:
@@ -286,8 +321,11 @@ class SafeManager:
 
             print("Sending transactions to your smart account...")
 
-            for i, tx in enumerate([prepared_tx.params for prepared_tx in txs]):
-                self.send_tx(tx, start_nonce + i)
+            try:
+                self.post_transactions([prepared_tx.params for prepared_tx in txs], start_nonce)
+            except Exception as e:
+                self.release_unposted_nonces(start_nonce, len(txs), e)
+                raise e
 
             print("Transactions sent to your smart account for signing.")
             
@@ -299,12 +337,12 @@ class SafeManager:
                 if response.lower() == "n" or response.lower() == "no":
                     print("Transactions not executed (declined).")
                     
-                    self.reset_nonce(start_nonce)
+                    self.release_nonces(start_nonce, len(txs))
                     
                     return False
                 elif response.lower() != "y" and response.lower() != "yes":
                     
-                    self.reset_nonce(start_nonce)
+                    self.release_nonces(start_nonce, len(txs))
                     
                     return response
             else:
@@ -312,11 +350,18 @@ class SafeManager:
 
             print("Executing transactions...")
 
+            tx_hashes: list[HexBytes] = []
             for i, prepared_tx in enumerate([prepared_tx for prepared_tx in txs]):
                 try:
-                    self.send_tx(prepared_tx.params, start_nonce + i)
+                    tx_hashes.append(HexBytes(cast(str, self.send_tx(prepared_tx.params, start_nonce + i))))
                 except ExecutionRevertedError as e:
+                    self.release_nonces(start_nonce + i, len(txs) - i)
                     raise Exception(f"{prepared_tx.summary} failed with error: {e}")
+
+            # The transactions are confirmed together instead of one after the other
+            for prepared_tx, receipt in zip(txs, self.wait_all(tx_hashes)):
+                if receipt["status"] == 0:
+                    raise Exception(f"{prepared_tx.summary} failed with error: transaction {receipt['transactionHash'].hex()} reverted")
         
             print("Transactions executed.")
 
@@ -329,6 +374,11 @@ class SafeManager:
             print("No transactions to send.")
             return True
 
+        # The batch is simulated before asking for approval, so a reverting transaction is reported without sending anything
+        revert = self.find_multisend_revert([prepared_tx.params for prepared_tx in txs])
+        if revert:
+            raise Exception(f"{txs[revert.index].summary} failed with error: {revert.describe()}")
+
         transactions_info = "\n".join(
             [
                 f"{i + 1}. {tx.summary}"
@@ -401,7 +451,10 @@ class SafeManager:
         return self.send_tx(tx, safe_nonce)
 
     def wait(self, tx_hash: HexBytes) -> TxReceipt:
-        return self.web3.eth.wait_for_transaction_receipt(tx_hash)
+        return get_receipt_tracker(self.web3).wait(tx_hash)
+
+    def wait_all(self, tx_hashes: list[HexBytes]) -> list[TxReceipt]:
+        return get_receipt_tracker(self.web3).wait_all(tx_hashes)
 
     def balance_of(self, token_address: ETHAddress | None = None) -> float:
         if token_address is None:
@@ -415,21 +468,52 @@ class SafeManager:
     def gas_price(self) -> int:
         return self.web3.eth.gas_price if self.gas_multiplier is None else int(self.web3.eth.gas_price * self.gas_multiplier)
 
-    def track_nonce(self, safe_nonce: Optional[int] = None) -> int:
-        if safe_nonce is None:
-            if self.safe_nonce is None:
-                self.safe_nonce = self.nonce()
-            else:
-                self.safe_nonce += 1
-            return self.safe_nonce
-        else:
+    # Proposals reserve their nonces from the allocator shared by every SafeManager of the Safe, executed transactions
+    # use their nonce right away, so the chain is the only source of truth for them
+    def reserve_nonces(self, count: int, safe_nonce: Optional[int] = None) -> int:
+        if safe_nonce is not None:
             return safe_nonce
-    
-    def reset_nonce(self, starting_safe_nonce: Optional[int] = None) -> None:
-        if starting_safe_nonce is None:
-            self.safe_nonce = None
+
+        if self.use_tx_service:
+            start_nonce = safe_nonce_allocator.reserve(self.network.chain_id.value, self.address.hex, count, self.get_min_nonce)
         else:
-            self.safe_nonce = starting_safe_nonce - 1 # -1 because it will be incremented in track_nonce
+            start_nonce = self.nonce() if self.safe_nonce is None else self.safe_nonce + 1
+
+        self.safe_nonce = start_nonce + count - 1
+        return start_nonce
+
+    def track_nonce(self, safe_nonce: Optional[int] = None) -> int:
+        return self.reserve_nonces(1, safe_nonce)
+
+    # Gives back nonces that were not used, e.g. when the transactions were declined or failed to be sent
+    def release_nonces(self, start_nonce: int, count: int) -> None:
+        if self.use_tx_service:
+            safe_nonce_allocator.release(self.network.chain_id.value, self.address.hex, start_nonce, count)
+        self.safe_nonce = start_nonce - 1
+
+    # Transactions of a range are posted concurrently, only the nonces after the last posted one are given back,
+    # so a later reservation never reuses a nonce that already has a proposal
+    def release_unposted_nonces(self, start_nonce: int, count: int, error: Exception) -> None:
+        posted = error.posted if isinstance(error, SafeTransactionsNotPosted) else []
+        posted_count = max([i + 1 for i, is_posted in enumerate(posted) if is_posted], default=0)
+        self.release_nonces(start_nonce + posted_count, count - posted_count)
+
+    # The lowest nonce that is neither executed nor queued in the transaction service
+    def get_min_nonce(self) -> int:
+        nonce = self.nonce()
+        if not self.use_tx_service:
+            return nonce
+
+        try:
+            queued_nonces = [
+                int(tx["nonce"])
+                for tx in self.get_tx_service().get_transactions(self.address.hex)
+                if not tx.get("isExecuted")
+            ]
+        except Exception:
+            queued_nonces = []
+
+        return max([nonce] + [queued_nonce + 1 for queued_nonce in queued_nonces if queued_nonce >= nonce])
 
     @staticmethod
     def is_valid_safe(client: EthereumClient, address: ETHAddress) -> bool:
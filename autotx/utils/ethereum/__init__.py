@@ -5,6 +5,7 @@ from .cache import cache
 from .transfer_erc20 import transfer_erc20
 from .build_transfer_erc20 import build_transfer_erc20
 from .get_erc20_balance import get_erc20_balance
+from .get_token_balances import get_token_balances
 from .SafeManager import SafeManager
 from .build_approve_erc20 import build_approve_erc20
 from .get_erc20_info import get_erc20_info
@@ -25,6 +26,7 @@ __all__ = [
     "build_transfer_erc20",
     "build_approve_erc20",
     "get_erc20_balance",
+    "get_token_balances",
     "get_erc20_info",
     "SafeManager",
     "is_valid_safe",
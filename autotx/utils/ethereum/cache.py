@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Optional
 
 class Cache:
@@ -20,9 +21,19 @@ class Cache:
             print(f"An error occurred while reading {file_name}: {e}")
             raise
 
+    def exists(self, file_name: str) -> bool:
+        return os.path.isfile(os.path.join(self.folder, file_name))
+
+    # Written to a temporary file first, so readers in other processes never see a partially written file
     def write(self, file_name: str, data: str) -> None:
-        with open(os.path.join(self.folder, file_name), "w") as f:
-            f.write(data)
+        (fd, temp_path) = tempfile.mkstemp(dir=self.folder, prefix=f".{file_name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(temp_path, os.path.join(self.folder, file_name))
+        except Exception:
+            os.remove(temp_path)
+            raise
 
     def remove(self, file_name: str) -> None:
         try:
@@ -2,12 +2,17 @@ from web3 import Web3
 
 from autotx.eth_address import ETHAddress
 from .erc20_abi import ERC20_ABI
+from .get_token_balances import batch_call, decode_symbol
 
 def get_erc20_info(web3: Web3, token_address: ETHAddress) -> tuple[str, str, int]:
     erc20 = web3.eth.contract(address=token_address.hex, abi=ERC20_ABI)
 
-    name = erc20.functions.name().call()
-    symbol = erc20.functions.symbol().call()
-    decimals = erc20.functions.decimals().call()
+    name, symbol, decimals = batch_call(web3, [
+        erc20.functions.name(),
+        erc20.functions.symbol(),
+        erc20.functions.decimals(),
+    ])
+    if not isinstance(decimals, int):
+        raise Exception(f"Token {token_address.hex} is not a valid ERC20 token")
 
-    return name, symbol, decimals
\ No newline at end of file
+    return decode_symbol(name), decode_symbol(symbol), decimals
@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Sequence
+
+from eth_abi.abi import decode
+from eth_typing import URI
+from gnosis.eth import EthereumClient
+from web3 import HTTPProvider, Web3
+from web3.contract.contract import ContractFunction
+
+from autotx.eth_address import ETHAddress
+from .constants import NATIVE_TOKEN_ADDRESS
+from .erc20_abi import ERC20_ABI
+from .helpers.get_native_token_symbol import get_native_token_symbol
+from .networks import ChainId
+
+MAX_ETHEREUM_CLIENTS = 32
+# Deployed at the same address on every supported chain
+MULTICALL3_ADDRESS = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL3_ABI = [
+    {
+        "name": "aggregate3",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [{
+            "name": "calls",
+            "type": "tuple[]",
+            "components": [
+                { "name": "target", "type": "address" },
+                { "name": "allowFailure", "type": "bool" },
+                { "name": "callData", "type": "bytes" },
+            ],
+        }],
+        "outputs": [{
+            "name": "returnData",
+            "type": "tuple[]",
+            "components": [
+                { "name": "success", "type": "bool" },
+                { "name": "returnData", "type": "bytes" },
+            ],
+        }],
+    },
+    {
+        "name": "getEthBalance",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{ "name": "addr", "type": "address" }],
+        "outputs": [{ "name": "balance", "type": "uint256" }],
+    },
+]
+
+_clients: OrderedDict[str, EthereumClient] = OrderedDict()
+_clients_lock = Lock()
+
+# One client per RPC url, its HTTP session keeps the connections to the node alive
+def get_ethereum_client_for_url(rpc_url: str) -> EthereumClient:
+    with _clients_lock:
+        if rpc_url not in _clients:
+            _clients[rpc_url] = EthereumClient(URI(rpc_url))
+        _clients.move_to_end(rpc_url)
+        while len(_clients) > MAX_ETHEREUM_CLIENTS:
+            _clients.popitem(last=False)
+        return _clients[rpc_url]
+
+def get_ethereum_client(web3: Web3) -> EthereumClient:
+    if not isinstance(web3.provider, HTTPProvider):
+        raise Exception(f"An EthereumClient needs an HTTP provider, got {type(web3.provider).__name__}")
+    return get_ethereum_client_for_url(str(web3.provider.endpoint_uri))
+
+def decode_result(call: ContractFunction, data: bytes) -> Any:
+    if not data:
+        return None
+    try:
+        values = decode([output["type"] for output in call.abi["outputs"]], data)
+    except Exception:
+        # Same as EthereumClient.batch_call, callers can decode the raw data themselves (e.g. bytes32 symbols)
+        return data
+    return values[0] if len(values) == 1 else values
+
+# Runs the calls with the caller's provider in one Multicall3 aggregate call. Where Multicall3 isn't deployed
+# they are sent as a JSON-RPC batch request (HTTP providers) or one by one. Failed calls return None
+def batch_call(web3: Web3, calls: list[ContractFunction]) -> list[Any]:
+    if len(calls) == 0:
+        return []
+
+    multicall = web3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+    try:
+        results = multicall.functions.aggregate3(
+            [(call.address, True, call._encode_transaction_data()) for call in calls]
+        ).call()
+        return [decode_result(call, data) if success else None for call, (success, data) in zip(calls, results)]
+    except Exception:
+        pass
+
+    if isinstance(web3.provider, HTTPProvider):
+        return get_ethereum_client(web3).batch_call(calls, raise_exception=False, force_batch_call=True)
+
+    values: list[Any] = []
+    for call in calls:
+        try:
+            values.append(call.call())
+        except Exception:
+            values.append(None)
+    return values
+
+@dataclass
+class TokenBalance:
+    token: ETHAddress
+    owner: ETHAddress | None
+    symbol: str
+    decimals: int
+    balance: int | None
+
+    @property
+    def amount(self) -> float:
+        return (self.balance or 0) / 10 ** self.decimals # type: ignore
+
+def decode_symbol(symbol: Any) -> str:
+    # Some old tokens (e.g. MKR) return the symbol as bytes32
+    if isinstance(symbol, bytes):
+        try:
+            return str(decode(["bytes32"], symbol)[0].rstrip(b"\0").decode("utf-8"))
+        except Exception:
+            return symbol.rstrip(b"\0").decode("utf-8", errors="ignore")
+    return str(symbol)
+
+# Symbols, decimals and balances of (token, owner) pairs, the native token is read with Multicall3's getEthBalance.
+# Without an owner only the token's metadata is read
+def get_token_balances(web3: Web3, pairs: Sequence[tuple[ETHAddress, ETHAddress | None]], chain: ChainId | None = None) -> list[TokenBalance]:
+    multicall = web3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+
+    tokens = list({ token.hex: token for (token, _) in pairs if token.hex != NATIVE_TOKEN_ADDRESS }.values())
+    calls: list[ContractFunction] = []
+    for token in tokens:
+        erc20 = web3.eth.contract(address=token.hex, abi=ERC20_ABI)
+        calls.extend([erc20.functions.symbol(), erc20.functions.decimals()])
+
+    balance_calls: list[tuple[int, ContractFunction]] = []
+    for i, (token, owner) in enumerate(pairs):
+        if owner is None:
+            continue
+        if token.hex == NATIVE_TOKEN_ADDRESS:
+            balance_calls.append((i, multicall.functions.getEthBalance(owner.hex)))
+        else:
+            erc20 = web3.eth.contract(address=token.hex, abi=ERC20_ABI)
+            balance_calls.append((i, erc20.functions.balanceOf(owner.hex)))
+
+    results = batch_call(web3, calls + [call for (_, call) in balance_calls])
+
+    metadata: dict[str, tuple[str, int]] = {}
+    for j, token in enumerate(tokens):
+        symbol, decimals = results[2 * j], results[2 * j + 1]
+        if not isinstance(decimals, int):
+            raise Exception(f"Token {token.hex} is not a valid ERC20 token")
+        metadata[token.hex] = (decode_symbol(symbol) if symbol is not None else "", decimals)
+
+    balances: dict[int, int] = {}
+    for j, (i, _) in enumerate(balance_calls):
+        (token, owner) = pairs[i]
+        balance = results[len(calls) + j]
+        if not isinstance(balance, int) and token.hex == NATIVE_TOKEN_ADDRESS and owner is not None:
+            # getEthBalance is only available where Multicall3 is deployed
+            balance = web3.eth.get_balance(owner.hex)
+        if not isinstance(balance, int):
+            raise Exception(f"Failed to fetch balance of token {token.hex}")
+        balances[i] = balance
+
+    native_token_symbol: str | None = None
+    token_balances: list[TokenBalance] = []
+    for i, (token, owner) in enumerate(pairs):
+        if token.hex == NATIVE_TOKEN_ADDRESS:
+            if native_token_symbol is None:
+                native_token_symbol = get_native_token_symbol(chain or ChainId(web3.eth.chain_id))
+            token_balances.append(TokenBalance(
+                token=token,
+                owner=owner,
+                symbol=native_token_symbol,
+                decimals=18,
+                balance=balances.get(i),
+            ))
+        else:
+            (symbol, decimals) = metadata[token.hex]
+            token_balances.append(TokenBalance(
+                token=token,
+                owner=owner,
+                symbol=symbol,
+                decimals=decimals,
+                balance=balances.get(i),
+            ))
+
+    return token_balances
@@ -1,12 +1,14 @@
+from hexbytes import HexBytes
 from web3 import Web3
 from autotx.utils.ethereum import transfer_erc20
 from autotx.utils.ethereum.constants import NATIVE_TOKEN_ADDRESS
 from autotx.eth_address import ETHAddress
 from autotx.utils.ethereum.helpers.get_dev_account import get_dev_account
-from autotx.utils.ethereum.helpers.swap_from_eoa import swap
+from autotx.utils.ethereum.helpers.swap_from_eoa import send_swap_transactions
 from autotx.utils.ethereum.networks import ChainId, NetworkInfo
+from autotx.utils.ethereum.receipt_tracker import wait_for_receipts
 
-from autotx.utils.ethereum.send_native import send_native
+from autotx.utils.ethereum.send_native import send_native_tx
 
 
 def fill_dev_account_with_tokens(
@@ -17,7 +19,6 @@ def fill_dev_account_with_tokens(
     dev_account = get_dev_account()
     # XDAI or MATIC doesn't have the same value as ETH, so we need to fill more
     amount_to_fill = 3000 if network_info.chain_id in [ChainId.POLYGON, ChainId.GNOSIS] else 10
-    send_native(dev_account, safe_address, amount_to_fill, web3)
 
     tokens_to_transfer = {"usdc": 3500, "dai": 3500, "wbtc": 0.1}
     if network_info.chain_id is ChainId.GNOSIS:
@@ -25,17 +26,40 @@ def fill_dev_account_with_tokens(
     if network_info.chain_id is ChainId.POLYGON:
         tokens_to_transfer = {"usdc": 2000, "wbtc": 0.01, "dai": 2000 }
 
+    tokens = [
+        (ETHAddress(network_info.tokens[token]), tokens_to_transfer[token])
+        for token in network_info.tokens
+        if token in tokens_to_transfer
+    ]
+
+    # Transactions are sent with consecutive nonces without waiting for each other, then confirmed together.
+    # The swaps go first, the transfers can only be estimated once the swapped tokens are in the dev account
+    nonce: int = web3.eth.get_transaction_count(dev_account.address, "pending")
+    hashes: list[HexBytes] = [send_native_tx(dev_account, safe_address, amount_to_fill, web3, nonce)]
+    nonce += 1
+
     native_token_address = ETHAddress(NATIVE_TOKEN_ADDRESS)
-    for token in network_info.tokens:
-        if token in tokens_to_transfer:
-            token_address = ETHAddress(network_info.tokens[token])
-            amount = tokens_to_transfer[token]
-            swap(
-                web3,
-                dev_account,
-                amount,
-                native_token_address,
-                token_address,
-                network_info.chain_id,
-            )
-            transfer_erc20(web3, token_address, dev_account, safe_address, amount)
+    for token_address, amount in tokens:
+        swap_hashes = send_swap_transactions(
+            web3,
+            dev_account,
+            amount,
+            native_token_address,
+            token_address,
+            network_info.chain_id,
+            nonce,
+        )
+        nonce += len(swap_hashes)
+        hashes.extend(swap_hashes)
+
+    wait_for_successful_receipts(web3, hashes)
+
+    wait_for_successful_receipts(web3, [
+        transfer_erc20(web3, token_address, dev_account, safe_address, amount, nonce + i)
+        for i, (token_address, amount) in enumerate(tokens)
+    ])
+
+def wait_for_successful_receipts(web3: Web3, hashes: list[HexBytes]) -> None:
+    for receipt in wait_for_receipts(web3, hashes):
+        if receipt["status"] == 0:
+            raise Exception(f"Transaction {receipt['transactionHash'].hex()} to fill the dev account failed")
@@ -1,22 +1,27 @@
 from decimal import Decimal
 from typing import cast
 from eth_account.signers.local import LocalAccount
+from hexbytes import HexBytes
 from web3 import Web3
 from web3.types import TxParams
 
 from autotx.eth_address import ETHAddress
 from autotx.utils.ethereum.lifi.swap import build_swap_transaction
 from autotx.utils.ethereum.networks import ChainId
+from autotx.utils.ethereum.receipt_tracker import get_receipt_tracker
 
 
-def swap(
+# Every transaction but the last is waited for, as the next one depends on it (e.g. the approval before the swap).
+# The hash of the last one is returned without waiting, so its confirmation can overlap other transactions
+def send_swap_transactions(
     web3: Web3,
     user: LocalAccount,
     amount: float,
     from_token: ETHAddress,
     to_token: ETHAddress,
     chain: ChainId,
-) -> None:
+    nonce: int | None = None,
+) -> list[HexBytes]:
     txs = build_swap_transaction(
         web3,
         Decimal(str(amount)),
@@ -27,7 +32,16 @@ def swap(
         chain
     )
 
-    for tx in txs:
+    if nonce is None:
+        nonce = web3.eth.get_transaction_count(user.address)
+
+    hashes: list[HexBytes] = []
+    for i, tx in enumerate(txs):
+        if i > 0:
+            receipt = get_receipt_tracker(web3).wait(hashes[-1])
+            if receipt["status"] == 0:
+                raise Exception(f"Transaction to swap {from_token.hex} to {amount} {to_token.hex} failed")
+
         del tx.params["gas"]
         gas = web3.eth.estimate_gas(cast(TxParams, tx.params))
         tx.params.update({"gas": gas})
@@ -35,13 +49,23 @@ def swap(
         transaction = user.sign_transaction(  # type: ignore
             {
                 **tx.params,
-                "nonce": web3.eth.get_transaction_count(user.address),
+                "nonce": nonce + i,
             }
         )
 
-        hash = web3.eth.send_raw_transaction(transaction.rawTransaction)
+        hashes.append(HexBytes(web3.eth.send_raw_transaction(transaction.rawTransaction)))
 
-        receipt = web3.eth.wait_for_transaction_receipt(hash)
+    return hashes
+
+def swap(
+    web3: Web3,
+    user: LocalAccount,
+    amount: float,
+    from_token: ETHAddress,
+    to_token: ETHAddress,
+    chain: ChainId,
+) -> None:
+    hashes = send_swap_transactions(web3, user, amount, from_token, to_token, chain)
 
-        if receipt["status"] == 0:
-            print(f"Transaction to swap {from_token.hex} to {amount} {to_token.hex} failed")
+    if len(hashes) > 0 and get_receipt_tracker(web3).wait(hashes[-1])["status"] == 0:
+        print(f"Transaction to swap {from_token.hex} to {amount} {to_token.hex} failed")
@@ -0,0 +1,170 @@
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from typing import Iterator, Union
+
+from web3 import Web3
+
+# Binary layout (little endian):
+#   header  | magic, version, chain count, row count
+#   chains  | chain id, first row, row count (sorted by chain id)
+#   rows    | checksum address, decimals, flags, symbol and name offsets (sorted by chain id, then lowercase symbol)
+#             decimals are 0 when the token list has no valid decimals for the token, with FLAG_UNKNOWN_DECIMALS set
+#   strings | utf-8 blob referenced by the rows
+TOKEN_REGISTRY_PATH = os.path.join(os.path.dirname(__file__), "token_list.bin")
+
+MAGIC = b"ATXTOKEN"
+VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+CHAIN = struct.Struct("<QII")
+ROW = struct.Struct("<40sBBIHIH")
+
+FLAG_CHECKSUMMED = 1
+FLAG_UNKNOWN_DECIMALS = 2
+
+@dataclass(frozen=True)
+class TokenInfo:
+    chain_id: int
+    address: str
+    symbol: str
+    name: str
+    decimals: int | None
+    checksummed: bool
+
+class TokenRegistry:
+    def __init__(self, path: str = TOKEN_REGISTRY_PATH):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, chain_count, row_count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f"Invalid token registry: {path}. Run `poetry run load-tokens` to regenerate it")
+
+        self.row_count = row_count
+        self.chains: dict[int, tuple[int, int]] = {}
+        for i in range(chain_count):
+            chain_id, first_row, count = CHAIN.unpack_from(self.buffer, HEADER.size + i * CHAIN.size)
+            self.chains[chain_id] = (first_row, count)
+
+        self.rows_offset = HEADER.size + chain_count * CHAIN.size
+        self.strings_offset = self.rows_offset + row_count * ROW.size
+
+    def row(self, chain_id: int, index: int) -> TokenInfo:
+        address, decimals, flags, symbol_offset, symbol_len, name_offset, name_len = ROW.unpack_from(
+            self.buffer, self.rows_offset + index * ROW.size
+        )
+
+        return TokenInfo(
+            chain_id=chain_id,
+            address="0x" + address.decode("ascii"),
+            symbol=self.string(symbol_offset, symbol_len),
+            name=self.string(name_offset, name_len),
+            decimals=None if flags & FLAG_UNKNOWN_DECIMALS else decimals,
+            checksummed=bool(flags & FLAG_CHECKSUMMED),
+        )
+
+    def string(self, offset: int, length: int) -> str:
+        start = self.strings_offset + offset
+        return self.buffer[start:start + length].decode("utf-8")
+
+    def symbol_at(self, index: int) -> str:
+        row = ROW.unpack_from(self.buffer, self.rows_offset + index * ROW.size)
+        return self.string(row[3], row[4]).lower()
+
+    def tokens(self, chain_id: int) -> Iterator[TokenInfo]:
+        (first, count) = self.chains.get(chain_id, (0, 0))
+        for index in range(first, first + count):
+            yield self.row(chain_id, index)
+
+    def find(self, chain_id: int, symbol: str) -> TokenInfo | None:
+        (first, count) = self.chains.get(chain_id, (0, 0))
+        symbol = symbol.lower()
+
+        # Rows of a chain are sorted by symbol, find the first row past the symbol
+        low, high = first, first + count
+        while low < high:
+            middle = (low + high) // 2
+            if self.symbol_at(middle) <= symbol:
+                low = middle + 1
+            else:
+                high = middle
+
+        # Duplicated symbols keep the token list order, the last checksummed one wins
+        index = low - 1
+        while index >= first and self.symbol_at(index) == symbol:
+            token = self.row(chain_id, index)
+            if token.checksummed:
+                return token
+            index -= 1
+
+        return None
+
+    def tokens_for_chain(self, chain_id: int) -> dict[str, str]:
+        return {
+            token.symbol.lower(): token.address
+            for token in self.tokens(chain_id)
+            if token.checksummed
+        }
+
+_token_registry: TokenRegistry | None = None
+
+def get_token_registry() -> TokenRegistry:
+    global _token_registry
+    if _token_registry is None:
+        _token_registry = TokenRegistry()
+    return _token_registry
+
+def parse_decimals(value: object) -> int | None:
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 0xFF:
+        return value
+    return None
+
+def write_token_registry(token_list: list[dict[str, Union[str, int]]], path: str = TOKEN_REGISTRY_PATH) -> None:
+    tokens = [
+        token
+        for token in token_list
+        if isinstance(token.get("chainId"), int) and isinstance(token.get("symbol"), str) and Web3.is_address(token.get("address"))
+    ]
+    # Stable sort keeps the original order for duplicated symbols
+    tokens.sort(key=lambda token: (int(token["chainId"]), str(token["symbol"]).lower()))
+
+    chains: dict[int, list[int]] = {}
+    rows = bytearray()
+    strings = bytearray()
+
+    def add_string(value: str) -> tuple[int, int]:
+        encoded = value.encode("utf-8")[:0xFFFF]
+        offset = len(strings)
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    for index, token in enumerate(tokens):
+        chain_id = int(token["chainId"])
+        address = str(token["address"])
+        if chain_id not in chains:
+            chains[chain_id] = [index, 0]
+        chains[chain_id][1] += 1
+
+        symbol_offset, symbol_len = add_string(str(token["symbol"]))
+        name_offset, name_len = add_string(str(token.get("name", "")))
+        decimals = parse_decimals(token.get("decimals"))
+
+        rows.extend(ROW.pack(
+            Web3.to_checksum_address(address)[2:].encode("ascii"),
+            decimals or 0,
+            (FLAG_CHECKSUMMED if Web3.is_checksum_address(address) else 0) | (FLAG_UNKNOWN_DECIMALS if decimals is None else 0),
+            symbol_offset,
+            symbol_len,
+            name_offset,
+            name_len,
+        ))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(chains), len(tokens)))
+        for chain_id, (first_row, count) in chains.items():
+            f.write(CHAIN.pack(chain_id, first_row, count))
+        f.write(rows)
+        f.write(strings)
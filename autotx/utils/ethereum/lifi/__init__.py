@@ -1,5 +1,10 @@
 import asyncio
-from typing import Any
+from dataclasses import dataclass, field
+import json
+import random
+from threading import Lock
+import time
+from typing import Any, AsyncGenerator
 import re
 import aiohttp
 
@@ -7,19 +12,48 @@ from autotx.utils.constants import LIFI_API_KEY
 from autotx.eth_address import ETHAddress
 from autotx.utils.ethereum.networks import ChainId
 
+MAX_ATTEMPTS = 6
+REQUEST_TIMEOUT_SEC = 10
+BACKOFF_BASE_SEC = 0.5
+BACKOFF_MAX_SEC = 8
+# LiFi allows ~100 requests per minute without an API key, keyed clients only back off when rate limited
+REQUESTS_PER_SECOND = 1.5
+BURST_SIZE = 5
+MAX_CONNECTIONS = 20
+
 
 class LifiApiError(Exception):
     pass
 
 
+class RateLimitExceeded(LifiApiError):
+    def __init__(self, retry_after: float | None):
+        super().__init__("Rate limit exceeded")
+        self.retry_after = retry_after
+
+
 class TokenNotSupported(LifiApiError):
     def __init__(self, token_address: str):
         super().__init__(token_address)
         self.token_address = token_address
 
 
+def get_retry_after(response: aiohttp.ClientResponse) -> float | None:
+    for header in ["retry-after", "ratelimit-reset"]:
+        value = response.headers.get(header)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    return None
+
+
 async def handle_lifi_response(response: aiohttp.ClientResponse) -> dict[str, Any]:
-    response_json: dict[str, Any] = await response.json()
+    if response.status == 429:
+        raise RateLimitExceeded(get_retry_after(response))
+
+    response_json: dict[str, Any] = await response.json(content_type=None)
     if response.status == 200:
         return response_json
 
@@ -29,20 +63,160 @@ async def handle_lifi_response(response: aiohttp.ClientResponse) -> dict[str, An
             token_address = match.group()
             raise TokenNotSupported(token_address)
 
-    if response.status == 429 or (
-        response_json["message"] == "Unauthorized" and response_json["code"] == 1005
-    ):
-        raise LifiApiError("Rate limit exceeded")
+    if response_json["message"] == "Unauthorized" and response_json["code"] == 1005:
+        raise RateLimitExceeded(get_retry_after(response))
 
     raise LifiApiError(f"Fetch quote failed with error: {response_json['message']}")
 
 
-def add_authorization_info_if_provided(params: dict[str, Any]) -> dict[str, Any] | None:
-    headers: dict[str, Any] | None = None
+def add_integrator_if_authorized(params: dict[str, Any]) -> None:
     if LIFI_API_KEY:
-        headers = {"x-lifi-api-key": LIFI_API_KEY}
         params["integrator"] = "polywrap"
-    return headers
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, RateLimitExceeded)):
+        return True
+    return "No available quotes for the requested transfer" in str(error) or "Unable to find quote to match expected output" in str(error)
+
+
+def get_backoff_delay(attempt: int) -> float:
+    # Full jitter keeps concurrent retries from hitting the API in lockstep
+    return random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** attempt))
+
+
+# Without a rate, requests are only held back after the API reported the limit was reached
+class TokenBucket:
+    def __init__(self, rate: float | None, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = Lock()
+
+    def reserve(self) -> float:
+        # Takes a token and returns how long the caller must wait before using it
+        with self.lock:
+            now = time.monotonic()
+            if self.rate is None:
+                return self.blocked_until - now
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+            return max(wait, self.blocked_until - now)
+
+    def block(self, seconds: float) -> None:
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            if self.rate is not None:
+                self.tokens = min(self.tokens, 0)
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class LoopState:
+    session: aiohttp.ClientSession
+    in_flight: dict[str, "asyncio.Future[dict[str, Any]]"] = field(default_factory=dict)
+    finalizer: AsyncGenerator[None, None] | None = None
+
+
+class LifiClient:
+    # aiohttp sessions are bound to an event loop, the CLI and the server each get one session per running loop
+    def __init__(self, base_url: str, rate: float | None = REQUESTS_PER_SECOND, burst: int = BURST_SIZE):
+        self.base_url = base_url
+        self.bucket = TokenBucket(rate, burst)
+        self.states: dict[asyncio.AbstractEventLoop, LoopState] = {}
+        self.lock = Lock()
+
+    async def get_state(self) -> LoopState:
+        loop = asyncio.get_running_loop()
+        state = self.states.get(loop)
+        if state is None or state.session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS, ttl_dns_cache=300, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SEC),
+            )
+            state = LoopState(session)
+            with self.lock:
+                # Loops that were closed without shutting down their async generators
+                for closed_loop in [closed_loop for closed_loop in self.states if closed_loop.is_closed()]:
+                    del self.states[closed_loop]
+                self.states[loop] = state
+            state.finalizer = self.close_on_shutdown(loop, state)
+            await state.finalizer.__anext__()
+        return state
+
+    # asyncio.run (and uvicorn) close the async generators of a loop before closing it, which closes its session
+    async def close_on_shutdown(self, loop: asyncio.AbstractEventLoop, state: LoopState) -> AsyncGenerator[None, None]:
+        try:
+            yield
+        finally:
+            with self.lock:
+                if self.states.get(loop) is state:
+                    del self.states[loop]
+            await state.session.close()
+
+    async def request(self, method: str, path: str, params: dict[str, Any] | None = None, json_body: dict[str, Any] | None = None) -> dict[str, Any]:
+        state = await self.get_state()
+
+        # Identical requests already in flight share the same response
+        key = json.dumps([method, path, params, json_body], sort_keys=True)
+        in_flight = state.in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        state.in_flight[key] = future
+        try:
+            result = await self.send(state.session, method, path, params, json_body)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting for it
+            future.exception()
+            raise
+        finally:
+            del state.in_flight[key]
+
+    async def send(self, session: aiohttp.ClientSession, method: str, path: str, params: dict[str, Any] | None, json_body: dict[str, Any] | None) -> dict[str, Any]:
+        headers: dict[str, str] | None = None
+        if LIFI_API_KEY:
+            headers = {"x-lifi-api-key": LIFI_API_KEY}
+        query = { key: str(value) for key, value in params.items() } if params else None
+
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                async with session.request(method, self.base_url + path, params=query, json=json_body, headers=headers) as response:
+                    if response.headers.get("ratelimit-remaining") == "0":
+                        self.bucket.block(get_retry_after(response) or 1)
+                    return await handle_lifi_response(response)
+            except Exception as e:
+                if attempt + 1 >= MAX_ATTEMPTS or not is_retryable(e):
+                    raise e
+
+                delay = get_backoff_delay(attempt)
+                if isinstance(e, RateLimitExceeded):
+                    self.bucket.block(max(delay, e.retry_after or 0))
+                else:
+                    await asyncio.sleep(delay)
+                attempt += 1
+
+    async def close(self) -> None:
+        state = self.states.get(asyncio.get_running_loop())
+        if state is not None and state.finalizer is not None:
+            await state.finalizer.aclose()
 
 
 class Lifi:
@@ -68,28 +242,9 @@ class Lifi:
             "slippage": slippage,
             "contractCalls": [],
         }
-        headers = add_authorization_info_if_provided(params)
-       
-        async with aiohttp.ClientSession() as session:
-            attempt_count = 0
-            while True:
-                try:
-                    response = await session.post(cls.BASE_URL + "/quote/contractCalls", json=params, headers=headers, timeout=10)
-                    result = await handle_lifi_response(response)
-                    return result
-                except asyncio.TimeoutError as e:
-                    if attempt_count < 5:
-                        attempt_count += 1
-                        await asyncio.sleep(0.5)                   
-                        continue
-                    raise e
-                except Exception as e:
-                    if "No available quotes for the requested transfer" in str(e) or "Unable to find quote to match expected output" in str(e):
-                        if attempt_count < 5:
-                            attempt_count += 1
-                            await asyncio.sleep(0.5)                   
-                            continue
-                    raise e
+        add_integrator_if_authorized(params)
+
+        return await lifi_client.request("POST", "/quote/contractCalls", json_body=params)
 
     @classmethod
     async def get_quote_from_amount(
@@ -101,7 +256,7 @@ class Lifi:
         chain: ChainId,
         slippage: float,
     ) -> dict[str, Any]:
-        params = {
+        params: dict[str, Any] = {
             "fromToken": from_token.hex,
             "toToken": to_token.hex,
             "fromAmount": amount,
@@ -110,25 +265,9 @@ class Lifi:
             "toChain": chain.value,
             "slippage": slippage,
         }
-        headers = add_authorization_info_if_provided(params)
-
-        async with aiohttp.ClientSession() as session:
-            attempt_count = 0
-            while True:
-                try:
-                    response = await session.get(cls.BASE_URL + "/quote", params=params, headers=headers, timeout=10)
-                    result = await handle_lifi_response(response)
-                    return result
-                except asyncio.TimeoutError as e:
-                    if attempt_count < 5:
-                        attempt_count += 1
-                        await asyncio.sleep(0.5)                   
-                        continue
-                    raise e
-                except Exception as e:
-                    if "No available quotes for the requested transfer" in str(e) or "Unable to find quote to match expected output" in str(e):
-                        if attempt_count < 5:
-                            attempt_count += 1
-                            await asyncio.sleep(0.5)                   
-                            continue
-                    raise e
\ No newline at end of file
+        add_integrator_if_authorized(params)
+
+        return await lifi_client.request("GET", "/quote", params=params)
+
+
+lifi_client = LifiClient(Lifi.BASE_URL, None if LIFI_API_KEY else REQUESTS_PER_SECOND)
@@ -1,6 +1,7 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from decimal import Decimal
+import time
 from typing import Any, cast
 
 from web3 import Web3
@@ -9,14 +10,18 @@ from autotx.transactions import ApproveTransaction, SwapTransaction, Transaction
 from autotx.utils.ethereum.constants import GAS_PRICE_MULTIPLIER, NATIVE_TOKEN_ADDRESS
 from autotx.utils.ethereum.erc20_abi import ERC20_ABI
 from autotx.eth_address import ETHAddress
-from autotx.utils.ethereum.helpers.get_native_token_symbol import (
-    get_native_token_symbol,
-)
+from autotx.utils.ethereum.token_metadata import get_tokens_metadata
 from autotx.utils.ethereum.lifi import Lifi, TokenNotSupported
 from autotx.utils.ethereum.networks import ChainId
+from autotx.utils.run_blocking import run_blocking
+from autotx.utils.ttl_cache import TTLCache
 from web3.types import TxParams, Wei
 
 SLIPPAGE = 0.005  # 0.5%
+# LiFi quotes carry the gas price and route of the moment they were made, they are only reused for a short while
+# and as long as the price didn't move more than their slippage allows
+QUOTE_TTL_SEC = 30
+TOKEN_PRICE_TTL_SEC = QUOTE_TTL_SEC
 
 SUPPORTED_NETWORKS_BY_LIFI = [
     ChainId.MAINNET,
@@ -32,10 +37,62 @@ SUPPORTED_NETWORKS_BY_LIFI = [
 class QuoteInformation:
     approval_address: str
     amount_in: int
+    to_amount: int
     to_amount_min: int
     transaction: TxParams
     exchange_name: str
+    expires_at: float
+    # Price of the input token in output tokens, from their USD prices when the quote was made
+    price_ratio: float | None
 
+@dataclass(frozen=True)
+class QuoteKey:
+    chain_id: int
+    token_in_address: str
+    token_out_address: str
+    amount: str
+    amount_is_output: bool
+    from_address: str
+    slippage: float
+
+# Quotes fetched while validating a swap are reused when the intent builds its transactions
+quote_store: TTLCache[QuoteKey, QuoteInformation] = TTLCache(256, QUOTE_TTL_SEC)
+token_prices: TTLCache[tuple[int, str], float] = TTLCache(1024, TOKEN_PRICE_TTL_SEC)
+
+def parse_price(price: Any) -> float | None:
+    try:
+        value = float(price)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 and value != float("inf") else None
+
+def get_price_ratio(price_in: Any, price_out: Any) -> float | None:
+    (parsed_in, parsed_out) = (parse_price(price_in), parse_price(price_out))
+    if parsed_in is None or parsed_out is None:
+        return None
+    return parsed_in / parsed_out
+
+# The quoted transaction reverts once the output falls below to_amount_min, so the quote can still be executed
+# while the market moved against it by less than the margin between to_amount and to_amount_min
+def is_quote_valid(quote: QuoteInformation, price_ratio: float | None) -> bool:
+    if quote.expires_at <= time.time() or quote.price_ratio is None or price_ratio is None or quote.to_amount <= 0:
+        return False
+    return price_ratio >= quote.price_ratio * quote.to_amount_min / quote.to_amount
+
+# Prices are the latest ones seen in a LiFi quote for the tokens, no request is made to validate a stored quote
+def get_stored_quote(key: QuoteKey, chain: ChainId, token_in_address: ETHAddress, token_out_address: ETHAddress) -> QuoteInformation | None:
+    stored_quote = quote_store.get(key)
+    if stored_quote is None:
+        return None
+
+    price_in = token_prices.get((chain.value, token_in_address.hex))
+    price_out = token_prices.get((chain.value, token_out_address.hex))
+    if not is_quote_valid(stored_quote, get_price_ratio(price_in, price_out)):
+        quote_store.invalidate(key)
+        return None
+
+    # Callers update the transaction (e.g. its gas), the stored quote keeps its own
+    return replace(stored_quote, transaction=TxParams(**stored_quote.transaction))
 
 async def get_quote(
     token_in_address: ETHAddress,
@@ -49,6 +106,19 @@ async def get_quote(
     amount_is_output: bool,
     from_address: ETHAddress,
 ) -> QuoteInformation:
+    key = QuoteKey(
+        chain.value,
+        token_in_address.hex,
+        token_out_address.hex,
+        str(expected_amount),
+        amount_is_output,
+        from_address.hex,
+        SLIPPAGE,
+    )
+    stored_quote = get_stored_quote(key, chain, token_in_address, token_out_address)
+    if stored_quote:
+        return stored_quote
+
     quote: dict[str, Any] | None = None
     try:
         if amount_is_output:
@@ -103,12 +173,49 @@ async def get_quote(
             "chainId": quote["transactionRequest"]["chainId"]
         }
     )
-    return QuoteInformation(
+    price_in = quote.get("action", {}).get("fromToken", {}).get("priceUSD")
+    price_out = quote.get("action", {}).get("toToken", {}).get("priceUSD")
+    quote_information = QuoteInformation(
         quote["estimate"]["approvalAddress"],
         amount_in_integer,
+        int(quote["estimate"]["toAmount"]),
         int(quote["estimate"]["toAmountMin"]),
         transaction,
         quote["toolDetails"]["name"],
+        time.time() + QUOTE_TTL_SEC,
+        get_price_ratio(price_in, price_out),
+    )
+    quote_store.set(key, replace(quote_information, transaction=TxParams(**transaction)))
+    # A malformed price only keeps the quote from being reused, it never fails the swap
+    for (token_address, price) in [(token_in_address, price_in), (token_out_address, price_out)]:
+        parsed_price = parse_price(price)
+        if parsed_price is not None:
+            token_prices.set((chain.value, token_address.hex), parsed_price)
+
+    return quote_information
+
+def build_approve_transaction_if_needed(
+    web3: Web3,
+    token_in_address: ETHAddress,
+    _from: ETHAddress,
+    quote: QuoteInformation,
+) -> TxParams | None:
+    token_in = web3.eth.contract(
+        address=token_in_address.hex, abi=ERC20_ABI
+    )
+    allowance = token_in.functions.allowance(_from.hex, quote.approval_address).call()
+    if allowance >= quote.amount_in:
+        return None
+
+    return token_in.functions.approve(
+        quote.approval_address, quote.amount_in
+    ).build_transaction(
+        {
+            "from": _from.hex,
+            "gasPrice": Wei(
+                int(web3.eth.gas_price * GAS_PRICE_MULTIPLIER)
+            ),
+        }
     )
 
 def build_swap_transaction(
@@ -131,33 +238,14 @@ async def a_build_swap_transaction(
     is_exact_input: bool,
     chain: ChainId,
 ) -> list[Transaction]:
-    native_token_symbol = get_native_token_symbol(chain)
     token_in_is_native = token_in_address.hex == NATIVE_TOKEN_ADDRESS
-    token_in = web3.eth.contract(
-        address=token_in_address.hex, abi=ERC20_ABI
-    )
-    token_in_symbol = (
-        native_token_symbol
-        if token_in_is_native
-        else token_in.functions.symbol().call()
-    )
-    token_in_decimals = (
-        18 if token_in_is_native else token_in.functions.decimals().call()
-    )
-
-    token_out_is_native = token_out_address.hex == NATIVE_TOKEN_ADDRESS
-    token_out = web3.eth.contract(
-        address=token_out_address.hex, abi=ERC20_ABI
-    )
-    token_out_decimals = (
-        18 if token_out_is_native else token_out.functions.decimals().call()
-    )
-
-    token_out_symbol = (
-        native_token_symbol
-        if token_out_is_native
-        else token_out.functions.symbol().call()
+    (token_in_info, token_out_info) = await run_blocking(
+        get_tokens_metadata, web3, chain, [token_in_address, token_out_address]
     )
+    token_in_symbol = token_in_info.symbol
+    token_in_decimals = token_in_info.decimals
+    token_out_symbol = token_out_info.symbol
+    token_out_decimals = token_out_info.decimals
     
     quote = await get_quote(
         token_in_address,
@@ -173,24 +261,13 @@ async def a_build_swap_transaction(
     )
     transactions: list[Transaction] = []
     if not token_in_is_native:
-        approval_address = quote.approval_address
-        allowance = token_in.functions.allowance(_from.hex, approval_address).call()
-        if allowance < quote.amount_in:
-            tx = token_in.functions.approve(
-                approval_address, quote.amount_in
-            ).build_transaction(
-                {
-                    "from": _from.hex,
-                    "gasPrice": Wei(
-                        int(web3.eth.gas_price * GAS_PRICE_MULTIPLIER)
-                    ),
-                }
-            )
+        tx = await run_blocking(build_approve_transaction_if_needed, web3, token_in_address, _from, quote)
+        if tx:
             transactions.append(
                 ApproveTransaction.create(
                     token=Token(symbol=token_in_symbol, address=str(token_in_address)),
                     amount=float(Decimal(str(quote.amount_in)) / 10 ** token_in_decimals),
-                    spender=approval_address,
+                    spender=quote.approval_address,
                     params=cast(dict[str, Any], tx),
                 )
             )
@@ -225,33 +302,14 @@ async def a_can_build_swap_transaction(
     is_exact_input: bool,
     chain: ChainId,
 ) -> bool:
-    native_token_symbol = get_native_token_symbol(chain)
     token_in_is_native = token_in_address.hex == NATIVE_TOKEN_ADDRESS
-    token_in = web3.eth.contract(
-        address=token_in_address.hex, abi=ERC20_ABI
-    )
-    token_in_symbol = (
-        native_token_symbol
-        if token_in_is_native
-        else token_in.functions.symbol().call()
-    )
-    token_in_decimals = (
-        18 if token_in_is_native else token_in.functions.decimals().call()
-    )
-
-    token_out_is_native = token_out_address.hex == NATIVE_TOKEN_ADDRESS
-    token_out = web3.eth.contract(
-        address=token_out_address.hex, abi=ERC20_ABI
-    )
-    token_out_decimals = (
-        18 if token_out_is_native else token_out.functions.decimals().call()
-    )
-
-    token_out_symbol = (
-        native_token_symbol
-        if token_out_is_native
-        else token_out.functions.symbol().call()
+    (token_in_info, token_out_info) = await run_blocking(
+        get_tokens_metadata, web3, chain, [token_in_address, token_out_address]
     )
+    token_in_symbol = token_in_info.symbol
+    token_in_decimals = token_in_info.decimals
+    token_out_symbol = token_out_info.symbol
+    token_out_decimals = token_out_info.decimals
 
     quote = await get_quote(
         token_in_address,
@@ -266,17 +324,5 @@ async def a_can_build_swap_transaction(
         _from,
     )
     if not token_in_is_native:
-        approval_address = quote.approval_address
-        allowance = token_in.functions.allowance(_from.hex, approval_address).call()
-        if allowance < quote.amount_in:
-            tx = token_in.functions.approve(
-                approval_address, quote.amount_in
-            ).build_transaction(
-                {
-                    "from": _from.hex,
-                    "gasPrice": Wei(
-                        int(web3.eth.gas_price * GAS_PRICE_MULTIPLIER)
-                    ),
-                }
-            )
+        await run_blocking(build_approve_transaction_if_needed, web3, token_in_address, _from, quote)
     return True
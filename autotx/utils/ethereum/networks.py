@@ -1,11 +1,13 @@
 from dataclasses import dataclass
-from typing import cast
+from threading import Lock
+from types import MappingProxyType
+from typing import Iterator, Mapping, MutableMapping
 from gnosis.eth import EthereumNetwork
 from web3 import Web3, HTTPProvider
 
 from autotx.utils.constants import ALCHEMY_API_KEY
 from autotx.utils.ethereum.constants import NATIVE_TOKEN_ADDRESS
-from autotx.utils.ethereum.helpers.token_list import token_list
+from autotx.utils.ethereum.helpers.token_registry import get_token_registry
 
 ChainId = EthereumNetwork
 
@@ -27,10 +29,99 @@ SUPPORTED_ALCHEMY_NETWORKS: dict[ChainId, str] = {
     ChainId.ZKSYNC_V2: "zksync-mainnet",
 }
 
+# Copy-on-write view over the shared tokens of a chain, writes stay local to the instance
+class TokensOverlay(MutableMapping[str, str]):
+    base: Mapping[str, str]
+    added: dict[str, str]
+    removed: set[str]
+
+    def __init__(self, base: Mapping[str, str]):
+        self.base = base
+        self.added = {}
+        self.removed = set()
+
+    def __getitem__(self, symbol: str) -> str:
+        if symbol in self.added:
+            return self.added[symbol]
+        if symbol in self.removed:
+            raise KeyError(symbol)
+        return self.base[symbol]
+
+    def __setitem__(self, symbol: str, address: str) -> None:
+        self.removed.discard(symbol)
+        self.added[symbol] = address
+
+    def __delitem__(self, symbol: str) -> None:
+        if symbol not in self:
+            raise KeyError(symbol)
+        self.added.pop(symbol, None)
+        if symbol in self.base:
+            self.removed.add(symbol)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self.added or (symbol not in self.removed and symbol in self.base)
+
+    def __iter__(self) -> Iterator[str]:
+        for symbol in self.base:
+            if symbol not in self.removed and symbol not in self.added:
+                yield symbol
+        yield from self.added
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+# Symbols are looked up through the registry's sorted index, the whole symbol map of the chain
+# is only decoded the first time it's iterated
+class ChainTokens(Mapping[str, str]):
+    chain_id: ChainId
+    default_tokens: dict[str, str]
+
+    def __init__(self, chain_id: ChainId, default_tokens: dict[str, str]):
+        self.chain_id = chain_id
+        self.default_tokens = default_tokens
+        self.symbols: Mapping[str, str] | None = None
+        self.lock = Lock()
+
+    def __getitem__(self, symbol: str) -> str:
+        if symbol in self.default_tokens:
+            return self.default_tokens[symbol]
+        # Keys are lowercase symbols, like the map returned by tokens_for_chain
+        if not isinstance(symbol, str) or symbol != symbol.lower():
+            raise KeyError(symbol)
+
+        token = get_token_registry().find(self.chain_id.value, symbol)
+        if token is None:
+            raise KeyError(symbol)
+        return token.address
+
+    def all(self) -> Mapping[str, str]:
+        with self.lock:
+            if self.symbols is None:
+                self.symbols = MappingProxyType(
+                    { **get_token_registry().tokens_for_chain(self.chain_id.value), **self.default_tokens }
+                )
+            return self.symbols
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        return len(self.all())
+
+_chain_tokens: dict[ChainId, ChainTokens] = {}
+_chain_tokens_lock = Lock()
+
+# The tokens of a chain are shared by every NetworkInfo
+def get_chain_tokens(chain_id: ChainId) -> Mapping[str, str]:
+    with _chain_tokens_lock:
+        if chain_id not in _chain_tokens:
+            _chain_tokens[chain_id] = ChainTokens(chain_id, SUPPORTED_NETWORKS_CONFIGURATION_MAP[chain_id].default_tokens)
+        return _chain_tokens[chain_id]
+
 class NetworkInfo:
     chain_id: ChainId
     transaction_service_url: str
-    tokens: dict[str, str]
+    tokens: MutableMapping[str, str]
 
     def __init__(
         self,
@@ -43,7 +134,7 @@ class NetworkInfo:
             raise Exception(f"Chain ID {chain_id} is not supported")
 
         self.transaction_service_url = config.transaction_service_url
-        self.tokens = { **self.fetch_tokens_for_chain(chain_id), **config.default_tokens }
+        self.tokens = TokensOverlay(get_chain_tokens(self.chain_id))
 
     @staticmethod
     def from_chain_id(chain_id: int) -> 'NetworkInfo':
@@ -55,13 +146,6 @@ class NetworkInfo:
         chain_id = web3.eth.chain_id
         return NetworkInfo(chain_id)
 
-    def fetch_tokens_for_chain(self, chain_id: int) -> dict[str, str]:
-        return {
-            cast(str, token["symbol"]).lower(): Web3.to_checksum_address(cast(str, token["address"]))
-            for token in token_list
-            if token["chainId"] == chain_id and Web3.is_checksum_address(cast(str, token["address"]))
-        }
-
     def get_subsidized_rpc_url(self) -> str | None:
         network = SUPPORTED_ALCHEMY_NETWORKS.get(self.chain_id)
 
@@ -0,0 +1,196 @@
+import asyncio
+import concurrent.futures
+from concurrent.futures import Future
+import json
+from threading import Event, Lock, Thread
+import time
+from typing import Any, cast
+
+from hexbytes import HexBytes
+from web3 import HTTPProvider, Web3, WebsocketProvider
+from web3._utils.method_formatters import receipt_formatter
+from web3.exceptions import TimeExhausted
+from web3.types import RPCEndpoint, TxReceipt
+from websockets.client import connect
+
+from .get_token_balances import get_ethereum_client_for_url
+
+# Same default as Web3's wait_for_transaction_receipt
+RECEIPT_TIMEOUT_SEC = 120
+RECEIPT_POLL_INTERVAL_SEC = 0.5
+# With a newHeads subscription receipts are fetched on every block, polling is only a fallback
+RECEIPT_SUBSCRIBED_POLL_INTERVAL_SEC = 5
+
+# Waits for the receipts of many transactions at once. Every poll fetches the receipts of all pending transactions
+# in a single JSON-RPC batch request (HTTP providers), on WebSocket providers a poll is triggered by every new block
+class ReceiptTracker:
+    web3: Web3
+    pending: dict[HexBytes, list[Future[TxReceipt]]]
+
+    def __init__(self, web3: Web3):
+        self.web3 = web3
+        self.pending = {}
+        self.lock = Lock()
+        self.wakeup = Event()
+        self.worker: Thread | None = None
+        self.subscriber: Thread | None = None
+        self.subscribed = False
+
+    def track(self, tx_hashes: list[HexBytes]) -> list[Future[TxReceipt]]:
+        futures: list[Future[TxReceipt]] = []
+        with self.lock:
+            for tx_hash in tx_hashes:
+                future: Future[TxReceipt] = Future()
+                self.pending.setdefault(HexBytes(tx_hash), []).append(future)
+                futures.append(future)
+
+            if self.worker is None:
+                self.worker = Thread(target=self.run, name="autotx-receipts", daemon=True)
+                self.worker.start()
+            if self.subscriber is None and isinstance(self.web3.provider, WebsocketProvider):
+                self.subscriber = Thread(target=self.follow_new_heads, name="autotx-new-heads", daemon=True)
+                self.subscriber.start()
+
+        self.wakeup.set()
+        return futures
+
+    def untrack(self, tx_hash: HexBytes, future: Future[TxReceipt]) -> None:
+        with self.lock:
+            futures = self.pending.get(HexBytes(tx_hash), [])
+            if future in futures:
+                futures.remove(future)
+            if len(futures) == 0:
+                self.pending.pop(HexBytes(tx_hash), None)
+
+    def wait(self, tx_hash: HexBytes, timeout: float = RECEIPT_TIMEOUT_SEC) -> TxReceipt:
+        return self.wait_all([tx_hash], timeout)[0]
+
+    # Receipts are returned in the order of the hashes, the timeout applies to the whole batch
+    def wait_all(self, tx_hashes: list[HexBytes], timeout: float = RECEIPT_TIMEOUT_SEC) -> list[TxReceipt]:
+        futures = self.track(tx_hashes)
+        deadline = time.monotonic() + timeout
+        try:
+            return [future.result(max(0, deadline - time.monotonic())) for future in futures]
+        # Before Python 3.11 concurrent.futures.TimeoutError is not the builtin TimeoutError
+        except concurrent.futures.TimeoutError:
+            raise self.timed_out(tx_hashes, futures, timeout)
+
+    async def a_wait_all(self, tx_hashes: list[HexBytes], timeout: float = RECEIPT_TIMEOUT_SEC) -> list[TxReceipt]:
+        futures = self.track(tx_hashes)
+        try:
+            return list(await asyncio.wait_for(asyncio.gather(*[asyncio.wrap_future(future) for future in futures]), timeout))
+        except asyncio.TimeoutError:
+            raise self.timed_out(tx_hashes, futures, timeout)
+
+    def timed_out(self, tx_hashes: list[HexBytes], futures: list[Future[TxReceipt]], timeout: float) -> TimeExhausted:
+        for tx_hash, future in zip(tx_hashes, futures):
+            self.untrack(tx_hash, future)
+
+        missing = [HexBytes(tx_hash).hex() for tx_hash, future in zip(tx_hashes, futures) if not future.done()]
+        return TimeExhausted(f"Transactions {', '.join(missing)} are not in the chain after {timeout} seconds")
+
+    def fetch_receipts(self, tx_hashes: list[HexBytes]) -> list[Any]:
+        if isinstance(self.web3.provider, HTTPProvider):
+            client = get_ethereum_client_for_url(str(self.web3.provider.endpoint_uri))
+            queries: list[Any] = [
+                {
+                    "jsonrpc": "2.0",
+                    "method": "eth_getTransactionReceipt",
+                    "params": [tx_hash.hex()],
+                    "id": i,
+                }
+                for i, tx_hash in enumerate(tx_hashes)
+            ]
+            response = client.http_session.post(client.ethereum_node_url, json=queries, timeout=30)
+            response.raise_for_status()
+            results = response.json()
+            if not isinstance(results, list):
+                raise Exception(f"Unexpected response to receipts batch: {results}")
+
+            by_id = { result.get("id"): result.get("result") for result in results if isinstance(result, dict) }
+            return [by_id.get(i) for i in range(len(tx_hashes))]
+
+        # Other providers don't support batch requests
+        return [
+            self.web3.provider.make_request(RPCEndpoint("eth_getTransactionReceipt"), [tx_hash.hex()]).get("result")
+            for tx_hash in tx_hashes
+        ]
+
+    def run(self) -> None:
+        while True:
+            with self.lock:
+                if len(self.pending) == 0:
+                    self.worker = None
+                    return
+                tx_hashes = list(self.pending.keys())
+
+            self.wakeup.clear()
+            try:
+                receipts = self.fetch_receipts(tx_hashes)
+            except Exception as e:
+                # Polling continues, the waiters time out if the node stays unreachable
+                print(f"Failed to fetch transaction receipts: {e}")
+                receipts = [None] * len(tx_hashes)
+
+            for tx_hash, receipt in zip(tx_hashes, receipts):
+                if receipt is None:
+                    continue
+
+                with self.lock:
+                    futures = self.pending.pop(tx_hash, [])
+                formatted = cast(TxReceipt, receipt_formatter(receipt))
+                for future in futures:
+                    if not future.done():
+                        future.set_result(formatted)
+
+            self.wakeup.wait(RECEIPT_SUBSCRIBED_POLL_INTERVAL_SEC if self.subscribed else RECEIPT_POLL_INTERVAL_SEC)
+
+    def follow_new_heads(self) -> None:
+        try:
+            asyncio.run(self.a_follow_new_heads(str(cast(WebsocketProvider, self.web3.provider).endpoint_uri)))
+        except Exception as e:
+            print(f"Subscription to new blocks failed, polling for receipts instead: {e}")
+        finally:
+            with self.lock:
+                self.subscribed = False
+                self.subscriber = None
+            self.wakeup.set()
+
+    # Wakes up the worker on every new block until no transaction is pending
+    async def a_follow_new_heads(self, endpoint_uri: str) -> None:
+        async with connect(endpoint_uri) as ws:
+            await ws.send(json.dumps({ "jsonrpc": "2.0", "method": "eth_subscribe", "params": ["newHeads"], "id": 1 }))
+            response = json.loads(await ws.recv())
+            if "result" not in response:
+                raise Exception(f"eth_subscribe failed: {response}")
+            self.subscribed = True
+
+            while True:
+                with self.lock:
+                    if len(self.pending) == 0:
+                        return
+
+                try:
+                    message = json.loads(await asyncio.wait_for(ws.recv(), RECEIPT_SUBSCRIBED_POLL_INTERVAL_SEC))
+                except asyncio.TimeoutError:
+                    continue
+
+                if message.get("method") == "eth_subscription":
+                    self.wakeup.set()
+
+_trackers: dict[str, ReceiptTracker] = {}
+_trackers_lock = Lock()
+
+# One tracker per node, so every transaction waited for on the node is fetched in the same poll
+def get_receipt_tracker(web3: Web3) -> ReceiptTracker:
+    endpoint_uri = str(getattr(web3.provider, "endpoint_uri", id(web3.provider)))
+    with _trackers_lock:
+        if endpoint_uri not in _trackers:
+            _trackers[endpoint_uri] = ReceiptTracker(web3)
+        return _trackers[endpoint_uri]
+
+def wait_for_receipts(web3: Web3, tx_hashes: list[HexBytes], timeout: float = RECEIPT_TIMEOUT_SEC) -> list[TxReceipt]:
+    return get_receipt_tracker(web3).wait_all(tx_hashes, timeout)
+
+async def a_wait_for_receipts(web3: Web3, tx_hashes: list[HexBytes], timeout: float = RECEIPT_TIMEOUT_SEC) -> list[TxReceipt]:
+    return await get_receipt_tracker(web3).a_wait_all(tx_hashes, timeout)
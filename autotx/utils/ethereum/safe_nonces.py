@@ -0,0 +1,121 @@
+from abc import abstractmethod
+from bisect import insort
+from dataclasses import dataclass, field
+from threading import Lock
+import time
+from typing import Callable
+
+from autotx.utils.ttl_cache import TTLCache
+
+# A reservation that wasn't proposed within this time is considered abandoned
+SAFE_NONCE_RESERVATION_TTL_SEC = 10 * 60
+# How long the nonce read from the chain and the transaction service is trusted before reading it again
+SAFE_NONCE_RECONCILE_INTERVAL_SEC = 30
+
+class SafeNonceStore:
+    # Reserves count consecutive nonces and returns the first one. Released nonces at or above min_nonce are handed
+    # out first, otherwise the nonces start at min_nonce or after the latest reservation
+    @abstractmethod
+    def reserve(self, chain_id: int, safe_address: str, count: int, min_nonce: int, reservation_ttl_sec: int) -> int:
+        pass
+
+    # Gives back reserved nonces, so the gap they would leave is filled by the next reservations that fit in it
+    @abstractmethod
+    def release(self, chain_id: int, safe_address: str, start_nonce: int, count: int) -> bool:
+        pass
+
+@dataclass
+class LocalSafeNonce:
+    next_nonce: int
+    reserved_at: float
+    # Released ranges below next_nonce as (start nonce, count), sorted and never adjacent
+    released: list[tuple[int, int]] = field(default_factory=list)
+
+# In-memory stand-in for the safe_nonces and released_safe_nonces tables, reservations are only shared within the process
+class LocalSafeNonceStore(SafeNonceStore):
+    nonces: dict[tuple[int, str], LocalSafeNonce]
+
+    def __init__(self) -> None:
+        self.nonces = {}
+        self.lock = Lock()
+
+    def reserve(self, chain_id: int, safe_address: str, count: int, min_nonce: int, reservation_ttl_sec: int) -> int:
+        with self.lock:
+            now = time.monotonic()
+            nonce = self.nonces.get((chain_id, safe_address))
+            if nonce is None or nonce.reserved_at < now - reservation_ttl_sec:
+                nonce = LocalSafeNonce(min_nonce, now)
+                self.nonces[(chain_id, safe_address)] = nonce
+            else:
+                nonce.next_nonce = max(nonce.next_nonce, min_nonce)
+                # Released nonces below min_nonce were used or proposed since
+                nonce.released = [
+                    (max(start, min_nonce), start + free_count - max(start, min_nonce))
+                    for (start, free_count) in nonce.released
+                    if start + free_count > min_nonce
+                ]
+                nonce.reserved_at = now
+
+            for i, (start, free_count) in enumerate(nonce.released):
+                if free_count >= count:
+                    if free_count == count:
+                        del nonce.released[i]
+                    else:
+                        nonce.released[i] = (start + count, free_count - count)
+                    return start
+
+            start_nonce = nonce.next_nonce
+            nonce.next_nonce += count
+            return start_nonce
+
+    def release(self, chain_id: int, safe_address: str, start_nonce: int, count: int) -> bool:
+        with self.lock:
+            nonce = self.nonces.get((chain_id, safe_address))
+            end_nonce = start_nonce + count
+            if nonce is None or end_nonce > nonce.next_nonce:
+                return False
+            if any(start < end_nonce and start_nonce < start + free_count for (start, free_count) in nonce.released):
+                return False
+
+            # Merge with the released ranges right before and after it
+            for (start, free_count) in list(nonce.released):
+                if start + free_count == start_nonce:
+                    start_nonce = start
+                    nonce.released.remove((start, free_count))
+                elif start == end_nonce:
+                    end_nonce = start + free_count
+                    nonce.released.remove((start, free_count))
+
+            if end_nonce == nonce.next_nonce:
+                nonce.next_nonce = start_nonce
+            else:
+                insort(nonce.released, (start_nonce, end_nonce - start_nonce))
+            return True
+
+# Hands out Safe nonces keyed by (chain, safe address), so concurrent proposals for the same Safe never share a nonce
+class SafeNonceAllocator:
+    store: SafeNonceStore
+    min_nonces: TTLCache[tuple[int, str], int]
+
+    def __init__(self, store: SafeNonceStore):
+        self.store = store
+        self.min_nonces = TTLCache(1024, SAFE_NONCE_RECONCILE_INTERVAL_SEC)
+
+    # get_min_nonce returns the lowest nonce that is free on chain and in the transaction service
+    def reserve(self, chain_id: int, safe_address: str, count: int, get_min_nonce: Callable[[], int]) -> int:
+        key = (chain_id, safe_address.lower())
+        min_nonce = self.min_nonces.get(key)
+        if min_nonce is None:
+            min_nonce = get_min_nonce()
+            self.min_nonces.set(key, min_nonce)
+
+        return self.store.reserve(chain_id, key[1], count, min_nonce, SAFE_NONCE_RESERVATION_TTL_SEC)
+
+    def release(self, chain_id: int, safe_address: str, start_nonce: int, count: int) -> bool:
+        return self.store.release(chain_id, safe_address.lower(), start_nonce, count)
+
+    # The next reservation reads the nonce from the chain and the transaction service again
+    def reconcile(self, chain_id: int, safe_address: str) -> None:
+        self.min_nonces.invalidate((chain_id, safe_address.lower()))
+
+safe_nonce_allocator = SafeNonceAllocator(LocalSafeNonceStore())
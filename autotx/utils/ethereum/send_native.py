@@ -1,23 +1,27 @@
 from eth_account.signers.local import LocalAccount
 from eth_typing import Address
+from hexbytes import HexBytes
 from web3 import Web3
-from web3.types import TxParams, TxReceipt, Wei
+from web3.types import Nonce, TxParams, TxReceipt, Wei
 
 from autotx.eth_address import ETHAddress
 
 from .constants import GAS_PRICE_MULTIPLIER
+from .receipt_tracker import get_receipt_tracker
 
-def send_native(account: LocalAccount, to: ETHAddress, value: float, web3: Web3) -> tuple[str, TxReceipt]:
+# Sends without waiting for the receipt, an explicit nonce lets several transactions be sent before any is mined
+def send_native_tx(account: LocalAccount, to: ETHAddress, value: float, web3: Web3, nonce: int | None = None) -> HexBytes:
     bytes_address: Address = Address(bytes.fromhex(account.address[2:]))
 
-    nonce = web3.eth.get_transaction_count(bytes_address)
+    if nonce is None:
+        nonce = web3.eth.get_transaction_count(bytes_address)
 
     tx: TxParams = {
         'from': account.address,
         'to': to.hex,
         'value': Wei(int(value * 10 ** 18)),
         'gasPrice': Wei(int(web3.eth.gas_price * GAS_PRICE_MULTIPLIER)),
-        'nonce': nonce,
+        'nonce': Nonce(nonce),
         'chainId': web3.eth.chain_id
     }
 
@@ -28,6 +32,9 @@ def send_native(account: LocalAccount, to: ETHAddress, value: float, web3: Web3)
 
     web3.eth.send_raw_transaction(signed_tx.rawTransaction)
 
-    receipt = web3.eth.wait_for_transaction_receipt(signed_tx.hash)
+    return HexBytes(signed_tx.hash)
+
+def send_native(account: LocalAccount, to: ETHAddress, value: float, web3: Web3) -> tuple[str, TxReceipt]:
+    receipt = get_receipt_tracker(web3).wait(send_native_tx(account, to, value, web3))
 
-    return receipt["transactionHash"].hex(), receipt
\ No newline at end of file
+    return receipt["transactionHash"].hex(), receipt
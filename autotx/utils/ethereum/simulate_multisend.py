@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import Any
+
+from eth_abi.abi import decode
+from gnosis.eth import EthereumClient
+from gnosis.eth.contracts import get_multi_send_contract, get_safe_V1_3_0_contract
+from gnosis.safe.multi_send import MultiSendOperation, MultiSendTx
+from hexbytes import HexBytes
+from web3.types import TxParams
+
+from .constants import MULTI_SEND_ADDRESS
+
+ERROR_SELECTOR = HexBytes("0x08c379a0")
+PANIC_SELECTOR = HexBytes("0x4e487b71")
+
+@dataclass
+class MultisendRevert:
+    # Position of the reverting transaction in the batch
+    index: int
+    reason: str
+    # The reason comes from running the transaction on its own, it can differ from why it reverts in the batch
+    guessed: bool = False
+
+    def describe(self) -> str:
+        return f"possibly {self.reason}" if self.guessed else self.reason
+
+def decode_revert_reason(output: str | None) -> str | None:
+    if not output or output == "0x":
+        return None
+
+    data = HexBytes(output)
+    try:
+        if data[:4] == ERROR_SELECTOR:
+            return str(decode(["string"], data[4:])[0])
+        if data[:4] == PANIC_SELECTOR:
+            return f"Panic({decode(['uint256'], data[4:])[0]})"
+    except Exception:
+        pass
+
+    return data.hex()
+
+def get_error_data(response: dict[str, Any]) -> str | None:
+    if isinstance(response.get("error"), dict) and isinstance(response["error"].get("data"), str):
+        return str(response["error"]["data"])
+    if isinstance(response.get("result"), str):
+        return str(response["result"])
+    return None
+
+# The Safe's simulateAndRevert delegatecalls the multisend in the Safe's context and reverts with
+# (success, return data), so the whole batch runs with the Safe as sender without signatures
+def build_simulation_call(client: EthereumClient, safe_address: str, multisend_address: str, txs: list[TxParams | dict[str, Any]]) -> dict[str, Any]:
+    multisend_data = b"".join([
+        MultiSendTx(MultiSendOperation.CALL, str(tx["to"]), tx["value"], tx["data"]).encoded_data
+        for tx in txs
+    ])
+    multisend_call = get_multi_send_contract(client.w3, multisend_address).encodeABI(fn_name="multiSend", args=[multisend_data])
+
+    return {
+        "from": safe_address,
+        "to": safe_address,
+        "data": get_safe_V1_3_0_contract(client.w3, safe_address).encodeABI(fn_name="simulateAndRevert", args=[multisend_address, HexBytes(multisend_call)]),
+    }
+
+def rpc_request(client: EthereumClient, payload: Any) -> Any:
+    response = client.http_session.post(client.ethereum_node_url, json=payload, timeout=30)
+    if not response.ok:
+        return None
+    return response.json()
+
+def find_revert_in_trace(trace: dict[str, Any], multisend_address: str) -> MultisendRevert | None:
+    frames = [trace]
+    while frames:
+        frame = frames.pop(0)
+        if frame.get("type") == "DELEGATECALL" and str(frame.get("to", "")).lower() == multisend_address.lower():
+            # Each inner transaction is a child call of the multisend, the batch stops at the first one that reverts
+            for i, call in enumerate(frame.get("calls", [])):
+                if call.get("error"):
+                    reason = call.get("revertReason") or decode_revert_reason(call.get("output")) or call["error"]
+                    return MultisendRevert(i, str(reason))
+            return None
+        frames.extend(frame.get("calls", []))
+
+    return None
+
+# Runs the batch once with a call tracer (debug_traceCall), which reports the inner call that reverted and why
+def trace_multisend(client: EthereumClient, call: dict[str, Any], multisend_address: str) -> tuple[bool, MultisendRevert | None]:
+    response = rpc_request(client, {
+        "jsonrpc": "2.0",
+        "method": "debug_traceCall",
+        "params": [call, "latest", { "tracer": "callTracer" }],
+        "id": 1,
+    })
+    if not isinstance(response, dict) or not isinstance(response.get("result"), dict):
+        return (False, None)
+
+    return (True, find_revert_in_trace(response["result"], multisend_address))
+
+# Without a tracer, every prefix of the batch is simulated in a single JSON-RPC batch request: the first prefix
+# that fails ends with the reverting transaction. Multisend contracts from v1.4.1 pass its revert data on, older
+# ones revert without data. The reason then comes from calling the transaction directly from the Safe, on the state
+# before the batch, so it is only a best guess
+def simulate_multisend_prefixes(client: EthereumClient, safe_address: str, multisend_address: str, txs: list[TxParams | dict[str, Any]]) -> MultisendRevert | None:
+    queries = [
+        {
+            "jsonrpc": "2.0",
+            "method": "eth_call",
+            "params": [build_simulation_call(client, safe_address, multisend_address, txs[:i + 1]), "latest"],
+            "id": i,
+        }
+        for i in range(len(txs))
+    ] + [
+        {
+            "jsonrpc": "2.0",
+            "method": "eth_call",
+            "params": [{ "from": safe_address, "to": str(tx["to"]), "value": hex(tx["value"]), "data": HexBytes(tx["data"]).hex() }, "latest"],
+            "id": len(txs) + i,
+        }
+        for i, tx in enumerate(txs)
+    ]
+
+    responses = rpc_request(client, queries)
+    if not isinstance(responses, list):
+        return None
+    by_id = { response.get("id"): response for response in responses if isinstance(response, dict) }
+
+    for i in range(len(txs)):
+        error_data = get_error_data(by_id.get(i, {}))
+        if not error_data or "0x" not in error_data:
+            return None
+
+        # simulateAndRevert's revert data is the success flag, the size of the return data and the return data
+        result = HexBytes(error_data[error_data.find("0x"):])
+        if len(result) < 32:
+            return None
+        if int.from_bytes(result[:32], "big") == 0:
+            reason = decode_revert_reason(HexBytes(result[64:]).hex()) if len(result) > 64 else None
+            if reason:
+                return MultisendRevert(i, reason)
+
+            direct_call = by_id.get(len(txs) + i, {})
+            direct_reason = decode_revert_reason(get_error_data(direct_call)) if "error" in direct_call else None
+            if direct_reason:
+                return MultisendRevert(i, direct_reason, guessed=True)
+            return MultisendRevert(i, "execution reverted")
+
+    return None
+
+# Returns the transaction of the batch that would revert if the Safe executed it as a multisend, None if the batch
+# succeeds or can't be simulated (e.g. the Safe is not deployed)
+def find_multisend_revert(client: EthereumClient, safe_address: str, txs: list[TxParams | dict[str, Any]], multisend_address: str = MULTI_SEND_ADDRESS) -> MultisendRevert | None:
+    if len(txs) == 0:
+        return None
+
+    try:
+        call = build_simulation_call(client, safe_address, multisend_address, txs)
+        (traced, revert) = trace_multisend(client, call, multisend_address)
+        if traced:
+            return revert
+
+        return simulate_multisend_prefixes(client, safe_address, multisend_address, txs)
+    except Exception:
+        return None
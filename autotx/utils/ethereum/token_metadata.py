@@ -0,0 +1,140 @@
+from dataclasses import asdict, dataclass
+import json
+from threading import Lock
+import time
+
+from web3 import Web3
+
+from autotx.eth_address import ETHAddress
+from .cache import cache
+from .constants import NATIVE_TOKEN_ADDRESS
+from .get_token_balances import get_token_balances
+from .helpers.get_native_token_symbol import get_native_token_symbol
+from .helpers.token_registry import get_token_registry
+from .networks import ChainId
+
+TOKEN_METADATA_FILE_NAME = "token-metadata.json"
+# Decimals and symbols never change, unless the token is a proxy whose implementation can be upgraded
+PROXY_TOKEN_METADATA_TTL_SEC = 60 * 60
+# keccak256("eip1967.proxy.implementation") - 1
+EIP1967_IMPLEMENTATION_SLOT = 0x360894a13ba1a3210667c828492db98dca3e2076cc3735a920a3ca505d382bbc
+
+@dataclass
+class TokenMetadata:
+    symbol: str
+    decimals: int
+    expires_at: float | None = None
+
+class TokenMetadataCache:
+    entries: dict[str, TokenMetadata]
+    seeded_chains: dict[int, dict[str, TokenMetadata]]
+
+    def __init__(self) -> None:
+        self.entries = {}
+        self.seeded_chains = {}
+        self.loaded = False
+        self.lock = Lock()
+
+    @staticmethod
+    def key(chain_id: int, address: str) -> str:
+        return f"{chain_id}:{address.lower()}"
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+        self.loaded = True
+        if not cache.exists(TOKEN_METADATA_FILE_NAME):
+            return
+        try:
+            data = cache.read(TOKEN_METADATA_FILE_NAME)
+            self.entries = { key: TokenMetadata(**value) for key, value in json.loads(data or "{}").items() }
+        except Exception:
+            # A corrupted cache is rebuilt from scratch
+            self.entries = {}
+
+    def save(self) -> None:
+        cache.write(TOKEN_METADATA_FILE_NAME, json.dumps({ key: asdict(value) for key, value in self.entries.items() }))
+
+    def seed(self, chain_id: int) -> dict[str, TokenMetadata]:
+        if chain_id not in self.seeded_chains:
+            self.seeded_chains[chain_id] = {
+                token.address.lower(): TokenMetadata(token.symbol, token.decimals)
+                for token in get_token_registry().tokens(chain_id)
+                if token.decimals is not None
+            }
+        return self.seeded_chains[chain_id]
+
+    def get(self, chain_id: int, address: str) -> TokenMetadata | None:
+        with self.lock:
+            self.load()
+            metadata = self.entries.get(self.key(chain_id, address))
+            if metadata and (metadata.expires_at is None or metadata.expires_at > time.time()):
+                return metadata
+            return None
+
+    # Metadata of the token list, it's only trusted once the token is known not to be an upgradeable proxy
+    def get_seeded(self, chain_id: int, address: str) -> TokenMetadata | None:
+        with self.lock:
+            return self.seed(chain_id).get(address.lower())
+
+    def set(self, chain_id: int, address: str, metadata: TokenMetadata) -> None:
+        self.set_many(chain_id, { address: metadata })
+
+    # The file is rewritten once for all the tokens
+    def set_many(self, chain_id: int, metadata: dict[str, TokenMetadata]) -> None:
+        with self.lock:
+            self.load()
+            for address, token_metadata in metadata.items():
+                self.entries[self.key(chain_id, address)] = token_metadata
+            self.save()
+
+    def invalidate(self, chain_id: int, address: str) -> None:
+        with self.lock:
+            self.load()
+            if self.entries.pop(self.key(chain_id, address), None):
+                self.save()
+
+token_metadata_cache = TokenMetadataCache()
+
+def is_proxy_token(web3: Web3, token_address: ETHAddress) -> bool:
+    implementation = web3.eth.get_storage_at(token_address.hex, EIP1967_IMPLEMENTATION_SLOT)
+    return int.from_bytes(implementation, "big") != 0
+
+def get_tokens_metadata(web3: Web3, chain: ChainId, token_addresses: list[ETHAddress]) -> list[TokenMetadata]:
+    metadata: dict[str, TokenMetadata] = {}
+    missing: list[ETHAddress] = []
+
+    for token_address in token_addresses:
+        if token_address.hex == NATIVE_TOKEN_ADDRESS:
+            metadata[token_address.hex] = TokenMetadata(get_native_token_symbol(chain), 18)
+            continue
+
+        cached = token_metadata_cache.get(chain.value, token_address.hex)
+        if cached:
+            metadata[token_address.hex] = cached
+        elif all(token_address.hex != missing_address.hex for missing_address in missing):
+            missing.append(token_address)
+
+    # Tokens of the token list are only read from the chain if they are proxies, the others are cached for good
+    seeded: dict[str, TokenMetadata] = {}
+    for token_address in list(missing):
+        seeded_metadata = token_metadata_cache.get_seeded(chain.value, token_address.hex)
+        if seeded_metadata and not is_proxy_token(web3, token_address):
+            seeded[token_address.hex] = seeded_metadata
+            missing.remove(token_address)
+    if seeded:
+        token_metadata_cache.set_many(chain.value, seeded)
+        metadata.update(seeded)
+
+    if missing:
+        fetched: dict[str, TokenMetadata] = {}
+        for token_info in get_token_balances(web3, [(token_address, None) for token_address in missing], chain):
+            fetched[token_info.token.hex] = TokenMetadata(
+                token_info.symbol,
+                token_info.decimals,
+                time.time() + PROXY_TOKEN_METADATA_TTL_SEC if is_proxy_token(web3, token_info.token) else None
+            )
+        token_metadata_cache.set_many(chain.value, fetched)
+        metadata.update(fetched)
+
+    return [metadata[token_address.hex] for token_address in token_addresses]
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+import random
+from threading import Lock
+import time
+from typing import Any
+
+from gnosis.eth import EthereumClient, EthereumNetwork
+from gnosis.safe import SafeTx
+from gnosis.safe.api import TransactionServiceApi
+from gnosis.safe.api.base_api import SafeAPIException
+import requests
+
+TX_SERVICE_MAX_CONCURRENT_POSTS = 8
+TX_SERVICE_MAX_ATTEMPTS = 4
+TX_SERVICE_BACKOFF_BASE_SEC = 0.5
+TX_SERVICE_BACKOFF_MAX_SEC = 8
+
+class TransactionServiceUnavailable(SafeAPIException):
+    pass
+
+# Raised when some transactions of a batch were not posted, posted tells which ones were
+class SafeTransactionsNotPosted(Exception):
+    def __init__(self, error: BaseException, posted: list[bool]):
+        super().__init__(str(error))
+        self.error = error
+        self.posted = posted
+
+class PooledTransactionServiceApi(TransactionServiceApi):
+    # Rate limited and server errors are raised separately, those requests are safe to retry
+    def _post_request(self, url: str, payload: dict[str, Any]) -> requests.Response:
+        response = super()._post_request(url, payload)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransactionServiceUnavailable(f"Transaction service responded with {response.status_code}: {response.content!r}")
+        return response
+
+_ts_apis: dict[tuple[EthereumNetwork, str | None], PooledTransactionServiceApi] = {}
+_ts_apis_lock = Lock()
+
+executor = ThreadPoolExecutor(max_workers=TX_SERVICE_MAX_CONCURRENT_POSTS, thread_name_prefix="autotx-tx-service")
+
+# One client per network, its HTTP session keeps the connections to the transaction service alive
+def get_transaction_service_api(network: EthereumNetwork, client: EthereumClient, base_url: str | None) -> PooledTransactionServiceApi:
+    with _ts_apis_lock:
+        key = (network, base_url)
+        if key not in _ts_apis:
+            _ts_apis[key] = PooledTransactionServiceApi(network, ethereum_client=client, base_url=base_url)
+        return _ts_apis[key]
+
+def is_transaction_posted(ts_api: TransactionServiceApi, safe_tx: SafeTx) -> bool:
+    try:
+        ts_api.get_safe_transaction(safe_tx.safe_tx_hash)
+        return True
+    except (SafeAPIException, requests.RequestException):
+        return False
+
+# Safe tx hashes are deterministic, so a transaction that was already posted (e.g. by an attempt that timed out) is not an error
+def post_safe_transaction(ts_api: TransactionServiceApi, safe_tx: SafeTx) -> None:
+    for attempt in range(TX_SERVICE_MAX_ATTEMPTS):
+        try:
+            ts_api.post_transaction(safe_tx)
+            return
+        except (TransactionServiceUnavailable, requests.RequestException) as e:
+            if attempt == TX_SERVICE_MAX_ATTEMPTS - 1:
+                if is_transaction_posted(ts_api, safe_tx):
+                    return
+                raise e
+        except SafeAPIException as e:
+            if is_transaction_posted(ts_api, safe_tx):
+                return
+            raise e
+
+        time.sleep(random.uniform(0, min(TX_SERVICE_BACKOFF_MAX_SEC, TX_SERVICE_BACKOFF_BASE_SEC * 2 ** attempt)))
+
+# Posts the transactions of a nonce range concurrently, the transaction service accepts them in any order
+def post_safe_transactions(ts_api: TransactionServiceApi, safe_txs: list[SafeTx]) -> None:
+    if len(safe_txs) == 1:
+        try:
+            post_safe_transaction(ts_api, safe_txs[0])
+        except Exception as e:
+            raise SafeTransactionsNotPosted(e, [False]) from e
+        return
+
+    futures = [executor.submit(post_safe_transaction, ts_api, safe_tx) for safe_tx in safe_txs]
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error:
+            raise SafeTransactionsNotPosted(error, [e is None for e in errors]) from error
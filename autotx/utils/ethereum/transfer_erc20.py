@@ -1,7 +1,7 @@
 from eth_account.signers.local import LocalAccount
 from hexbytes import HexBytes
 from web3 import Web3
-from web3.types import Wei
+from web3.types import Nonce, TxParams, Wei
 from web3.middleware.signing import construct_sign_and_send_raw_middleware
 
 from autotx.eth_address import ETHAddress
@@ -17,6 +17,7 @@ def transfer_erc20(
     from_account: LocalAccount,
     to: ETHAddress,
     value: float,
+    nonce: int | None = None,
 ) -> HexBytes:
     account_middleware = construct_sign_and_send_raw_middleware(from_account)
     web3.middleware_onion.add(account_middleware)
@@ -24,12 +25,14 @@ def transfer_erc20(
     erc20 = web3.eth.contract(address=token_address.hex, abi=ERC20_ABI)
     decimals = erc20.functions.decimals().call()
 
-    tx_hash = erc20.functions.transfer(to.hex, int(value * 10**decimals)).transact(
-        {
-            "from": from_account.address,
-            "gasPrice": Wei(int(web3.eth.gas_price * GAS_PRICE_MULTIPLIER)),
-        }
-    )
+    tx: TxParams = {
+        "from": from_account.address,
+        "gasPrice": Wei(int(web3.eth.gas_price * GAS_PRICE_MULTIPLIER)),
+    }
+    if nonce is not None:
+        tx["nonce"] = Nonce(nonce)
+
+    tx_hash = erc20.functions.transfer(to.hex, int(value * 10**decimals)).transact(tx)
 
     web3.middleware_onion.remove(account_middleware) # type: ignore
 
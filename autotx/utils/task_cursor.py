@@ -0,0 +1,25 @@
+import base64
+from datetime import datetime
+import json
+import re
+import uuid
+
+# Postgres drops trailing zeros of the fraction, which datetime.fromisoformat only accepts from Python 3.11
+FRACTION_PATTERN = re.compile(r"\.(\d{1,6})(?=[+-]|$)")
+
+class InvalidCursor(Exception):
+    pass
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(FRACTION_PATTERN.sub(lambda match: "." + match.group(1).ljust(6, "0"), value, count=1))
+
+# Opaque position in the tasks list, tasks are ordered by creation time and then id
+def encode_task_cursor(created_at: str, task_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, task_id]).encode()).decode()
+
+def decode_task_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        (created_at, task_id) = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (parse_timestamp(created_at).isoformat(), str(uuid.UUID(task_id)))
+    except Exception:
+        raise InvalidCursor(cursor)
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class TTLCache(Generic[K, V]):
+    maxsize: int
+    ttl: float
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.lock = Lock()
+
+    # Returns (True, value) on a hit, which lets callers cache None as a negative result
+    def lookup(self, key: K) -> tuple[bool, V | None]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return (False, None)
+
+            (expires_at, value) = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return (False, None)
+
+            self.entries.move_to_end(key)
+            return (True, value)
+
+    def get(self, key: K) -> V | None:
+        return self.lookup(key)[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
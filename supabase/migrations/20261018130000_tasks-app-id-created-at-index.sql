@@ -0,0 +1 @@
+CREATE INDEX tasks_app_id_created_at_idx ON public.tasks USING btree (app_id, created_at);
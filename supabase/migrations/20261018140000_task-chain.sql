@@ -0,0 +1,27 @@
+CREATE OR REPLACE FUNCTION public.get_task_chain(p_task_id uuid, p_app_id uuid)
+RETURNS TABLE (id uuid, previous_task_id uuid, prompt text, intents json, feedback text, depth integer)
+LANGUAGE sql
+STABLE
+AS $function$
+    WITH RECURSIVE chain AS (
+        SELECT t.id, t.previous_task_id, t.prompt, t.intents, t.feedback, 0 AS depth
+        FROM public.tasks t
+        WHERE t.id = p_task_id AND t.app_id = p_app_id
+        UNION ALL
+        SELECT t.id, t.previous_task_id, t.prompt, t.intents, t.feedback, chain.depth + 1
+        FROM public.tasks t
+        JOIN chain ON t.id = chain.previous_task_id
+        WHERE t.app_id = p_app_id AND chain.depth < 1000
+    )
+    SELECT chain.id, chain.previous_task_id, chain.prompt, chain.intents, chain.feedback, chain.depth
+    FROM chain
+    ORDER BY chain.depth;
+$function$;
+
+revoke execute on function "public"."get_task_chain"(uuid, uuid) from public;
+
+revoke execute on function "public"."get_task_chain"(uuid, uuid) from "anon";
+
+revoke execute on function "public"."get_task_chain"(uuid, uuid) from "authenticated";
+
+grant execute on function "public"."get_task_chain"(uuid, uuid) to "service_role";
@@ -0,0 +1,123 @@
+alter table "public"."tasks" add column "status" text;
+
+update "public"."tasks" set "status" = case
+    when "running" then 'running'
+    when "error" is not null then 'failed'
+    else 'completed'
+end;
+
+alter table "public"."tasks" alter column "status" set not null;
+
+alter table "public"."tasks" alter column "status" set default 'queued';
+
+create table "public"."task_queue" (
+    "task_id" uuid not null,
+    "app_id" uuid not null,
+    "app_user_id" uuid not null,
+    "status" text not null default 'queued',
+    "enqueued_at" timestamp with time zone not null default now(),
+    "started_at" timestamp with time zone,
+    "finished_at" timestamp with time zone,
+    "worker_id" text,
+    "lease_expires_at" timestamp with time zone,
+    "attempts" integer not null default 0
+);
+
+
+alter table "public"."task_queue" enable row level security;
+
+CREATE UNIQUE INDEX task_queue_pkey ON public.task_queue USING btree (task_id);
+
+CREATE INDEX task_queue_status_enqueued_at_idx ON public.task_queue USING btree (status, enqueued_at);
+
+alter table "public"."task_queue" add constraint "task_queue_pkey" PRIMARY KEY using index "task_queue_pkey";
+
+alter table "public"."task_queue" add constraint "public_task_queue_task_id_fkey" FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE not valid;
+
+alter table "public"."task_queue" validate constraint "public_task_queue_task_id_fkey";
+
+alter table "public"."task_queue" add constraint "public_task_queue_app_id_fkey" FOREIGN KEY (app_id) REFERENCES apps(id) ON DELETE CASCADE not valid;
+
+alter table "public"."task_queue" validate constraint "public_task_queue_app_id_fkey";
+
+alter table "public"."task_queue" add constraint "public_task_queue_app_user_id_fkey" FOREIGN KEY (app_user_id) REFERENCES app_users(id) ON DELETE CASCADE not valid;
+
+alter table "public"."task_queue" validate constraint "public_task_queue_app_user_id_fkey";
+
+-- Claims the oldest queued task (or a running one whose worker stopped renewing its lease), skipping apps and users at their quota
+CREATE OR REPLACE FUNCTION public.claim_queued_task(p_worker_id text, p_lease_seconds integer, p_excluded_app_ids uuid[], p_excluded_app_user_ids uuid[])
+RETURNS SETOF public.task_queue
+LANGUAGE plpgsql
+AS $function$
+BEGIN
+    RETURN QUERY
+    UPDATE public.task_queue q
+    SET "status" = 'running',
+        "worker_id" = p_worker_id,
+        "started_at" = now(),
+        "lease_expires_at" = now() + make_interval(secs => p_lease_seconds),
+        "attempts" = q.attempts + 1
+    WHERE q.task_id = (
+        SELECT c.task_id
+        FROM public.task_queue c
+        WHERE (c.status = 'queued' OR (c.status = 'running' AND c.lease_expires_at < now()))
+            AND NOT (c.app_id = ANY(p_excluded_app_ids))
+            AND NOT (c.app_user_id = ANY(p_excluded_app_user_ids))
+        ORDER BY c.enqueued_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING q.*;
+END;
+$function$;
+
+revoke execute on function "public"."claim_queued_task"(text, integer, uuid[], uuid[]) from public;
+
+revoke execute on function "public"."claim_queued_task"(text, integer, uuid[], uuid[]) from "anon";
+
+revoke execute on function "public"."claim_queued_task"(text, integer, uuid[], uuid[]) from "authenticated";
+
+grant execute on function "public"."claim_queued_task"(text, integer, uuid[], uuid[]) to "service_role";
+
+grant delete on table "public"."task_queue" to "anon";
+
+grant insert on table "public"."task_queue" to "anon";
+
+grant references on table "public"."task_queue" to "anon";
+
+grant select on table "public"."task_queue" to "anon";
+
+grant trigger on table "public"."task_queue" to "anon";
+
+grant truncate on table "public"."task_queue" to "anon";
+
+grant update on table "public"."task_queue" to "anon";
+
+grant delete on table "public"."task_queue" to "authenticated";
+
+grant insert on table "public"."task_queue" to "authenticated";
+
+grant references on table "public"."task_queue" to "authenticated";
+
+grant select on table "public"."task_queue" to "authenticated";
+
+grant trigger on table "public"."task_queue" to "authenticated";
+
+grant truncate on table "public"."task_queue" to "authenticated";
+
+grant update on table "public"."task_queue" to "authenticated";
+
+grant delete on table "public"."task_queue" to "service_role";
+
+grant insert on table "public"."task_queue" to "service_role";
+
+grant references on table "public"."task_queue" to "service_role";
+
+grant select on table "public"."task_queue" to "service_role";
+
+grant trigger on table "public"."task_queue" to "service_role";
+
+grant truncate on table "public"."task_queue" to "service_role";
+
+grant update on table "public"."task_queue" to "service_role";
+
@@ -0,0 +1 @@
+CREATE INDEX task_logs_task_id_type_created_at_idx ON public.task_logs USING btree (task_id, type, created_at, id);
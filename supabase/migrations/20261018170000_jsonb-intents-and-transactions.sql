@@ -0,0 +1,95 @@
+drop function if exists "public"."get_task_chain"(uuid, uuid);
+
+-- Intents and transactions were written as JSON encoded strings, they are unwrapped into jsonb arrays
+alter table "public"."tasks" alter column "intents" type jsonb using (
+    case when json_typeof("intents") = 'string' then ("intents" #>> '{}')::jsonb else "intents"::jsonb end
+);
+
+alter table "public"."submitted_batches" alter column "transactions" type jsonb using (
+    case when json_typeof("transactions") = 'string' then ("transactions" #>> '{}')::jsonb else "transactions"::jsonb end
+);
+
+CREATE INDEX tasks_intents_idx ON public.tasks USING gin (intents jsonb_path_ops);
+
+CREATE INDEX submitted_batches_transactions_idx ON public.submitted_batches USING gin (transactions jsonb_path_ops);
+
+CREATE INDEX submitted_batches_pending_idx ON public.submitted_batches USING btree (app_id, app_user_id, created_at) WHERE submitted_on IS NULL;
+
+CREATE OR REPLACE FUNCTION public.get_task_chain(p_task_id uuid, p_app_id uuid)
+RETURNS TABLE (id uuid, previous_task_id uuid, prompt text, intents jsonb, feedback text, depth integer)
+LANGUAGE sql
+STABLE
+AS $function$
+    WITH RECURSIVE chain AS (
+        SELECT t.id, t.previous_task_id, t.prompt, t.intents, t.feedback, 0 AS depth
+        FROM public.tasks t
+        WHERE t.id = p_task_id AND t.app_id = p_app_id
+        UNION ALL
+        SELECT t.id, t.previous_task_id, t.prompt, t.intents, t.feedback, chain.depth + 1
+        FROM public.tasks t
+        JOIN chain ON t.id = chain.previous_task_id
+        WHERE t.app_id = p_app_id AND chain.depth < 1000
+    )
+    SELECT chain.id, chain.previous_task_id, chain.prompt, chain.intents, chain.feedback, chain.depth
+    FROM chain
+    ORDER BY chain.depth;
+$function$;
+
+-- Intents and transactions reference tokens as "token" (send, approve) or "from_token"/"to_token" (buy, sell, swap)
+CREATE OR REPLACE FUNCTION public.get_task_intents_for_token(p_app_id uuid, p_token_address text)
+RETURNS TABLE (task_id uuid, created_at timestamp with time zone, intent jsonb)
+LANGUAGE sql
+STABLE
+AS $function$
+    SELECT t.id, t.created_at, intent
+    FROM public.tasks t
+    CROSS JOIN LATERAL jsonb_array_elements(t.intents) AS intent
+    WHERE t.app_id = p_app_id
+        AND (
+            t.intents @> jsonb_build_array(jsonb_build_object('token', jsonb_build_object('address', p_token_address)))
+            OR t.intents @> jsonb_build_array(jsonb_build_object('from_token', jsonb_build_object('address', p_token_address)))
+            OR t.intents @> jsonb_build_array(jsonb_build_object('to_token', jsonb_build_object('address', p_token_address)))
+        )
+        AND p_token_address IN (intent->'token'->>'address', intent->'from_token'->>'address', intent->'to_token'->>'address')
+    ORDER BY t.created_at DESC, t.id;
+$function$;
+
+CREATE OR REPLACE FUNCTION public.get_submitted_batches_for_token(p_app_id uuid, p_token_address text)
+RETURNS SETOF public.submitted_batches
+LANGUAGE sql
+STABLE
+AS $function$
+    SELECT b.*
+    FROM public.submitted_batches b
+    WHERE b.app_id = p_app_id
+        AND (
+            b.transactions @> jsonb_build_array(jsonb_build_object('token', jsonb_build_object('address', p_token_address)))
+            OR b.transactions @> jsonb_build_array(jsonb_build_object('from_token', jsonb_build_object('address', p_token_address)))
+            OR b.transactions @> jsonb_build_array(jsonb_build_object('to_token', jsonb_build_object('address', p_token_address)))
+        )
+    ORDER BY b.created_at DESC;
+$function$;
+
+revoke execute on function "public"."get_task_chain"(uuid, uuid) from public;
+
+revoke execute on function "public"."get_task_chain"(uuid, uuid) from "anon";
+
+revoke execute on function "public"."get_task_chain"(uuid, uuid) from "authenticated";
+
+grant execute on function "public"."get_task_chain"(uuid, uuid) to "service_role";
+
+revoke execute on function "public"."get_task_intents_for_token"(uuid, text) from public;
+
+revoke execute on function "public"."get_task_intents_for_token"(uuid, text) from "anon";
+
+revoke execute on function "public"."get_task_intents_for_token"(uuid, text) from "authenticated";
+
+grant execute on function "public"."get_task_intents_for_token"(uuid, text) to "service_role";
+
+revoke execute on function "public"."get_submitted_batches_for_token"(uuid, text) from public;
+
+revoke execute on function "public"."get_submitted_batches_for_token"(uuid, text) from "anon";
+
+revoke execute on function "public"."get_submitted_batches_for_token"(uuid, text) from "authenticated";
+
+grant execute on function "public"."get_submitted_batches_for_token"(uuid, text) to "service_role";
@@ -0,0 +1,106 @@
+create table "public"."safe_nonces" (
+    "chain_id" bigint not null,
+    "safe_address" text not null,
+    "next_nonce" bigint not null,
+    "reserved_at" timestamp with time zone not null default now()
+);
+
+
+alter table "public"."safe_nonces" enable row level security;
+
+CREATE UNIQUE INDEX safe_nonces_pkey ON public.safe_nonces USING btree (chain_id, safe_address);
+
+alter table "public"."safe_nonces" add constraint "safe_nonces_pkey" PRIMARY KEY using index "safe_nonces_pkey";
+
+-- Reserves p_count consecutive nonces and returns the first one. Nonces below p_min_nonce (the on-chain nonce or one
+-- already queued in the transaction service) are skipped, and reservations older than the TTL are dropped,
+-- since by then they were either proposed (and are part of p_min_nonce) or abandoned
+CREATE OR REPLACE FUNCTION public.reserve_safe_nonces(p_chain_id bigint, p_safe_address text, p_count integer, p_min_nonce bigint, p_reservation_ttl_seconds integer)
+RETURNS bigint
+LANGUAGE sql
+AS $function$
+    INSERT INTO public.safe_nonces AS n (chain_id, safe_address, next_nonce, reserved_at)
+    VALUES (p_chain_id, p_safe_address, p_min_nonce + p_count, now())
+    ON CONFLICT (chain_id, safe_address) DO UPDATE
+    SET "next_nonce" = (
+            CASE WHEN n.reserved_at < now() - make_interval(secs => p_reservation_ttl_seconds)
+                THEN p_min_nonce
+                ELSE GREATEST(n.next_nonce, p_min_nonce)
+            END
+        ) + p_count,
+        "reserved_at" = now()
+    RETURNING n.next_nonce - p_count;
+$function$;
+
+-- Gives back the latest reservation, only if no nonces were reserved after it
+CREATE OR REPLACE FUNCTION public.release_safe_nonces(p_chain_id bigint, p_safe_address text, p_start_nonce bigint, p_count integer)
+RETURNS boolean
+LANGUAGE sql
+AS $function$
+    WITH released AS (
+        UPDATE public.safe_nonces
+        SET "next_nonce" = p_start_nonce
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND next_nonce = p_start_nonce + p_count
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM released);
+$function$;
+
+revoke execute on function "public"."reserve_safe_nonces"(bigint, text, integer, bigint, integer) from public;
+
+revoke execute on function "public"."reserve_safe_nonces"(bigint, text, integer, bigint, integer) from "anon";
+
+revoke execute on function "public"."reserve_safe_nonces"(bigint, text, integer, bigint, integer) from "authenticated";
+
+grant execute on function "public"."reserve_safe_nonces"(bigint, text, integer, bigint, integer) to "service_role";
+
+revoke execute on function "public"."release_safe_nonces"(bigint, text, bigint, integer) from public;
+
+revoke execute on function "public"."release_safe_nonces"(bigint, text, bigint, integer) from "anon";
+
+revoke execute on function "public"."release_safe_nonces"(bigint, text, bigint, integer) from "authenticated";
+
+grant execute on function "public"."release_safe_nonces"(bigint, text, bigint, integer) to "service_role";
+
+grant delete on table "public"."safe_nonces" to "anon";
+
+grant insert on table "public"."safe_nonces" to "anon";
+
+grant references on table "public"."safe_nonces" to "anon";
+
+grant select on table "public"."safe_nonces" to "anon";
+
+grant trigger on table "public"."safe_nonces" to "anon";
+
+grant truncate on table "public"."safe_nonces" to "anon";
+
+grant update on table "public"."safe_nonces" to "anon";
+
+grant delete on table "public"."safe_nonces" to "authenticated";
+
+grant insert on table "public"."safe_nonces" to "authenticated";
+
+grant references on table "public"."safe_nonces" to "authenticated";
+
+grant select on table "public"."safe_nonces" to "authenticated";
+
+grant trigger on table "public"."safe_nonces" to "authenticated";
+
+grant truncate on table "public"."safe_nonces" to "authenticated";
+
+grant update on table "public"."safe_nonces" to "authenticated";
+
+grant delete on table "public"."safe_nonces" to "service_role";
+
+grant insert on table "public"."safe_nonces" to "service_role";
+
+grant references on table "public"."safe_nonces" to "service_role";
+
+grant select on table "public"."safe_nonces" to "service_role";
+
+grant trigger on table "public"."safe_nonces" to "service_role";
+
+grant truncate on table "public"."safe_nonces" to "service_role";
+
+grant update on table "public"."safe_nonces" to "service_role";
+
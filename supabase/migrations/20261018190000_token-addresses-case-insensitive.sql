@@ -0,0 +1,56 @@
+drop index if exists "public"."tasks_intents_idx";
+
+drop index if exists "public"."submitted_batches_transactions_idx";
+
+-- Token addresses are stored as they appear in the network's token list, some of them checksummed and some lowercase.
+-- Lookups compare the lowercase addresses referenced as "token" (send, approve) or "from_token"/"to_token" (buy, sell, swap)
+CREATE OR REPLACE FUNCTION public.get_token_addresses(p_items jsonb)
+RETURNS text[]
+LANGUAGE sql
+IMMUTABLE
+AS $function$
+    SELECT coalesce(array_agg(DISTINCT lower(a.address)), '{}')
+    FROM jsonb_array_elements(CASE WHEN jsonb_typeof(p_items) = 'array' THEN p_items ELSE '[]'::jsonb END) AS item
+    CROSS JOIN LATERAL (
+        VALUES (item->'token'->>'address'), (item->'from_token'->>'address'), (item->'to_token'->>'address')
+    ) AS a(address)
+    WHERE a.address IS NOT NULL;
+$function$;
+
+CREATE INDEX tasks_intent_token_addresses_idx ON public.tasks USING gin (public.get_token_addresses(intents));
+
+CREATE INDEX submitted_batches_token_addresses_idx ON public.submitted_batches USING gin (public.get_token_addresses(transactions));
+
+CREATE OR REPLACE FUNCTION public.get_task_intents_for_token(p_app_id uuid, p_token_address text)
+RETURNS TABLE (task_id uuid, created_at timestamp with time zone, intent jsonb)
+LANGUAGE sql
+STABLE
+AS $function$
+    SELECT t.id, t.created_at, intent
+    FROM public.tasks t
+    CROSS JOIN LATERAL jsonb_array_elements(t.intents) AS intent
+    WHERE t.app_id = p_app_id
+        AND public.get_token_addresses(t.intents) @> ARRAY[lower(p_token_address)]
+        AND lower(p_token_address) IN (lower(intent->'token'->>'address'), lower(intent->'from_token'->>'address'), lower(intent->'to_token'->>'address'))
+    ORDER BY t.created_at DESC, t.id;
+$function$;
+
+CREATE OR REPLACE FUNCTION public.get_submitted_batches_for_token(p_app_id uuid, p_token_address text)
+RETURNS SETOF public.submitted_batches
+LANGUAGE sql
+STABLE
+AS $function$
+    SELECT b.*
+    FROM public.submitted_batches b
+    WHERE b.app_id = p_app_id
+        AND public.get_token_addresses(b.transactions) @> ARRAY[lower(p_token_address)]
+    ORDER BY b.created_at DESC;
+$function$;
+
+revoke execute on function "public"."get_token_addresses"(jsonb) from public;
+
+revoke execute on function "public"."get_token_addresses"(jsonb) from "anon";
+
+revoke execute on function "public"."get_token_addresses"(jsonb) from "authenticated";
+
+grant execute on function "public"."get_token_addresses"(jsonb) to "service_role";
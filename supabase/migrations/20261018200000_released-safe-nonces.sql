@@ -0,0 +1,173 @@
+create table "public"."released_safe_nonces" (
+    "chain_id" bigint not null,
+    "safe_address" text not null,
+    "start_nonce" bigint not null,
+    "nonce_count" integer not null
+);
+
+
+alter table "public"."released_safe_nonces" enable row level security;
+
+CREATE UNIQUE INDEX released_safe_nonces_pkey ON public.released_safe_nonces USING btree (chain_id, safe_address, start_nonce);
+
+alter table "public"."released_safe_nonces" add constraint "released_safe_nonces_pkey" PRIMARY KEY using index "released_safe_nonces_pkey";
+
+-- Reserves p_count consecutive nonces and returns the first one. Released nonces that fit are handed out first,
+-- so declined proposals don't leave gaps that block the proposals after them. Nonces below p_min_nonce (the
+-- on-chain nonce or one already queued in the transaction service) are skipped, and reservations older than the
+-- TTL are dropped, since by then they were either proposed (and are part of p_min_nonce) or abandoned
+CREATE OR REPLACE FUNCTION public.reserve_safe_nonces(p_chain_id bigint, p_safe_address text, p_count integer, p_min_nonce bigint, p_reservation_ttl_seconds integer)
+RETURNS bigint
+LANGUAGE plpgsql
+AS $function$
+DECLARE
+    v_next_nonce bigint;
+    v_reserved_at timestamp with time zone;
+    v_start_nonce bigint;
+BEGIN
+    INSERT INTO public.safe_nonces (chain_id, safe_address, next_nonce, reserved_at)
+    VALUES (p_chain_id, p_safe_address, p_min_nonce, now())
+    ON CONFLICT (chain_id, safe_address) DO NOTHING;
+
+    SELECT next_nonce, reserved_at INTO v_next_nonce, v_reserved_at
+    FROM public.safe_nonces
+    WHERE chain_id = p_chain_id AND safe_address = p_safe_address
+    FOR UPDATE;
+
+    IF v_reserved_at < now() - make_interval(secs => p_reservation_ttl_seconds) THEN
+        v_next_nonce := p_min_nonce;
+        DELETE FROM public.released_safe_nonces
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address;
+    ELSE
+        v_next_nonce := GREATEST(v_next_nonce, p_min_nonce);
+        -- Released nonces below p_min_nonce were used or proposed since
+        DELETE FROM public.released_safe_nonces
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND start_nonce + nonce_count <= p_min_nonce;
+        UPDATE public.released_safe_nonces
+        SET "start_nonce" = p_min_nonce, "nonce_count" = start_nonce + nonce_count - p_min_nonce
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND start_nonce < p_min_nonce;
+    END IF;
+
+    SELECT start_nonce INTO v_start_nonce
+    FROM public.released_safe_nonces
+    WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND nonce_count >= p_count
+    ORDER BY start_nonce
+    LIMIT 1;
+
+    IF FOUND THEN
+        DELETE FROM public.released_safe_nonces
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND start_nonce = v_start_nonce AND nonce_count = p_count;
+        UPDATE public.released_safe_nonces
+        SET "start_nonce" = start_nonce + p_count, "nonce_count" = nonce_count - p_count
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND start_nonce = v_start_nonce;
+    ELSE
+        v_start_nonce := v_next_nonce;
+        v_next_nonce := v_next_nonce + p_count;
+    END IF;
+
+    UPDATE public.safe_nonces
+    SET "next_nonce" = v_next_nonce, "reserved_at" = now()
+    WHERE chain_id = p_chain_id AND safe_address = p_safe_address;
+
+    RETURN v_start_nonce;
+END;
+$function$;
+
+-- Gives back reserved nonces. Released nonces are merged with the released ranges next to them, and the ones at the
+-- end of the reservations lower next_nonce instead
+CREATE OR REPLACE FUNCTION public.release_safe_nonces(p_chain_id bigint, p_safe_address text, p_start_nonce bigint, p_count integer)
+RETURNS boolean
+LANGUAGE plpgsql
+AS $function$
+DECLARE
+    v_next_nonce bigint;
+    v_start_nonce bigint := p_start_nonce;
+    v_end_nonce bigint := p_start_nonce + p_count;
+    v_before public.released_safe_nonces;
+    v_after public.released_safe_nonces;
+BEGIN
+    SELECT next_nonce INTO v_next_nonce
+    FROM public.safe_nonces
+    WHERE chain_id = p_chain_id AND safe_address = p_safe_address
+    FOR UPDATE;
+
+    IF NOT FOUND OR v_end_nonce > v_next_nonce THEN
+        RETURN false;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM public.released_safe_nonces
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address
+            AND start_nonce < v_end_nonce AND p_start_nonce < start_nonce + nonce_count
+    ) THEN
+        RETURN false;
+    END IF;
+
+    DELETE FROM public.released_safe_nonces
+    WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND start_nonce + nonce_count = p_start_nonce
+    RETURNING * INTO v_before;
+    IF v_before IS NOT NULL THEN
+        v_start_nonce := v_before.start_nonce;
+    END IF;
+
+    DELETE FROM public.released_safe_nonces
+    WHERE chain_id = p_chain_id AND safe_address = p_safe_address AND start_nonce = v_end_nonce
+    RETURNING * INTO v_after;
+    IF v_after IS NOT NULL THEN
+        v_end_nonce := v_after.start_nonce + v_after.nonce_count;
+    END IF;
+
+    IF v_end_nonce = v_next_nonce THEN
+        UPDATE public.safe_nonces
+        SET "next_nonce" = v_start_nonce
+        WHERE chain_id = p_chain_id AND safe_address = p_safe_address;
+    ELSE
+        INSERT INTO public.released_safe_nonces (chain_id, safe_address, start_nonce, nonce_count)
+        VALUES (p_chain_id, p_safe_address, v_start_nonce, v_end_nonce - v_start_nonce);
+    END IF;
+
+    RETURN true;
+END;
+$function$;
+
+grant delete on table "public"."released_safe_nonces" to "anon";
+
+grant insert on table "public"."released_safe_nonces" to "anon";
+
+grant references on table "public"."released_safe_nonces" to "anon";
+
+grant select on table "public"."released_safe_nonces" to "anon";
+
+grant trigger on table "public"."released_safe_nonces" to "anon";
+
+grant truncate on table "public"."released_safe_nonces" to "anon";
+
+grant update on table "public"."released_safe_nonces" to "anon";
+
+grant delete on table "public"."released_safe_nonces" to "authenticated";
+
+grant insert on table "public"."released_safe_nonces" to "authenticated";
+
+grant references on table "public"."released_safe_nonces" to "authenticated";
+
+grant select on table "public"."released_safe_nonces" to "authenticated";
+
+grant trigger on table "public"."released_safe_nonces" to "authenticated";
+
+grant truncate on table "public"."released_safe_nonces" to "authenticated";
+
+grant update on table "public"."released_safe_nonces" to "authenticated";
+
+grant delete on table "public"."released_safe_nonces" to "service_role";
+
+grant insert on table "public"."released_safe_nonces" to "service_role";
+
+grant references on table "public"."released_safe_nonces" to "service_role";
+
+grant select on table "public"."released_safe_nonces" to "service_role";
+
+grant trigger on table "public"."released_safe_nonces" to "service_role";
+
+grant truncate on table "public"."released_safe_nonces" to "service_role";
+
+grant update on table "public"."released_safe_nonces" to "service_role";